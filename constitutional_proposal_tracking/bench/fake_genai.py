@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import time
+import datetime
+import types
+import random
+import hashlib
+import threading
+import dataclasses
+
+# Local stand-in for google.generativeai, installed into sys.modules by the benchmark
+# runner before a stage script is executed.
+#
+# Responses are replayed, in order of preference, from:
+#   1. a recorded response cache directory (the .cache/gemini format of gemini/cache.py),
+#      looked up with the same content-addressed key the real call would have used;
+#   2. a fixture registered for the attached PDF (the stage's existing JSON output);
+#   3. a synthetic empty value: [] or {} following the response_schema type, else
+#      Settings.synthetic.
+# Cached contents (genai.caching) are kept in memory; their parts count as cached bytes,
+# not prompt bytes, on the calls made through them.
+# Every call sleeps for the configured latency and fails with the configured probability.
+
+
+class FakeAPIError(Exception):
+    """Raised for injected failures; the message mimics a quota error."""
+
+
+class Stats:
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.uploads = 0
+        self.prompt_bytes = 0
+        self.cached_bytes = 0
+        self.cached_contents = 0
+        self.response_bytes = 0
+        self.replayed = 0
+        self.fixtures = 0
+        self.synthetic = 0
+        self.latency_s = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, **deltas):
+        with self._lock:
+            for name, value in deltas.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self):
+        return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+
+
+STATS = Stats()
+
+
+STREAM_CHUNK_CHARS = 512
+
+
+class Settings:
+    latency = 0.0          # mean seconds per call
+    jitter = 0.0           # +/- uniform jitter, seconds
+    failure_rate = 0.0     # probability of FakeAPIError per call
+    recordings_dir = None  # ResponseCache directory to replay from
+    fixtures = {}          # PDF stem -> path of a JSON file returned for that PDF
+    synthetic = "[]"       # fallback response text when nothing is recorded
+    rng = random.Random(0)
+
+
+@dataclasses.dataclass
+class GenerationConfig:
+    # Only the fields the scripts use; recorded keys that include a generation_config
+    # may therefore not match the real SDK's and fall through to fixtures/synthetic.
+    candidate_count: int = None
+    stop_sequences: list = None
+    max_output_tokens: int = None
+    temperature: float = None
+    top_p: float = None
+    top_k: int = None
+    response_mime_type: str = None
+    response_schema: object = None
+
+
+class FakeFile:
+    def __init__(self, path, display_name=None):
+        self.path = path
+        self.display_name = display_name or os.path.basename(path)
+        digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+        self.name = f"files/{digest}"
+        self.uri = f"https://fake.local/{self.name}"
+        self.state = types.SimpleNamespace(name="ACTIVE")
+        self.expiration_time = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=48)
+
+
+_files = {}
+
+
+def configure(**kwargs):
+    pass
+
+
+def upload_file(path=None, display_name=None, **kwargs):
+    handle = FakeFile(path, display_name)
+    _files[handle.name] = handle
+    STATS.add(uploads=1)
+    return handle
+
+
+def get_file(name):
+    return _files[name]
+
+
+def delete_file(name):
+    _files.pop(name, None)
+
+
+def list_files():
+    return list(_files.values())
+
+
+class CachedContent:
+    def __init__(self, model, contents, ttl=None, display_name=None, system_instruction=None):
+        self.model = model
+        self.contents = list(contents)
+        self.display_name = display_name
+        self.system_instruction = system_instruction
+        self.name = f"cachedContents/{len(_cached_contents) + 1}"
+        self.expire_time = datetime.datetime.now(datetime.timezone.utc) + (ttl or datetime.timedelta(hours=1))
+
+    @classmethod
+    def create(cls, model, contents, ttl=None, display_name=None, system_instruction=None, **kwargs):
+        cached = cls(model, contents, ttl, display_name, system_instruction)
+        _cached_contents[cached.name] = cached
+        STATS.add(cached_contents=1)
+        return cached
+
+    def update(self, ttl=None, **kwargs):
+        self.expire_time = datetime.datetime.now(datetime.timezone.utc) + (ttl or datetime.timedelta(hours=1))
+
+    def delete(self):
+        _cached_contents.pop(self.name, None)
+
+
+_cached_contents = {}
+caching = types.SimpleNamespace(CachedContent=CachedContent)
+
+
+class FakeResponse:
+    def __init__(self, text, prompt_bytes):
+        self.text = text
+        self.usage_metadata = types.SimpleNamespace(
+            prompt_token_count=prompt_bytes // 4,
+            candidates_token_count=len(text.encode('utf-8')) // 4,
+        )
+
+
+def _prompt_bytes(contents):
+    total = 0
+    for part in contents:
+        if isinstance(part, str):
+            total += len(part.encode('utf-8'))
+        elif isinstance(part, FakeFile):
+            total += os.path.getsize(part.path)
+    return total
+
+
+def _recorded(model_name, contents, generation_config):
+    if not Settings.recordings_dir:
+        return None
+    from constitutional_proposal_tracking.gemini.cache import PdfAttachment, make_key
+    key_parts = [PdfAttachment(p.path) if isinstance(p, FakeFile) else p for p in contents]
+    path = os.path.join(Settings.recordings_dir, f"{make_key(model_name, key_parts, generation_config)}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["text"]
+
+
+def _fixture(contents):
+    for part in contents:
+        if isinstance(part, FakeFile):
+            stem = os.path.splitext(os.path.basename(part.path))[0]
+            fixture_path = Settings.fixtures.get(stem)
+            if fixture_path:
+                with open(fixture_path, 'r', encoding='utf-8') as f:
+                    return f.read()
+    return None
+
+
+def _synthetic(generation_config):
+    schema = getattr(generation_config, "response_schema", None)
+    if isinstance(generation_config, dict):
+        schema = generation_config.get("response_schema")
+    schema_type = str((schema or {}).get("type", "")).upper() if isinstance(schema, dict) else ""
+    if schema_type == "ARRAY":
+        return "[]"
+    if schema_type == "OBJECT":
+        return "{}"
+    return Settings.synthetic
+
+
+class GenerativeModel:
+    def __init__(self, model_name="gemini-3-flash-preview", **kwargs):
+        self.model_name = model_name if model_name.startswith("models/") else f"models/{model_name}"
+        self.cached_content = None
+
+    @classmethod
+    def from_cached_content(cls, cached_content, **kwargs):
+        model = cls(cached_content.model)
+        model.cached_content = cached_content
+        return model
+
+    def generate_content(self, contents, generation_config=None, stream=False, **kwargs):
+        if not isinstance(contents, (list, tuple)):
+            contents = [contents]
+        prompt_bytes = _prompt_bytes(contents)
+        STATS.add(calls=1, prompt_bytes=prompt_bytes)
+        if self.cached_content is not None:
+            if self.cached_content.name not in _cached_contents:
+                raise FakeAPIError(f"404 {self.cached_content.name} not found")
+            STATS.add(cached_bytes=_prompt_bytes(self.cached_content.contents))
+            contents = self.cached_content.contents + list(contents)
+
+        delay = max(0.0, Settings.latency + Settings.rng.uniform(-Settings.jitter, Settings.jitter))
+        time.sleep(delay)
+        STATS.add(latency_s=delay)
+
+        if Settings.rng.random() < Settings.failure_rate:
+            STATS.add(failures=1)
+            raise FakeAPIError("429 Resource has been exhausted (injected by benchmark)")
+
+        text = _recorded(self.model_name, contents, generation_config)
+        if text is not None:
+            STATS.add(replayed=1)
+        else:
+            text = _fixture(contents)
+            if text is not None:
+                STATS.add(fixtures=1)
+            else:
+                text = _synthetic(generation_config)
+                STATS.add(synthetic=1)
+        STATS.add(response_bytes=len(text.encode('utf-8')))
+        if stream:
+            return [FakeResponse(text[i:i + STREAM_CHUNK_CHARS], prompt_bytes)
+                    for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+        return FakeResponse(text, prompt_bytes)
+
+
+def install(latency=0.0, jitter=0.0, failure_rate=0.0, recordings_dir=None, fixtures=None, seed=0, synthetic="[]"):
+    """Registers this module as google.generativeai (and .types) in sys.modules."""
+    Settings.latency = latency
+    Settings.jitter = jitter
+    Settings.failure_rate = failure_rate
+    Settings.recordings_dir = recordings_dir
+    Settings.fixtures = dict(fixtures or {})
+    Settings.synthetic = synthetic
+    Settings.rng = random.Random(seed)
+
+    this = sys.modules[__name__]
+    google = sys.modules.get("google")
+    if google is None:
+        google = types.ModuleType("google")
+        google.__path__ = []
+    google.generativeai = this
+    types_module = types.ModuleType("google.generativeai.types")
+    types_module.GenerationConfig = GenerationConfig
+    sys.modules["google"] = google
+    sys.modules["google.generativeai"] = this
+    sys.modules["google.generativeai.types"] = types_module
+    return STATS
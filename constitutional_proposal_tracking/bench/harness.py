@@ -0,0 +1,257 @@
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+# Offline end-to-end benchmark of the pipeline stages.
+#
+# For every (commission, stage) a throwaway workspace is built from the repository data and
+# the real stage script runs in its own process against bench/fake_genai.py. Extraction
+# stages get placeholder PDFs named after the existing extracted JSON files, and the fake
+# model replays those JSON files as the model output, so downstream parsing does real work.
+#
+#   python -m constitutional_proposal_tracking.bench.harness --commissions 3 7 --latency 0.5
+#   python -m constitutional_proposal_tracking.bench.harness --baseline reports/benchmarks/<previous>.json
+
+# --- Configuration ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCRIPTS_DIR = os.path.join(PROJECT_ROOT, "scripts")
+DEFAULT_OUT_DIR = os.path.join(PROJECT_ROOT, "reports", "benchmarks")
+DEFAULT_RECORDINGS_DIR = os.path.join(PROJECT_ROOT, ".cache", "gemini")
+ALL_COMMISSIONS = [1, 2, 3, 4, 5, 6, 7]
+SHARED_INPUTS = ["convention_members.json", "submitted_initiatives"]
+
+# Stage -> script, overrides and how to prepare its inputs.
+#   pdf_kind / fixture_dir: extraction stage; placeholder PDFs replace the JSON outputs.
+#   clear: workspace subdirectories removed so the stage recomputes them.
+#   commissions: restrict the stage to these commissions.
+#   synthetic: fake response when nothing is recorded (default "[]").
+STAGES = {
+    "genesis": {
+        "script": "02_extract_genesis_universal.py",
+        "pdf_kind": "GENESIS",
+        "fixture_dir": "genesis-extracted",
+        "set": ["BASE_DIR"],
+    },
+    "voting": {
+        "script": "04_extract_voting_universal.py",
+        "pdf_kind": "VOTACION",
+        "fixture_dir": "indicaciones-universal-extracted",
+        "set": ["BASE_DIR"],
+    },
+    "authors": {
+        "script": "05_populate_authors_global.py",
+        "set": ["BASE_DIR", "TARGET_COMISSIONS"],
+    },
+    "applier": {
+        "script": "06_apply_indications_ai_v3.py",
+        "set": ["BASE_DIR", "TARGET_COMISSIONS"],
+        "clear": ["draft-after-indications"],
+        "env": {"FORCE_RESTART": "1"},
+    },
+    "matchers": {
+        "script": "04d_semantic_matcher.py",
+        "set": ["BASE_DIR"],
+        "commissions": [2],
+        "synthetic": '{"match_found": false}',
+    },
+}
+
+
+def is_base_json(path):
+    name = os.path.basename(path)
+    return not any(tag in name for tag in ("_enriched", "_PREVIEW", "_candidates"))
+
+
+def prepare_workspace(com_n, stage):
+    """Copies the shared inputs and comision-N into a temp dir. Returns (workspace, fixtures)."""
+    spec = STAGES[stage]
+    workspace = tempfile.mkdtemp(prefix=f"bench_c{com_n}_{stage}_")
+    for name in SHARED_INPUTS:
+        src = os.path.join(PROJECT_ROOT, name)
+        if os.path.isdir(src):
+            shutil.copytree(src, os.path.join(workspace, name))
+        elif os.path.exists(src):
+            shutil.copy2(src, workspace)
+    com_dir = os.path.join(workspace, f"comision-{com_n}")
+    shutil.copytree(os.path.join(PROJECT_ROOT, f"comision-{com_n}"), com_dir)
+
+    for sub in spec.get("clear", []):
+        shutil.rmtree(os.path.join(com_dir, sub), ignore_errors=True)
+
+    fixtures = {}
+    if spec.get("pdf_kind"):
+        src_dir = os.path.join(PROJECT_ROOT, f"comision-{com_n}", spec["fixture_dir"])
+        pdf_dir = os.path.join(com_dir, "PDFs")
+        os.makedirs(pdf_dir, exist_ok=True)
+        pattern = os.path.join(src_dir, f"C{com_n}_{spec['pdf_kind']}_*.json")
+        for json_path in sorted(filter(is_base_json, glob.glob(pattern))):
+            stem = os.path.splitext(os.path.basename(json_path))[0]
+            with open(os.path.join(pdf_dir, f"{stem}.pdf"), 'wb') as f:
+                f.write(f"%PDF-1.4\n% benchmark placeholder: {stem}\n%%EOF\n".encode('utf-8'))
+            fixtures[stem] = json_path
+        shutil.rmtree(os.path.join(com_dir, spec["fixture_dir"]), ignore_errors=True)
+    return workspace, fixtures
+
+
+def has_inputs(com_n, stage, fixtures):
+    spec = STAGES[stage]
+    if spec.get("commissions") and com_n not in spec["commissions"]:
+        return False
+    if spec.get("pdf_kind"):
+        return bool(fixtures)
+    return True
+
+
+def run_stage(com_n, stage, args):
+    spec = STAGES[stage]
+    workspace, fixtures = prepare_workspace(com_n, stage)
+    try:
+        if not has_inputs(com_n, stage, fixtures):
+            return None
+
+        values = {"BASE_DIR": workspace, "TARGET_COMISSIONS": [com_n]}
+        metrics_path = os.path.join(workspace, "bench_metrics.json")
+        fixtures_path = os.path.join(workspace, "bench_fixtures.json")
+        with open(fixtures_path, 'w', encoding='utf-8') as f:
+            json.dump(fixtures, f)
+
+        cmd = [
+            sys.executable, "-m", "constitutional_proposal_tracking.bench.run_stage",
+            os.path.join(SCRIPTS_DIR, spec["script"]),
+            "--metrics", metrics_path,
+            "--fixtures", fixtures_path,
+            "--latency", str(args.latency),
+            "--jitter", str(args.jitter),
+            "--failure-rate", str(args.failure_rate),
+            "--seed", str(args.seed),
+            "--synthetic", spec.get("synthetic", "[]"),
+        ]
+        for name in spec["set"]:
+            cmd += ["--set", f"{name}={json.dumps(values[name])}"]
+        if args.recordings and os.path.isdir(args.recordings):
+            cmd += ["--recordings", args.recordings]
+
+        env = dict(os.environ)
+        env.update({
+            "GEMINI_API_KEY": "bench",
+            "GEMINI_CACHE_DISABLED": "1",   # every call must reach the fake model
+            "GEMINI_FILES_REGISTRY": os.path.join(workspace, ".gemini_files.json"),
+            "GEMINI_METRICS_PATH": os.environ.get("GEMINI_METRICS_PATH") or os.path.join(workspace, ".metrics.jsonl"),
+            "GEMINI_RPM": str(args.rpm),
+            "PDF_TEXT_CACHE_DIR": os.path.join(workspace, ".pdf_text"),
+            "PYTHONUNBUFFERED": "1",
+        })
+        env.update(spec.get("env", {}))
+
+        log_path = os.path.join(args.log_dir, f"c{com_n}_{stage}.log") if args.log_dir else os.devnull
+        t0 = time.perf_counter()
+        with open(log_path, 'w', encoding='utf-8') as log:
+            subprocess.run(cmd, cwd=PROJECT_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+        elapsed = time.perf_counter() - t0
+
+        if not os.path.exists(metrics_path):
+            return {"commission": com_n, "stage": stage, "error": "no metrics (crashed)", "process_s": round(elapsed, 3)}
+        with open(metrics_path, 'r', encoding='utf-8') as f:
+            metrics = json.load(f)
+        return {"commission": com_n, "stage": stage, "process_s": round(elapsed, 3), **metrics}
+    finally:
+        if not args.keep:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+
+def summarize(results):
+    per_commission = {}
+    for r in results:
+        c = per_commission.setdefault(str(r["commission"]), {
+            "wall_s": 0.0, "calls": 0, "failures": 0, "prompt_bytes": 0, "peak_rss_mb": 0.0, "stages": 0})
+        c["wall_s"] = round(c["wall_s"] + r.get("wall_s", 0.0), 3)
+        c["calls"] += r.get("calls", 0)
+        c["failures"] += r.get("failures", 0)
+        c["prompt_bytes"] += r.get("prompt_bytes", 0)
+        c["peak_rss_mb"] = max(c["peak_rss_mb"], r.get("peak_rss_mb", 0.0))
+        c["stages"] += 1
+    return per_commission
+
+
+def print_table(results, baseline=None):
+    base = {(b["commission"], b["stage"]): b for b in (baseline or {}).get("stages", [])}
+    header = f"{'C':>2} {'stage':<9} {'wall s':>8} {'calls':>6} {'fail':>5} {'prompt KB':>10} {'RSS MB':>7}"
+    if base:
+        header += f" {'vs base':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        line = (f"{r['commission']:>2} {r['stage']:<9} {r.get('wall_s', 0):>8.2f} {r.get('calls', 0):>6} "
+                f"{r.get('failures', 0):>5} {r.get('prompt_bytes', 0) / 1024:>10.1f} {r.get('peak_rss_mb', 0):>7.1f}")
+        prev = base.get((r["commission"], r["stage"]))
+        if prev and prev.get("wall_s"):
+            line += f" {100 * (r.get('wall_s', 0) / prev['wall_s'] - 1):>+7.1f}%"
+        if r.get("error"):
+            line += f"  ERROR: {r['error']}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark against a fake Gemini model.")
+    parser.add_argument("--commissions", type=int, nargs="+", default=ALL_COMMISSIONS)
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean fake model latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- latency jitter (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability of an injected API error")
+    parser.add_argument("--rpm", type=float, default=100000, help="GEMINI_RPM for the stages (default: unthrottled)")
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS_DIR, help="Response cache dir to replay")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="Results JSON (default: reports/benchmarks/bench_<timestamp>.json)")
+    parser.add_argument("--baseline", default=None, help="Previous results JSON to compare against")
+    parser.add_argument("--log-dir", default=None, help="Keep each stage's stdout here")
+    parser.add_argument("--keep", action="store_true", help="Keep the temp workspaces")
+    args = parser.parse_args()
+
+    if args.log_dir:
+        os.makedirs(args.log_dir, exist_ok=True)
+
+    results = []
+    t0 = time.perf_counter()
+    for com_n in args.commissions:
+        for stage in args.stages:
+            result = run_stage(com_n, stage, args)
+            if result is not None:
+                results.append(result)
+                print(f"  C{com_n} {stage}: {result.get('wall_s', 0):.2f}s, {result.get('calls', 0)} calls"
+                      + (f" ERROR: {result['error']}" if result.get("error") else ""))
+    total = time.perf_counter() - t0
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "settings": {k: getattr(args, k) for k in ("latency", "jitter", "failure_rate", "rpm", "seed")},
+        "total_wall_s": round(total, 3),
+        "stages": results,
+        "commissions": summarize(results),
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print()
+    print_table(results, baseline)
+    print(f"\nTotal: {total:.1f}s over {len(results)} stage runs")
+
+    out_path = args.out or os.path.join(DEFAULT_OUT_DIR, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {out_path}")
+    return 1 if any(r.get("error") for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
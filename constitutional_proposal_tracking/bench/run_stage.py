@@ -0,0 +1,106 @@
+import os
+import sys
+import ast
+import json
+import time
+import argparse
+import resource
+import traceback
+
+from constitutional_proposal_tracking.bench import fake_genai
+
+# Runs one pipeline script in this (child) process against the fake model and writes its
+# metrics as JSON. Used by bench/harness.py; one process per stage keeps peak RSS per stage.
+#
+# Top-level assignments named in --set are replaced before the script runs, so values
+# derived from them (paths built from BASE_DIR, ...) follow the override.
+
+
+def apply_overrides(tree, overrides):
+    """Replaces the value of top-level `NAME = ...` assignments. Returns the names not found."""
+    pending = dict(overrides)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            if name in pending:
+                node.value = ast.parse(repr(pending.pop(name)), mode="eval").body
+    ast.fix_missing_locations(tree)
+    return list(pending)
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_script(script_path, overrides):
+    with open(script_path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=script_path)
+    missing = apply_overrides(tree, overrides)
+    if missing:
+        print(f"[bench] Warning: {os.path.basename(script_path)} has no top-level {', '.join(missing)}")
+    code = compile(tree, script_path, "exec")
+    module_globals = {"__name__": "__main__", "__file__": os.path.abspath(script_path)}
+    sys.argv = [script_path]
+    exec(code, module_globals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one pipeline script against the fake Gemini model.")
+    parser.add_argument("script")
+    parser.add_argument("--metrics", required=True, help="Where to write the metrics JSON")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=JSON",
+                        help="Override a top-level assignment, e.g. BASE_DIR='\"/tmp/ws\"' or TARGET_COMISSIONS='[3]'")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--recordings", default=None)
+    parser.add_argument("--fixtures", default=None, help="JSON file: {pdf_stem: fixture_path}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--synthetic", default="[]", help="Response text when nothing is recorded")
+    args = parser.parse_args()
+
+    overrides = {}
+    for item in args.set:
+        name, _, value = item.partition("=")
+        overrides[name] = json.loads(value)
+
+    fixtures = {}
+    if args.fixtures:
+        with open(args.fixtures, 'r', encoding='utf-8') as f:
+            fixtures = json.load(f)
+
+    stats = fake_genai.install(
+        latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+        recordings_dir=args.recordings, fixtures=fixtures, seed=args.seed,
+        synthetic=args.synthetic,
+    )
+
+    error = None
+    t0 = time.perf_counter()
+    try:
+        run_script(args.script, overrides)
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            error = f"SystemExit({e.code})"
+    except BaseException as e:
+        traceback.print_exc()
+        error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - t0
+
+    metrics = {
+        "script": os.path.basename(args.script),
+        "wall_s": round(wall, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "error": error,
+        **stats.as_dict(),
+    }
+    metrics["latency_s"] = round(metrics["latency_s"], 3)
+    with open(args.metrics, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, indent=2)
+    return 1 if error else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -165,3 +165,60 @@ COMMISSION_MAP = {
     6: {"genesis": "TABULAR_GENESIS", "voting": "NARRATIVE_VOTING"},
     7: {"genesis": "NARRATIVE_GENESIS", "voting": "NARRATIVE_VOTING"}
 }
+
+# --- Layouts for local (non-LLM) parsing ---
+
+# Prompt Key -> layout markers used by constitutional_proposal_tracking/extraction/ to parse
+# the PDF text layer directly. Profiles without an entry always go to the model.
+LAYOUTS = {
+    "TABULAR_VOTING": {
+        # "- IND 401 (07 Mella, Y. Gómez, ...) Para sustituir ..." (may span several lines)
+        "block_start": r'^\s*[-–•]?\s*IND\b',
+        "block": r'^\s*[-–•]?\s*IND\.?\s*(?:N[°º]\s*)?(?P<number>\d+(?-i:[A-Z])?(?:\s+bis)?(?:\s*(?:,|y|e)\s*\d+(?:\s+bis)?)*)\s*\((?P<authors>[^)]*)\)\s*(?P<body>.*)$',
+        # "En votación: Artículo 49"
+        "context": r'En\s+votaci[óo]n\s*:?\s*(?:el\s+)?art[íi]culo\s+(?P<article>\d+(?:\s+(?:bis|ter|(?-i:[A-Z]))\b)?)',
+        # Voting grid: A favor | En contra | Abstención | No vota | Total | Resultado
+        "result_header": r'resultado',
+        "approved": r'^\s*APROBAD[AO]',
+    },
+}
+
+# --- Record schemas ---
+
+# Prompt Key -> schema of one output record, in the OpenAPI subset Gemini accepts as
+# response_schema. Extractors send an array of it and validate each record locally
+# (constitutional_proposal_tracking/extraction/records.py).
+_GENESIS_RECORD = {
+    "type": "object",
+    "properties": {
+        "article": {"type": "string", "description": "Numbering title, e.g. 'Artículo 1'."},
+        "text": {"type": "string", "description": "Full content of the article."},
+        "sources": {"type": "array", "items": {"type": "string"}, "description": "Initiative IDs, e.g. '24-7'."},
+    },
+    "required": ["article", "text", "sources"],
+}
+
+_VOTING_RECORD = {
+    "type": "object",
+    "properties": {
+        "number": {"type": "string", "description": "Indication number without prefix, e.g. '15'."},
+        "authors_matched": {"type": "array", "items": {"type": "string"}},
+        # null for indications with no existing article to point at: new articles, chapter
+        # titles and epígrafes (six such records are already in the C1, C5 and C6 outputs)
+        "target_article": {"type": "string", "nullable": True,
+                           "description": "Number of the affected article, e.g. '4' or '15 bis'; null for a new article or heading."},
+        "target_scope": {"type": "string", "description": "'TOTAL', 'INCISO', 'INCISO N', 'INCISO FINAL' or 'WORDING'."},
+        "action": {"type": "string", "enum": ["SUBSTITUTE", "DELETE", "ADD", "MODIFY_PHRASE"]},
+        "content": {"type": "string"},
+        "content_to_remove": {"type": "string", "nullable": True},
+        "placement_instructions": {"type": "string", "nullable": True},
+    },
+    "required": ["number", "authors_matched", "target_article", "target_scope", "action", "content"],
+}
+
+RECORD_SCHEMAS = {
+    "NARRATIVE_GENESIS": _GENESIS_RECORD,
+    "TABULAR_GENESIS": _GENESIS_RECORD,
+    "NARRATIVE_VOTING": _VOTING_RECORD,
+    "TABULAR_VOTING": _VOTING_RECORD,
+}
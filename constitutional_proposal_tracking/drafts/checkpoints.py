@@ -0,0 +1,319 @@
+import os
+import sys
+import json
+import glob
+import hashlib
+import argparse
+
+from constitutional_proposal_tracking.utils.files import write_bytes_atomic
+
+# Delta-encoded draft checkpoints.
+#
+# One JSONL file per commission. The first record holds the full genesis draft; every later
+# record holds only what changed in that step:
+#   {"kind": "base",  "step": "draft_00_genesis_master.json", "articles": [...]}
+#   {"kind": "delta", "step": "draft_after_<report>.json",
+#    "changes": {gid: {"set": {...}, "history_append": [...]} | {"replace": {...}}},
+#    "order": [gid, ...]}            # only present when articles were added/removed/reordered
+#
+# Step names are the legacy checkpoint file names, so export_legacy() reproduces the old
+# draft_after_*.json files byte for byte.
+#
+# Each record may carry an "input_hash" (see chain_hash). Together they form the manifest
+# used to resume a chain from the first step whose inputs changed.
+
+CHECKPOINT_FILENAME = "draft_checkpoints.jsonl"
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _copy(obj):
+    return json.loads(_dumps(obj))
+
+
+def legacy_bytes(draft):
+    """Exactly what the applier used to write per step (json.dump, indent=2)."""
+    return json.dumps(draft, ensure_ascii=False, indent=2)
+
+
+def diff_article(prev, cur):
+    """
+    Returns the delta that turns `prev` into `cur`, or None when unchanged.
+    Falls back to a full replacement whenever the compact form would not
+    reproduce `cur` exactly (key order included).
+    """
+    if prev == cur and list(prev) == list(cur):
+        return None
+
+    delta = {}
+    changed = {k: v for k, v in cur.items() if k != "history" and (k not in prev or prev[k] != v)}
+    removed = [k for k in prev if k not in cur]
+    if changed:
+        delta["set"] = changed
+
+    prev_hist = prev.get("history", [])
+    cur_hist = cur.get("history", [])
+    if cur_hist[:len(prev_hist)] == prev_hist:
+        if len(cur_hist) > len(prev_hist):
+            delta["history_append"] = cur_hist[len(prev_hist):]
+    else:
+        delta = None
+
+    if delta is not None and not removed:
+        rebuilt = apply_article_delta(_copy(prev), delta)
+        if _dumps(rebuilt) == _dumps(cur):
+            return delta
+    return {"replace": cur}
+
+
+def apply_article_delta(article, delta):
+    if "replace" in delta:
+        return _copy(delta["replace"])
+    for key, value in delta.get("set", {}).items():
+        article[key] = value
+    if delta.get("history_append"):
+        article.setdefault("history", []).extend(delta["history_append"])
+    return article
+
+
+def diff_draft(prev_draft, cur_draft):
+    prev_by_id = {a["original_id"]: a for a in prev_draft}
+    changes = {}
+    for art in cur_draft:
+        gid = art["original_id"]
+        if gid not in prev_by_id:
+            changes[gid] = {"replace": art}
+            continue
+        delta = diff_article(prev_by_id[gid], art)
+        if delta is not None:
+            changes[gid] = delta
+
+    record = {"changes": changes}
+    prev_order = [a["original_id"] for a in prev_draft]
+    cur_order = [a["original_id"] for a in cur_draft]
+    if prev_order != cur_order:
+        record["order"] = cur_order
+    return record
+
+
+def apply_draft_delta(draft, record):
+    by_id = {a["original_id"]: a for a in draft}
+    for gid, delta in record.get("changes", {}).items():
+        if gid in by_id:
+            by_id[gid] = apply_article_delta(by_id[gid], delta)
+        else:
+            by_id[gid] = _copy(delta["replace"])
+    order = record.get("order") or [a["original_id"] for a in draft]
+    return [by_id[gid] for gid in order]
+
+
+def chain_hash(prev_hash, *parts):
+    """
+    Hash of one step's inputs chained to the previous step's hash, so a change in
+    any earlier input invalidates every later checkpoint.
+    """
+    h = hashlib.sha256((prev_hash or "").encode('utf-8'))
+    for part in parts:
+        h.update(b"\0")
+        h.update(str(part).encode('utf-8'))
+    return h.hexdigest()
+
+
+class CheckpointStore:
+    """
+    Append-only store of draft checkpoints for one commission.
+    A step stores only the changed articles instead of the whole draft with history; finding
+    them still compares (and copies) the whole draft once per step.
+    """
+    def __init__(self, out_dir, filename=CHECKPOINT_FILENAME):
+        self.out_dir = out_dir
+        self.path = os.path.join(out_dir, filename)
+        self._last = None
+
+    # --- Writing ---
+
+    def write_base(self, step, draft, input_hash=None):
+        """Starts a new chain from the genesis draft (truncates any previous chain)."""
+        record = {"kind": "base", "step": step, "input_hash": input_hash, "articles": draft}
+        write_bytes_atomic(self.path, (_dumps(record) + "\n").encode('utf-8'))
+        self._last = _copy(draft)
+
+    def append_step(self, step, draft, input_hash=None):
+        if self._last is None:
+            _, self._last = self._read_until(None)
+        record = diff_draft(self._last, draft)
+        record = {"kind": "delta", "step": step, "input_hash": input_hash, **record}
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(_dumps(record) + "\n")
+        self._last = _copy(draft)
+        return len(record["changes"])
+
+    def truncate_after(self, step):
+        """
+        Drops every record after `step` (used when resuming a chain mid-way). The log is
+        rewritten to a temp file and renamed over it, so an interrupted rewrite keeps the chain.
+        """
+        kept = []
+        for record in self._records(tolerant=True):
+            kept.append(_dumps(record) + "\n")
+            if record["step"] == step:
+                break
+        write_bytes_atomic(self.path, "".join(kept).encode('utf-8'))
+        self._last = None
+
+    # --- Reading ---
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _records(self, tolerant=False):
+        """
+        Yields stored records. With `tolerant`, stops at the first unreadable line
+        (e.g. a step interrupted mid-write) instead of raising.
+        """
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    if tolerant:
+                        return
+                    raise
+
+    def steps(self):
+        return [record["step"] for record in self._records()]
+
+    def manifest(self):
+        """[(step, input_hash), ...] in chain order."""
+        return [(record["step"], record.get("input_hash")) for record in self._records(tolerant=True)]
+
+    def valid_prefix(self, expected):
+        """
+        Number of leading records whose (step, input_hash) match `expected`.
+        Records without a hash never match. Returns 0 when the store is missing or unreadable.
+        """
+        if not self.exists():
+            return 0
+        try:
+            stored = self.manifest()
+        except (OSError, KeyError):
+            return 0
+        n = 0
+        for (step, h), (exp_step, exp_h) in zip(stored, expected):
+            if h is None or step != exp_step or h != exp_h:
+                break
+            n += 1
+        return n
+
+    def _read_until(self, step):
+        draft, last_step = None, None
+        for record in self._records():
+            if record["kind"] == "base":
+                draft = record["articles"]
+            else:
+                draft = apply_draft_delta(draft, record)
+            last_step = record["step"]
+            if step is not None and last_step == step:
+                return last_step, draft
+        if step is not None:
+            raise KeyError(f"Step not found in {self.path}: {step}")
+        return last_step, draft
+
+    def materialize(self, step=None):
+        """Returns the full draft after `step` (the latest step when None)."""
+        return self._read_until(step)[1]
+
+    def export_legacy(self, step, out_path):
+        draft = self.materialize(step)
+        with open(out_path, 'w', encoding='utf-8') as f:
+            f.write(legacy_bytes(draft))
+
+    def iter_drafts(self):
+        """
+        Yields (step, full draft) for every stored step, materializing incrementally.
+        Articles are updated in place, so a draft is only valid until the next one is yielded.
+        """
+        draft = None
+        for record in self._records():
+            if record["kind"] == "base":
+                draft = record["articles"]
+            else:
+                draft = apply_draft_delta(draft, record)
+            yield record["step"], draft
+
+    def export_all_legacy(self, target_dir=None):
+        """Writes every step as a legacy full-snapshot file, materializing incrementally."""
+        target_dir = target_dir or self.out_dir
+        os.makedirs(target_dir, exist_ok=True)
+        written = []
+        for step, draft in self.iter_drafts():
+            out_path = os.path.join(target_dir, step)
+            with open(out_path, 'w', encoding='utf-8') as f:
+                f.write(legacy_bytes(draft))
+            written.append(out_path)
+        return written
+
+    @classmethod
+    def from_legacy_dir(cls, legacy_dir, out_dir=None):
+        """
+        Builds a store from existing draft_00_genesis_master.json + draft_after_*.json files
+        (sorted like the applier sorts its indication files). Without a genesis master the
+        first snapshot becomes the base.
+        """
+        store = cls(out_dir or legacy_dir)
+        paths = sorted(glob.glob(os.path.join(legacy_dir, "draft_after_*.json")))
+        base = os.path.join(legacy_dir, "draft_00_genesis_master.json")
+        if not os.path.exists(base):
+            if not paths:
+                raise FileNotFoundError(f"No draft checkpoints in {legacy_dir}")
+            base = paths.pop(0)
+        with open(base, 'r', encoding='utf-8') as f:
+            store.write_base(os.path.basename(base), json.load(f))
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                store.append_step(os.path.basename(path), json.load(f))
+        return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delta-encoded draft checkpoints.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="Write legacy full-snapshot JSON files.")
+    p_export.add_argument("checkpoint_dir")
+    p_export.add_argument("--step", help="Single step to export (default: all)")
+    p_export.add_argument("--out", help="Target directory (default: checkpoint_dir)")
+
+    p_import = sub.add_parser("import", help="Convert a legacy draft-after-indications directory.")
+    p_import.add_argument("legacy_dir")
+
+    p_steps = sub.add_parser("steps", help="List stored steps.")
+    p_steps.add_argument("checkpoint_dir")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        store = CheckpointStore(args.checkpoint_dir)
+        if args.step:
+            out_dir = args.out or args.checkpoint_dir
+            os.makedirs(out_dir, exist_ok=True)
+            store.export_legacy(args.step, os.path.join(out_dir, args.step))
+            print(f"Exported {args.step}")
+        else:
+            written = store.export_all_legacy(args.out)
+            print(f"Exported {len(written)} snapshots.")
+    elif args.command == "import":
+        store = CheckpointStore.from_legacy_dir(args.legacy_dir)
+        print(f"Wrote {store.path} ({len(store.steps())} steps, {os.path.getsize(store.path) / 1e3:.0f} KB)")
+    elif args.command == "steps":
+        for step in CheckpointStore(args.checkpoint_dir).steps():
+            print(step)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import re
+
+# Per-report context selection for the applier prompt: only the articles a report's
+# indications target, plus a few active neighbours so the model can renumber.
+# `master_draft` is a drafts.master_draft.MasterDraft; articles are referred to by position.
+# The model only sees the ids in its context, so any other id it returns is a new article,
+# even when it happens to name an existing one outside the window (see rekey_new_articles).
+
+NEIGHBOR_WINDOW = 1
+FUZZY_THRESHOLD = 0.5
+MIN_PHRASE_LEN = 12
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+QUOTED_RE = re.compile(r'[“"‘«]{1,2}(.+?)[”"’»]{1,2}')
+
+
+def word_set(text):
+    return {w for w in WORD_RE.findall((text or "").lower()) if len(w) > 3}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def phrases_of(ind):
+    """Literal fragments of the current text an indication refers to."""
+    phrases = []
+    to_remove = str(ind.get("content_to_remove") or "").strip(' "“”‘’')
+    if len(to_remove) >= MIN_PHRASE_LEN:
+        phrases.append(to_remove)
+    placement = str(ind.get("placement_instructions") or "")
+    words = [w.strip() for w in QUOTED_RE.findall(placement)]
+    if len(words) == 2 and all(words):
+        phrases.append(f"{words[0]} {words[1]}")
+    return phrases
+
+
+def find_targets(master_draft, ind):
+    """Positions (in master_draft) of the articles an indication plausibly touches."""
+    targets = set(master_draft.positions_by_number(ind.get("target_article")))
+
+    active_positions = master_draft.positions_with_status("active")
+    for phrase in phrases_of(ind):
+        for i in active_positions:
+            if phrase in (master_draft[i].get("final_content") or ""):
+                targets.add(i)
+
+    # Substitutions usually keep much of the wording: fuzzy-match on word overlap
+    content_words = word_set(ind.get("content"))
+    if len(content_words) >= 5:
+        for i in active_positions:
+            if jaccard(content_words, word_set(master_draft[i].get("final_content"))) >= FUZZY_THRESHOLD:
+                targets.add(i)
+    return targets
+
+
+def with_neighbors(master_draft, selected, window=NEIGHBOR_WINDOW):
+    """`selected` positions plus `window` active articles on each side of each of them."""
+    # Neighbour window over active articles, for renumbering and "después del artículo X"
+    selected = set(selected)
+    active_positions = master_draft.positions_with_status("active")
+    rank = {pos: r for r, pos in enumerate(active_positions)}
+    for i in list(selected):
+        r = rank.get(i)
+        if r is None:
+            continue
+        for offset in range(-window, window + 1):
+            if 0 <= r + offset < len(active_positions):
+                selected.add(active_positions[r + offset])
+    return selected
+
+
+def select_context(master_draft, indications, window=NEIGHBOR_WINDOW):
+    """
+    Returns the subset of master_draft (in draft order) relevant to `indications`,
+    or the full draft when some indication cannot be located at all.
+    """
+    selected = set()
+    for ind in indications:
+        targets = find_targets(master_draft, ind)
+        if not targets:
+            return list(master_draft)
+        selected.update(targets)
+
+    return [master_draft[i] for i in sorted(with_neighbors(master_draft, selected, window))]
+
+
+def rekey_new_articles(updates, context_ids, taken_ids):
+    """
+    Returns `updates` with every id outside `context_ids` treated as a new article: when the
+    id is already in `taken_ids` (the draft, or another new article) it gets a fresh one,
+    "<id>-2", "<id>-3"... `taken_ids` is extended with the new ids handed out.
+    """
+    rekeyed = []
+    for u in updates:
+        gid = u['original_id']
+        if gid not in context_ids:
+            fresh, k = gid, 1
+            while fresh in taken_ids:
+                k += 1
+                fresh = f"{gid}-{k}"
+            taken_ids.add(fresh)
+            if fresh != gid:
+                u = {**u, 'original_id': fresh}
+        rekeyed.append(u)
+    return rekeyed
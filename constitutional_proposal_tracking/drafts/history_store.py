@@ -0,0 +1,297 @@
+import os
+import sys
+import glob
+import json
+import array
+import hashlib
+import argparse
+import tracemalloc
+
+from constitutional_proposal_tracking.drafts.checkpoints import CHECKPOINT_FILENAME, CheckpointStore
+
+# Compact in-memory store of draft snapshots, for analyses that load many checkpoints at once.
+#
+# A commission's snapshots are read from the applier's checkpoint log,
+# draft-after-indications/draft_checkpoints.jsonl (drafts/checkpoints.py), one full draft per
+# step. Directories written before the log existed (or with WRITE_LEGACY_SNAPSHOTS=1 and no
+# log) are read from their draft_00_genesis_master.json / draft_after_*.json files instead.
+# Every snapshot repeats the whole history of all earlier steps, so keeping them as plain
+# JSON holds the same dicts and strings over and over. HistoryStore keeps one copy of each:
+#   - texts (final_content, content_snapshot) are stored once in a UTF-8 arena and referred
+#     to by index; they are decoded only when read;
+#   - step, filename, action, timestamp, author and indication strings are interned, and
+#     equal lists of them share one tuple;
+#   - articles and history entries are __slots__ records, and equal records (the same
+#     entry repeated in every later snapshot, articles a step did not touch) are shared.
+# Values that do not fit a field's kind (e.g. a null text) are kept as-is. to_dict()
+# rebuilds the original JSON structure, key order included.
+
+STR, TEXT, STRS, HISTORY = "str", "text", "strs", "history"
+SNAPSHOT_DIR = "draft-after-indications"    # holds CHECKPOINT_FILENAME (or legacy snapshots)
+GENESIS_SNAPSHOT = "draft_00_genesis_master.json"
+
+
+class TextArena:
+    """Append-only UTF-8 buffer of distinct texts, addressed by an integer reference."""
+    def __init__(self):
+        self._buf = bytearray()
+        self._offsets = array.array('Q')
+        self._lengths = array.array('Q')
+        self._refs = {}    # blake2b digest -> reference
+
+    def add(self, text):
+        data = text.encode('utf-8')
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        ref = self._refs.get(digest)
+        if ref is None:
+            ref = len(self._offsets)
+            self._offsets.append(len(self._buf))
+            self._lengths.append(len(data))
+            self._buf += data
+            self._refs[digest] = ref
+        return ref
+
+    def get(self, ref):
+        start = self._offsets[ref]
+        return self._buf[start:start + self._lengths[ref]].decode('utf-8')
+
+    def __len__(self):
+        return len(self._offsets)
+
+    @property
+    def nbytes(self):
+        return len(self._buf)
+
+
+class _Record:
+    """
+    Fields are declared in SPEC as (json key, kind). Only the keys present in the source dict
+    are set; `_keys` keeps their order and `_extra` the values that did not fit their kind.
+    """
+    __slots__ = ("_store", "_keys", "_extra")
+    SPEC = ()
+
+    def _values(self):
+        return (self._keys, self._extra_key()) + tuple(getattr(self, name, None) for name, _ in self.SPEC)
+
+    def _extra_key(self):
+        return json.dumps(self._extra, ensure_ascii=False, sort_keys=True) if self._extra else None
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._values() == other._values()
+
+    def __hash__(self):
+        return hash(self._values())
+
+    def get(self, key, default=None):
+        """The JSON value of `key`, decoded (texts from the arena, tuples as lists)."""
+        if key not in self._keys:
+            return default
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raw = getattr(self, key)
+        kind = self.KINDS[key]
+        if kind == TEXT:
+            return self._store.arena.get(raw)
+        if kind == STRS:
+            return list(raw)
+        if kind == HISTORY:
+            return [entry.to_dict() for entry in raw]
+        return raw
+
+    def to_dict(self):
+        return {key: self.get(key) for key in self._keys}
+
+
+class HistoryEntry(_Record):
+    SPEC = (
+        ("step", STR), ("filename", STR), ("action", STR), ("timestamp", STR), ("engine", STR),
+        ("content_snapshot", TEXT), ("applied_indications", STRS), ("authors_involved", STRS),
+        ("source_ids", STRS),
+    )
+    KINDS = dict(SPEC)
+    __slots__ = tuple(name for name, _ in SPEC)
+
+    @property
+    def snapshot(self):
+        return self.get("content_snapshot")
+
+
+class ArticleRecord(_Record):
+    SPEC = (
+        ("original_id", STR), ("current_number", STR), ("status", STR), ("final_content", TEXT),
+        ("accumulated_authors", STRS), ("history", HISTORY),
+    )
+    KINDS = dict(SPEC)
+    __slots__ = tuple(name for name, _ in SPEC)
+
+    @property
+    def content(self):
+        return self.get("final_content")
+
+    @property
+    def entries(self):
+        """History as HistoryEntry records (not materialized)."""
+        return getattr(self, "history", ())
+
+
+class HistoryStore:
+    def __init__(self):
+        self.arena = TextArena()
+        self.drafts = {}       # (commission, step) -> tuple of ArticleRecord
+        self._records = {}     # record -> the shared equal record
+        self._tuples = {}      # tuple -> the shared equal tuple
+        self._loaded_dicts = 0
+
+    def _tuple(self, items):
+        items = tuple(items)
+        return self._tuples.setdefault(items, items)
+
+    def _pack_value(self, kind, value):
+        """Packed form of `value`, or None when it does not fit `kind`."""
+        if kind == STR:
+            return sys.intern(value) if isinstance(value, str) else None
+        if kind == TEXT:
+            return self.arena.add(value) if isinstance(value, str) else None
+        if kind == STRS:
+            if isinstance(value, list) and all(isinstance(v, str) for v in value):
+                return self._tuple(sys.intern(v) for v in value)
+            return None
+        if kind == HISTORY:
+            if isinstance(value, list) and all(isinstance(v, dict) for v in value):
+                return self._tuple(self._pack(HistoryEntry, v) for v in value)
+            return None
+        return None
+
+    def _pack(self, cls, data):
+        self._loaded_dicts += 1
+        record = cls.__new__(cls)
+        record._store = self
+        extra = None
+        for key, value in data.items():
+            packed = self._pack_value(cls.KINDS.get(key), value)
+            if packed is None:
+                extra = extra if extra is not None else {}
+                extra[key] = value
+            else:
+                setattr(record, key, packed)
+        record._keys = self._tuple(sys.intern(k) for k in data)
+        record._extra = extra
+        return self._records.setdefault(record, record)
+
+    # --- Loading ---
+
+    def add_draft(self, label, articles):
+        """Stores one snapshot (a list of article dicts) under `label`. Returns its records."""
+        records = self._tuple(self._pack(ArticleRecord, article) for article in articles)
+        self.drafts[label] = records
+        return records
+
+    def load_commission(self, com_n, base_dir):
+        """Loads every step of comision-N (see iter_snapshots). Returns the number of snapshots."""
+        n = 0
+        for step, draft in iter_snapshots(os.path.join(base_dir, f"comision-{com_n}", SNAPSHOT_DIR)):
+            self.add_draft((com_n, step), draft)
+            n += 1
+        return n
+
+    def load_all(self, base_dir):
+        """Loads the snapshots of every commission under base_dir. Returns {commission: snapshots}."""
+        return {com_n: self.load_commission(com_n, base_dir) for com_n in commissions_in(base_dir)}
+
+    # --- Reading ---
+
+    def draft(self, label):
+        """The snapshot `label` as plain article dicts (materialized on each call)."""
+        return [record.to_dict() for record in self.drafts[label]]
+
+    def steps(self, com_n):
+        return [step for c, step in self.drafts if c == com_n]
+
+    def stats(self):
+        entries = sum(1 for r in self._records if isinstance(r, HistoryEntry))
+        return {
+            "snapshots": len(self.drafts),
+            "source_dicts": self._loaded_dicts,
+            "articles": len(self._records) - entries,
+            "history_entries": entries,
+            "texts": len(self.arena),
+            "text_mb": round(self.arena.nbytes / 1e6, 1),
+        }
+
+
+def commissions_in(base_dir):
+    found = []
+    for path in glob.glob(os.path.join(base_dir, "comision-*", SNAPSHOT_DIR)):
+        suffix = os.path.basename(os.path.dirname(path)).split("-", 1)[1]
+        if suffix.isdigit():
+            found.append(int(suffix))
+    return sorted(found)
+
+
+def iter_snapshots(snapshot_dir):
+    """
+    Yields (step, draft) for a draft-after-indications directory: from its checkpoint log
+    (drafts are then only valid until the next one is yielded), or, when the directory has
+    no log, from the legacy draft_00_genesis_master.json / draft_after_*.json files.
+    Legacy files next to a log are exports of it and are not read.
+    """
+    if os.path.exists(os.path.join(snapshot_dir, CHECKPOINT_FILENAME)):
+        yield from CheckpointStore(snapshot_dir).iter_drafts()
+        return
+    paths = sorted(glob.glob(os.path.join(snapshot_dir, "draft_after_*.json")))
+    genesis = os.path.join(snapshot_dir, GENESIS_SNAPSHOT)
+    if os.path.exists(genesis):
+        paths.insert(0, genesis)
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield os.path.basename(path), json.load(f)
+
+
+def measure(base_dir, verify=False):
+    """Retained memory of every commission's snapshots as plain JSON vs in a HistoryStore."""
+    tracemalloc.start()
+    plain = {}
+    for com_n in commissions_in(base_dir):
+        for step, draft in iter_snapshots(os.path.join(base_dir, f"comision-{com_n}", SNAPSHOT_DIR)):
+            # independent copies, as loading each legacy file gives
+            plain[(com_n, step)] = json.loads(json.dumps(draft))
+    plain_bytes = tracemalloc.get_traced_memory()[0]
+    del plain
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    store = HistoryStore()
+    store.load_all(base_dir)
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    mismatches = []
+    if verify:
+        for com_n in commissions_in(base_dir):
+            for step, draft in iter_snapshots(os.path.join(base_dir, f"comision-{com_n}", SNAPSHOT_DIR)):
+                if json.dumps(store.draft((com_n, step)), ensure_ascii=False) != json.dumps(draft, ensure_ascii=False):
+                    mismatches.append((com_n, step))
+    return plain_bytes, store_bytes, store, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact in-memory store of draft snapshots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_measure = sub.add_parser("measure", help="Memory of all commissions' snapshots: plain JSON vs HistoryStore")
+    p_measure.add_argument("base_dir", nargs="?", default=".")
+    p_measure.add_argument("--verify", action="store_true", help="Check every snapshot round-trips exactly")
+    args = parser.parse_args()
+
+    plain_bytes, store_bytes, store, mismatches = measure(args.base_dir, verify=args.verify)
+    print(f"Plain JSON:   {plain_bytes / 1e6:8.1f} MB")
+    print(f"HistoryStore: {store_bytes / 1e6:8.1f} MB ({plain_bytes / max(1, store_bytes):.1f}x smaller)")
+    print(json.dumps(store.stats()))
+    if args.verify:
+        print(f"Round trip: {'OK' if not mismatches else f'{len(mismatches)} snapshots differ'}")
+        return 1 if mismatches else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+import re
+
+from constitutional_proposal_tracking.drafts.numbering import ORDINALS
+
+# Rule-based application of structured indications (NARRATIVE_VOTING / TABULAR_VOTING fields).
+# The engine is deliberately conservative: anything ambiguous is returned as unresolved
+# so the applier can send it to the model.
+
+QUOTES = '"\'“”‘’«»'
+QUOTED_RE = re.compile(r'[“"‘\'«]{1,2}(.+?)[”"’\'»]{1,2}')
+HEADER_RE = re.compile(r'^\s*art[ií]culo\s+[\w°º.]+(\s+[a-z]\b)?\s*\.?\s*[-–—]\s*', re.IGNORECASE)
+INSERT_BETWEEN_RE = re.compile(r'\bentre\b')
+# "como inciso final", "agrégase un nuevo inciso final"; not "en el inciso final del ..."
+NEW_FINAL_PARAGRAPH_RE = re.compile(r'(?<!\bdel )(?<!\ben el )(?<!\bactual )\b(inciso|p[aá]rrafo)\s+final\b')
+BARE_FINAL_RE = re.compile(r'al final\.?')
+# Placements that add text inside an existing inciso, sentence or numeral
+NAMED_ANCHOR_RE = re.compile(r'\b(oraci[oó]n|frase|numeral|literal|letra|punto)\b|\b(inciso|p[aá]rrafo)\s+(?!final\b)\w+')
+FINAL_PARAGRAPH_SCOPES = ("INCISO", "ARTICULO", "ARTÍCULO")
+NEW_PARAGRAPH_RE = re.compile(r'nuevo\s+(inciso|p[aá]rrafo)\s+(\w+)')
+
+
+def strip_quotes(text):
+    return (text or "").strip().strip(QUOTES).strip()
+
+
+def split_paragraphs(content):
+    return [p for p in content.split("\n") if p.strip()]
+
+
+def join_paragraphs(paragraphs):
+    return "\n".join(paragraphs)
+
+
+def parse_inciso(scope):
+    """'INCISO 2' -> 2, 'INCISO FINAL' -> -1, anything else (ranges, lists, bare 'INCISO') -> None."""
+    m = re.fullmatch(r'\s*INCISO\s+(\d+|FINAL)\s*', str(scope or ""), re.IGNORECASE)
+    if not m:
+        return None
+    return -1 if m.group(1).upper() == "FINAL" else int(m.group(1))
+
+
+def is_new_final_paragraph(placement, scope):
+    """
+    True when an ADD placement asks for a new last paragraph: "como inciso final", "nuevo
+    párrafo final", or a bare "al final" on a whole inciso/article. "Al final del inciso
+    primero", "al final de la segunda oración"... add text inside a paragraph and are not.
+    """
+    if NAMED_ANCHOR_RE.search(placement):
+        return False
+    if NEW_FINAL_PARAGRAPH_RE.search(placement):
+        return True
+    return BARE_FINAL_RE.fullmatch(placement) is not None and scope in FINAL_PARAGRAPH_SCOPES
+
+
+def removes_whole_article(content, ind):
+    """
+    True when a TOTAL deletion/substitution names no text to remove, or names the whole body.
+    A content_to_remove holding only a title or a phrase is not a whole-article change.
+    """
+    old = " ".join(strip_quotes(ind.get("content_to_remove")).split())
+    if not old:
+        return True
+    body = " ".join((content or "").split())
+    return HEADER_RE.sub('', old, count=1) == HEADER_RE.sub('', body, count=1)
+
+
+def clean_new_text(new_text, old_content):
+    """
+    Removes quotes and, when the draft does not carry 'Artículo N.-' headers,
+    the header the indication repeats before the new text.
+    """
+    text = strip_quotes(new_text)
+    if not HEADER_RE.match(old_content or ""):
+        text = HEADER_RE.sub('', text, count=1)
+    return text
+
+
+def join_seam(left, right):
+    """
+    Joins two pieces of text with the spacing Spanish legal text expects where they meet
+    (one space between words, none before punctuation or after an opening bracket or a
+    line break). Spacing elsewhere in either piece is left as it is.
+    """
+    left, right = left.rstrip(" \t"), right.lstrip(" \t")
+    if not left or not right or left[-1] in "\n(“«" or right[0] in "\n,.;:)”»":
+        return left + right
+    return f"{left} {right}"
+
+
+def join_inserted(left, insert, right):
+    """Joins `left + insert + right`, fixing spacing only at the two seams (insert may be empty)."""
+    return join_seam(join_seam(left, insert), right)
+
+
+def apply_between(content, placement, insert):
+    """ADD 'entre la palabra X y la palabra Y': X and Y must appear adjacent exactly once."""
+    words = [strip_quotes(w) for w in QUOTED_RE.findall(placement)]
+    if len(words) != 2 or not all(words):
+        return None
+    pattern = re.compile(r'(?<!\w)' + re.escape(words[0]) + r'(\s*)' + re.escape(words[1]) + r'(?!\w)')
+    matches = list(pattern.finditer(content))
+    if len(matches) != 1:
+        return None
+    m = matches[0]
+    left = content[:m.start()] + words[0]
+    right = words[1] + content[m.end():]
+    return join_inserted(left, insert, right)
+
+
+def apply_one(content, ind):
+    """
+    Applies a single indication to an article's content.
+    Returns (new_content, new_status) or None when the rule engine cannot resolve it.
+    """
+    action = str(ind.get("action") or "").upper()
+    scope = str(ind.get("target_scope") or "").upper().strip()
+    raw_placement = str(ind.get("placement_instructions") or "").strip()
+    placement = raw_placement.lower()
+    new_text = ind.get("content") or ""
+
+    if action == "DELETE":
+        if scope == "TOTAL":
+            return ("", "deleted") if removes_whole_article(content, ind) else None
+        if strip_quotes(ind.get("content_to_remove")):
+            # "suprimir la frase ..." is a phrase swap with an empty replacement
+            return apply_one(content, dict(ind, action="MODIFY_PHRASE", content=""))
+        n = parse_inciso(scope)
+        paragraphs = split_paragraphs(content)
+        if n is None or len(paragraphs) < 2 or n > len(paragraphs):
+            return None
+        del paragraphs[n - 1 if n > 0 else -1]
+        return join_paragraphs(paragraphs), "active"
+
+    if action == "SUBSTITUTE":
+        replacement = clean_new_text(new_text, content)
+        if not replacement:
+            return None
+        if scope == "TOTAL":
+            return (replacement, "active") if removes_whole_article(content, ind) else None
+        n = parse_inciso(scope)
+        paragraphs = split_paragraphs(content)
+        if n is None or len(paragraphs) < 2 or n > len(paragraphs):
+            return None
+        paragraphs[n - 1 if n > 0 else -1] = replacement
+        return join_paragraphs(paragraphs), "active"
+
+    if action == "MODIFY_PHRASE":
+        old = strip_quotes(ind.get("content_to_remove"))
+        if not old or content.count(old) != 1:
+            return None
+        i = content.index(old)
+        return join_inserted(content[:i], strip_quotes(new_text), content[i + len(old):]), "active"
+
+    if action == "ADD":
+        insert = strip_quotes(new_text)
+        if not insert or "artículo" in placement or "articulo" in placement:
+            return None
+        if INSERT_BETWEEN_RE.search(placement):
+            result = apply_between(content, raw_placement, insert)
+            return (result, "active") if result is not None else None
+        if is_new_final_paragraph(placement, scope):
+            return join_paragraphs(split_paragraphs(content) + [clean_new_text(insert, content)]), "active"
+        if "final" in placement:
+            return None
+        m = NEW_PARAGRAPH_RE.search(placement)
+        if m and m.group(2) in ORDINALS:
+            paragraphs = split_paragraphs(content)
+            position = ORDINALS[m.group(2)]
+            if position > len(paragraphs) + 1 or (len(paragraphs) < 2 and position <= len(paragraphs)):
+                return None
+            paragraphs.insert(position - 1, clean_new_text(insert, content))
+            return join_paragraphs(paragraphs), "active"
+        return None
+
+    return None
+
+
+def signature(ind):
+    """Identity of an indication's effect, used to spot the same amendment voted twice."""
+    return (
+        str(ind.get("action") or "").upper(),
+        str(ind.get("target_scope") or "").upper(),
+        strip_quotes(ind.get("content")),
+        strip_quotes(ind.get("content_to_remove")),
+        str(ind.get("placement_instructions") or "").strip().lower(),
+    )
+
+
+def resolve_locally(master_draft, indications):
+    """
+    Applies every indication the rule engine can resolve, in report order, without modifying
+    master_draft (a MasterDraft). Returns (updates, unresolved):
+      - updates: ArticleUpdate dicts (same shape as the model output), one per touched article.
+      - unresolved: indications left for the model. Once an indication on an article is
+        unresolved, later indications on that article are deferred too, to keep ordering.
+    """
+    working = {}     # original_id -> {"content", "status", "ids", "signatures", "article"}
+    blocked = set()  # original_ids with a deferred indication
+    unresolved = []
+
+    for ind in indications:
+        candidates = master_draft.by_number(ind.get("target_article"))
+        if len(candidates) != 1:
+            unresolved.append(ind)
+            continue
+
+        art = candidates[0]
+        gid = art["original_id"]
+        if gid in blocked:
+            unresolved.append(ind)
+            continue
+
+        state = working.get(gid)
+        if state and signature(ind) in state["signatures"]:
+            # Duplicate of an amendment already applied to this article in this report
+            state["ids"].append(str(ind.get("number", "")))
+            continue
+
+        current = state["content"] if state else art.get("final_content", "")
+        if state and state["status"] != "active":
+            result = None
+        else:
+            result = apply_one(current, ind)
+
+        if result is None:
+            blocked.add(gid)
+            unresolved.append(ind)
+            continue
+
+        new_content, new_status = result
+        if state is None:
+            state = working[gid] = {"article": art, "ids": [], "signatures": set()}
+        state["content"] = new_content
+        state["status"] = new_status
+        state["ids"].append(str(ind.get("number", "")))
+        state["signatures"].add(signature(ind))
+
+    updates = []
+    for gid, state in working.items():
+        updates.append({
+            "original_id": gid,
+            "current_number": state["article"]["current_number"],
+            "content": state["content"],
+            "status": state["status"],
+            "applied_indication_ids": state["ids"],
+        })
+    return updates, unresolved
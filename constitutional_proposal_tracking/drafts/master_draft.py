@@ -0,0 +1,141 @@
+import bisect
+
+from constitutional_proposal_tracking.drafts.numbering import article_sort_key, normalize_article_number
+
+# Indexed master draft for the applier.
+#
+# The draft stays a list of article dicts in storage order (genesis order, new articles
+# appended), which is what checkpoints and draft_after_*.json files contain. On top of it
+# MasterDraft keeps indexes by original_id, by normalized current_number and by status, and
+# the articles sorted in constitutional numbering order. Changes to current_number or status
+# must go through update() so only the affected article is re-indexed; other fields
+# (history...) can be modified on the article dicts directly.
+#
+# Accumulated authors are kept as bitsets of the draft's AuthorRegistry (utils/authors.py)
+# while indications are merged: add_authors() ORs into an article's set and sync_authors()
+# writes the changed sets back to accumulated_authors as names, once before each save.
+
+INDEXED_FIELDS = ("current_number", "status")
+
+
+class MasterDraft:
+    def __init__(self, articles=(), registry=None):
+        self.articles = []
+        self.registry = registry
+        self._authors = {}      # original_id -> author bitset (articles add_authors() touched)
+        self._dirty_authors = set()
+        self._by_id = {}        # original_id -> position
+        self._by_number = {}    # normalized current_number -> set of positions
+        self._by_status = {}    # status -> set of positions
+        self._order = []        # sorted [(article_sort_key, position)]
+        for article in articles:
+            self.append(article)
+
+    # --- Indexes ---
+
+    def _index(self, pos):
+        article = self.articles[pos]
+        key = normalize_article_number(article.get("current_number"))
+        if key:
+            self._by_number.setdefault(key, set()).add(pos)
+        self._by_status.setdefault(article.get("status"), set()).add(pos)
+        bisect.insort(self._order, (article_sort_key(article.get("current_number")), pos))
+
+    def _unindex(self, pos):
+        article = self.articles[pos]
+        key = normalize_article_number(article.get("current_number"))
+        if key:
+            self._by_number[key].discard(pos)
+        self._by_status[article.get("status")].discard(pos)
+        entry = (article_sort_key(article.get("current_number")), pos)
+        del self._order[bisect.bisect_left(self._order, entry)]
+
+    # --- Access ---
+
+    def __len__(self):
+        return len(self.articles)
+
+    def __iter__(self):
+        return iter(self.articles)
+
+    def __getitem__(self, pos):
+        return self.articles[pos]
+
+    def ids(self):
+        return self._by_id.keys()
+
+    def get(self, original_id):
+        pos = self._by_id.get(original_id)
+        return self.articles[pos] if pos is not None else None
+
+    def position(self, original_id):
+        return self._by_id.get(original_id)
+
+    def positions_by_number(self, number, status=None):
+        """Storage positions of the articles whose current_number normalizes like `number`."""
+        key = normalize_article_number(number)
+        positions = self._by_number.get(key, ()) if key else ()
+        if status is not None:
+            positions = [p for p in positions if self.articles[p].get("status") == status]
+        return sorted(positions)
+
+    def by_number(self, number, status="active"):
+        """Articles numbered `number` ("Artículo 17", "5 bis", 12.0...), active ones by default."""
+        return [self.articles[p] for p in self.positions_by_number(number, status)]
+
+    def positions_with_status(self, status):
+        return sorted(self._by_status.get(status, ()))
+
+    def with_status(self, status):
+        return [self.articles[p] for p in self.positions_with_status(status)]
+
+    def active(self):
+        return self.with_status("active")
+
+    def ordered(self, status=None):
+        """Articles in constitutional numbering order (ties in storage order), optionally by status."""
+        return [self.articles[p] for _, p in self._order
+                if status is None or self.articles[p].get("status") == status]
+
+    # --- Changes ---
+
+    def append(self, article):
+        """Adds a new article at the end of storage order. Returns its position."""
+        if article["original_id"] in self._by_id:
+            raise ValueError(f"duplicate original_id: {article['original_id']}")
+        pos = len(self.articles)
+        self.articles.append(article)
+        self._by_id[article["original_id"]] = pos
+        self._index(pos)
+        return pos
+
+    def update(self, original_id, **fields):
+        """Sets `fields` on an article (in the order given), re-indexing it if its number or status changes."""
+        pos = self._by_id[original_id]
+        article = self.articles[pos]
+        reindex = any(name in fields and fields[name] != article.get(name) for name in INDEXED_FIELDS)
+        if reindex:
+            self._unindex(pos)
+        for name, value in fields.items():
+            article[name] = value
+        if reindex:
+            self._index(pos)
+        return article
+
+    # --- Authors ---
+
+    def add_authors(self, original_id, mask):
+        """ORs the author bitset `mask` into an article's accumulated authors."""
+        current = self._authors.get(original_id)
+        if current is None:
+            names = self.get(original_id).get("accumulated_authors")
+            current = self._authors[original_id] = self.registry.mask(names)
+        if mask & ~current:
+            self._authors[original_id] = current | mask
+            self._dirty_authors.add(original_id)
+
+    def sync_authors(self):
+        """Writes the author sets changed since the last call back to accumulated_authors."""
+        for original_id in self._dirty_authors:
+            self.get(original_id)["accumulated_authors"] = self.registry.to_names(self._authors[original_id])
+        self._dirty_authors.clear()
@@ -0,0 +1,54 @@
+import re
+
+ARTICLE_PREFIX_RE = re.compile(r'^\s*(art[ií]culo|art\.)\s*(n[°º]\s*)?', re.IGNORECASE)
+# A single letter is a suffix ("6 A", "1 A.- Forma de Estado", "62 A y Artículo 62 B") unless
+# another article number follows it: in "3 y 4" or "71 y Artículo 72" it is a conjunction
+ARTICLE_NUMBER_RE = re.compile(r'^(\d+(?:\.\d+)*)\s*[°º]?\s*(bis|ter|quater|quinquies|[a-z](?![a-z])(?!\s*(?:\d|art[ií]culo|art\.)))?')
+
+
+def normalize_article_number(value):
+    """
+    Normalizes article numbering to a comparable key.
+    Examples: "Artículo 6° A" -> "6 a", "Artículo 1 A.- Forma de Estado." -> "1 a",
+              "5 bis" -> "5 bis", 12.0 -> "12", "Artículo 1.2 (Autor)" -> "1.2", "3 y 4" -> "3".
+    Returns None for empty values; unnumbered labels ("S/N") are returned lowercased.
+    """
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = ARTICLE_PREFIX_RE.sub('', str(value).strip()).lower()
+    if not text:
+        return None
+    m = ARTICLE_NUMBER_RE.match(text)
+    if not m:
+        return text
+    number, suffix = m.groups()
+    return f"{number} {suffix}" if suffix else number
+
+
+LATIN_SUFFIXES = {"bis": 1, "ter": 2, "quater": 3, "quinquies": 4}
+
+# Spelled-out ordinals of incisos and paragraphs ("inciso segundo", "nuevo párrafo tercero")
+ORDINALS = {
+    "primero": 1, "segundo": 2, "tercero": 3, "cuarto": 4, "quinto": 5,
+    "sexto": 6, "séptimo": 7, "septimo": 7, "octavo": 8, "noveno": 9, "décimo": 10, "decimo": 10,
+}
+
+
+def article_sort_key(value):
+    """
+    Sort key in constitutional order for any article number normalize_article_number accepts:
+    "1" < "1.2" < "2" < "2 a" / "2 bis" < "2 b" / "2 ter" < "10", unnumbered labels ("S/N") last.
+    """
+    key = normalize_article_number(value)
+    if key is None:
+        return (2, (), 0, "")
+    m = ARTICLE_NUMBER_RE.match(key)
+    if not m:
+        return (1, (), 0, key)
+    number, suffix = m.groups()
+    rank = 0
+    if suffix:
+        rank = LATIN_SUFFIXES.get(suffix) or ord(suffix) - ord("a") + 1
+    return (0, tuple(int(n) for n in number.split(".")), rank, key)
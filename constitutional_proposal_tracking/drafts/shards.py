@@ -0,0 +1,88 @@
+from collections import defaultdict
+
+from constitutional_proposal_tracking.drafts.context import NEIGHBOR_WINDOW, find_targets, rekey_new_articles
+
+# Intra-report sharding for the applier.
+#
+# A report's unresolved indications are grouped so that groups never share a target
+# article: indications touching overlapping articles stay in the same shard, in report
+# order. Neighbours are only context and may be shared (grouping by them would chain most
+# of a report into one shard). Shards are sent to the model concurrently and their updates
+# merged; shards whose updates touch the same existing article anyway (a renumbered
+# neighbour, a fuzzy target) are conflicts and are re-run together. A shard's updates only
+# count as updates for the ids in its own context (the applier re-keys the others as new
+# articles), and new ids invented by several shards are made unique when combining. Indications that
+# cannot be located are returned apart; the applier sends them as one more shard with the
+# whole draft as context.
+
+MAX_SHARDS = 4
+
+
+def shard_indications(master_draft, indications, window=NEIGHBOR_WINDOW, max_shards=MAX_SHARDS):
+    """
+    Partitions `indications` into (shards, unlocated): at most `max_shards` lists with disjoint
+    target articles, each in report order, and the indications no article could be found for.
+    Returns ([indications], []) when sharding does not apply.
+    """
+    if max_shards <= 1 or len(indications) <= 1 or window < 0:
+        return [list(indications)], []
+
+    parent = list(range(len(indications)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    owner = {}    # article position -> first indication targeting it
+    located, unlocated = [], []
+    for i, ind in enumerate(indications):
+        targets = find_targets(master_draft, ind)
+        if not targets:
+            unlocated.append(ind)
+            continue
+        located.append(i)
+        for pos in targets:
+            if pos in owner:
+                parent[root(i)] = root(owner[pos])
+            else:
+                owner[pos] = i
+
+    groups = defaultdict(list)
+    for i in located:
+        groups[root(i)].append(i)
+
+    # Pack the independent groups into balanced shards, largest groups first
+    shards = [[] for _ in range(min(max_shards, len(groups)))]
+    for group in sorted(groups.values(), key=len, reverse=True):
+        min(shards, key=len).extend(group)
+    return [[indications[i] for i in sorted(shard)] for shard in shards], unlocated
+
+
+def find_conflicts(shard_updates, existing_ids):
+    """Indexes of the shards whose updates touch an existing article another shard also updates."""
+    touched = defaultdict(set)
+    for k, updates in enumerate(shard_updates):
+        for u in updates or []:
+            if u['original_id'] in existing_ids:
+                touched[u['original_id']].add(k)
+    conflicts = set()
+    for shard_ids in touched.values():
+        if len(shard_ids) > 1:
+            conflicts.update(shard_ids)
+    return conflicts
+
+
+def combine_updates(shard_updates, existing_ids):
+    """
+    Concatenates the updates of several shards. New articles are named by each shard on its
+    own ("NEW-1"...), so every id not in the draft is re-keyed against the draft and the new
+    ids of earlier shards.
+    """
+    existing_ids = set(existing_ids)
+    taken = set(existing_ids)
+    combined = []
+    for updates in shard_updates:
+        combined.extend(rekey_new_articles(updates or [], existing_ids, taken))
+    return combined
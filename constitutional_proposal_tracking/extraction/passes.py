@@ -0,0 +1,65 @@
+import os
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+
+import google.generativeai as genai
+
+from constitutional_proposal_tracking.gemini.metrics import with_current_tags
+from constitutional_proposal_tracking.gemini.retry import generate_json, parse_json
+
+# Several named extraction passes (one per column or section) over the same document.
+#
+# The passes run concurrently against one shared document: a PdfAttachment is resolved
+# through the upload-once registry (gemini/files.py), so threads wait on a single upload
+# and then reuse its handle. Every call still goes through the response cache, the per-model
+# rate limiter and the retries by error class of gemini/retry.py. Wall time is that of the
+# slowest pass instead of the sum.
+
+# --- Configuration ---
+PASS_WORKERS = int(os.environ.get("PASS_WORKERS", "4"))
+DEFAULT_MODEL = "gemini-3-flash-preview"
+
+
+@dataclasses.dataclass
+class Pass:
+    name: str
+    prompt: str
+    model_name: str = DEFAULT_MODEL
+    generation_config: dict = None
+    parse: object = parse_json      # callable(text) -> result; ValueError triggers a repair retry
+    validate: object = None         # callable(result), raises retry.SchemaError on a wrong shape
+    document: list = None           # prompt parts that replace the shared document for this pass
+
+
+def run_pass(extraction_pass, document):
+    print(f"  [{extraction_pass.name}] extracting...")
+    model = genai.GenerativeModel(extraction_pass.model_name)
+    parts = extraction_pass.document if extraction_pass.document is not None else document
+    return generate_json(model, [extraction_pass.prompt] + list(parts), generation_config=extraction_pass.generation_config,
+                         parse=extraction_pass.parse, validate=extraction_pass.validate, label=extraction_pass.name)
+
+
+def run_passes(document, passes, workers=PASS_WORKERS):
+    """
+    Runs `passes` concurrently over `document` (a list of prompt parts, e.g. from
+    pdf.text_layer.document_parts or [PdfAttachment(path)]).
+    Returns (results, errors): dicts keyed by pass name with the parsed result or the
+    exception of each pass. One failing pass does not cancel the others.
+    """
+    names = [p.name for p in passes]
+    if len(set(names)) != len(names):
+        raise ValueError(f"duplicate pass names: {names}")
+
+    results, errors = {}, {}
+    if not passes:
+        return results, errors
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(passes)))) as pool:
+        futures = [(p.name, pool.submit(with_current_tags(run_pass), p, document)) for p in passes]
+        for name, future in futures:
+            try:
+                results[name] = future.result()
+                print(f"  [{name}] done")
+            except Exception as e:
+                errors[name] = e
+                print(f"  [{name}] failed: {e}")
+    return results, errors
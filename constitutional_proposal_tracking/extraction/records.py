@@ -0,0 +1,154 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from constitutional_proposal_tracking.gemini.metrics import with_current_tags
+from constitutional_proposal_tracking.gemini.retry import SchemaError, generate_json
+
+# Typed record schemas for extractor output.
+#
+# A RecordSchema is one JSON record type in the OpenAPI subset Gemini accepts as
+# response_schema (type, properties, required, enum, nullable, items). The extractors send
+# an array of it as the response_schema, so the model cannot answer with free text, and
+# check every returned record locally with a validator compiled once from the same schema.
+# Records that still fail are re-asked one by one (the record, its errors and the field
+# instructions, without the document) instead of re-running the whole document.
+
+# --- Configuration ---
+REQUEUE_WORKERS = 4
+
+_PY_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+}
+
+
+def _compile(schema, path):
+    """
+    Returns check(value, errors) -> value for `schema`: appends "path: problem" strings to
+    errors and returns the value with numbers in string fields turned into strings (older
+    outputs and the local parsers write article and indication numbers as integers).
+    """
+    kind = schema.get("type", "object")
+    py_types = _PY_TYPES[kind]
+    nullable = schema.get("nullable", False)
+    enum = set(schema["enum"]) if "enum" in schema else None
+    item_check = _compile(schema["items"], f"{path}[]") if kind == "array" and "items" in schema else None
+    properties = {
+        name: _compile(sub, f"{path}.{name}")
+        for name, sub in schema.get("properties", {}).items()
+    } if kind == "object" else {}
+    required = tuple(schema.get("required", ())) if kind == "object" else ()
+
+    def check(value, errors):
+        if value is None:
+            if not nullable:
+                errors.append(f"{path}: null")
+            return value
+        if kind == "string" and isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(int(value)) if float(value).is_integer() else str(value)
+        # bool is an int subclass; do not let True pass as an integer
+        if not isinstance(value, py_types) or (isinstance(value, bool) and kind != "boolean"):
+            errors.append(f"{path}: expected {kind}, got {type(value).__name__}")
+            return value
+        if enum is not None and value not in enum:
+            errors.append(f"{path}: {value!r} not in {sorted(enum)}")
+        if item_check is not None:
+            for i, item in enumerate(value):
+                value[i] = item_check(item, errors)
+        if properties:
+            for name in required:
+                if name not in value:
+                    errors.append(f"{path}.{name}: missing")
+            for name, sub_check in properties.items():
+                if name in value:
+                    value[name] = sub_check(value[name], errors)
+        return value
+    return check
+
+
+class RecordSchema:
+    def __init__(self, schema, name="record"):
+        self.schema = schema
+        self.name = name
+        self._check = _compile(schema, name)
+
+    def response_schema(self):
+        return {"type": "array", "items": self.schema}
+
+    def generation_config(self, many=True):
+        """generation_config for an array of records (or, with many=False, a single record)."""
+        return {
+            "response_mime_type": "application/json",
+            "response_schema": self.response_schema() if many else self.schema,
+        }
+
+    def errors(self, record):
+        """Validation problems of `record` (empty when valid). Coerces numeric string fields in place."""
+        errors = []
+        self._check(record, errors)
+        return errors
+
+    def split(self, records):
+        """(valid, invalid): invalid is a list of (index, record, errors)."""
+        valid, invalid = [], []
+        for i, record in enumerate(records):
+            errors = self.errors(record)
+            if errors:
+                invalid.append((i, record, errors))
+            else:
+                valid.append(record)
+        return valid, invalid
+
+    def _requeue_one(self, model, instructions, record, errors, label):
+        prompt = (
+            f"{instructions}\n\n"
+            "The following record extracted from the document does not match the required "
+            f"schema ({'; '.join(errors[:10])}).\n"
+            "Return ONLY that record, corrected, as a single JSON object. Keep every value that "
+            "is already valid unchanged.\n\n"
+            f"RECORD:\n{json.dumps(record, ensure_ascii=False, indent=2)}"
+        )
+
+        def validate(value):
+            problems = self.errors(value)
+            if problems:
+                raise SchemaError("; ".join(problems[:10]))
+
+        return generate_json(model, [prompt], generation_config=self.generation_config(many=False),
+                             validate=validate, label=label)
+
+    def enforce(self, records, model, instructions, label="records"):
+        """
+        Validates `records` and re-asks each invalid one individually. Returns the records in
+        their original order; those that cannot be repaired are dropped (and reported).
+        """
+        if not isinstance(records, list):
+            raise SchemaError(f"{self.name}: expected a JSON array, got {type(records).__name__}")
+        _, invalid = self.split(records)
+        if not invalid:
+            return records
+
+        print(f"  [{label}] {len(invalid)}/{len(records)} records do not match the {self.name} schema; requeueing them")
+
+        def repair(entry):
+            i, record, errors = entry
+            try:
+                return i, self._requeue_one(model, instructions, record, errors, f"{label} #{i}")
+            except Exception as e:
+                print(f"  [{label}] dropped record #{i}: {e}")
+                return i, None
+
+        with ThreadPoolExecutor(max_workers=min(REQUEUE_WORKERS, len(invalid))) as pool:
+            repaired = dict(pool.map(with_current_tags(repair), invalid))
+        out = []
+        for i, record in enumerate(records):
+            if i in repaired:
+                if repaired[i] is not None:
+                    out.append(repaired[i])
+            else:
+                out.append(record)
+        return out
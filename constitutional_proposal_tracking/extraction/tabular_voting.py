@@ -0,0 +1,286 @@
+import re
+import unicodedata
+
+from constitutional_proposal_tracking.drafts.numbering import ORDINALS
+
+# Deterministic parser for TABULAR_VOTING reports (Commission 3 layout): "- IND N (authors)
+# text" blocks, each followed by a voting grid whose "Resultado" column says APROBADA or not.
+#
+# It works on the cached PDF text layer (pdf/text_layer.py), walking lines and tables in
+# reading order. Approved blocks whose fields can all be read unambiguously become records
+# with the fields the TABULAR_VOTING prompt asks for; every other block that may be approved
+# (no grid found, several blocks sharing one grid, unknown authors, unclear action...) is
+# returned as unresolved so the caller can send just those blocks to the model.
+
+QUOTED_RE = re.compile(r'[“"«]([^”"»]*)[”"»]')
+OPENING_QUOTES = '“«'
+ARTICLE_RE = re.compile(r'\bart[íi]culo\s+(\d+(?:\s+(?:bis|ter|(?-i:[A-Z]))\b)?)', re.IGNORECASE)
+INCISO_RE = re.compile(r'\b(inciso|numeral|literal|p[áa]rrafo)\s+(\w+)', re.IGNORECASE)
+WORDING_RE = re.compile(r'\b(frase|expresi[óo]n|palabra|vocablo|t[ée]rmino|oraci[óo]n)(es|s)?\b', re.IGNORECASE)
+INTRODUCER_RE = re.compile(
+    r'[,:\s]*((el|la|los|las)\s+)?(siguientes?\s+)?(nuevos?\s+|nuevas?\s+)?'
+    r'(frase|expresi[óo]n|palabra|vocablo|t[ée]rmino|oraci[óo]n|inciso|numeral|literal|texto)?(es|s)?[,:\s]*$',
+    re.IGNORECASE,
+)
+
+# "en el artículo 4," inside an ADD placement: the article is already in target_article
+PLACEMENT_ARTICLE_RE = re.compile(r'\b(en|a|al|del)\s+(el\s+)?art[íi]culo\s+\d+\s*,?\s*', re.IGNORECASE)
+
+VERBS = {
+    "SUBSTITUTE": re.compile(r'\b(sustitu|reemplaz)\w*', re.IGNORECASE),
+    "DELETE": re.compile(r'\b(suprim|elimin)\w*', re.IGNORECASE),
+    "ADD": re.compile(r'\b(agreg|incorpor|añad|intercal)\w*', re.IGNORECASE),
+}
+
+
+def fold(text):
+    text = unicodedata.normalize('NFKD', (text or "").lower())
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def article_number(value):
+    """'49' -> 49, '33 A' -> '33 A' (the prompt's integer when there is no suffix)."""
+    value = re.sub(r'\s+', ' ', value).strip()
+    return int(value) if value.isdigit() else value
+
+
+class MemberMatcher:
+    """Matches "Y. Gómez", "Mella" or "Jeniffer Mella" against "Surname, Names" member entries."""
+    def __init__(self, members):
+        self.members = []
+        for member in members:
+            surname, _, names = member.partition(",")
+            self.members.append((member, fold(surname).strip(), fold(names).strip()))
+
+    def match(self, token):
+        """The member for `token`, or None when unknown or ambiguous."""
+        words = re.findall(r'\w+', fold(token))
+        if not words:
+            return None
+        found = []
+        for member, surname, names in self.members:
+            surname_words = surname.split()
+            if words[-len(surname_words):] != surname_words:
+                continue
+            prefix = words[:-len(surname_words)]
+            if prefix and not names.startswith(prefix[0][0]):
+                continue
+            found.append(member)
+        return found[0] if len(found) == 1 else None
+
+    def match_all(self, raw):
+        """Matched names for a parenthesized author list; None if any author is not resolved."""
+        raw = re.sub(r'^\s*\d+\s*', '', raw)
+        tokens = [t for t in re.split(r',|;|\s+y\s+', raw) if t.strip()]
+        matched = []
+        for token in tokens:
+            member = self.match(token)
+            if member is None:
+                return None
+            if member not in matched:
+                matched.append(member)
+        return matched or None
+
+
+class Block:
+    """One "IND ..." paragraph with its voting result (None when no grid was found)."""
+    def __init__(self, article, page):
+        self.article = article
+        self.page = page
+        self.lines = []
+        self.grid = None
+        self.result = None
+        self.reason = None
+
+    @property
+    def text(self):
+        return " ".join(l.strip() for l in self.lines)
+
+    def render(self):
+        out = "\n".join(self.lines)
+        if self.article is not None:
+            out = f"En votación: Artículo {self.article}\n{out}"
+        if self.grid:
+            out += "\n" + "\n".join(" | ".join((c or "").replace("\n", " ").strip() for c in row) for row in self.grid)
+        return out
+
+
+def grid_result(rows, header_re, column=None):
+    """
+    Result cell of a voting grid. Returns (result, column): result is None when the table has
+    no value row yet (grid split across pages); column is None when it is not a voting grid.
+    """
+    start = 0
+    if column is None:
+        for i, row in enumerate(rows):
+            for j, cell in enumerate(row):
+                if cell and header_re.search(cell):
+                    column, start = j, i + 1
+                    break
+            if column is not None:
+                break
+        if column is None:
+            return None, None
+    for row in rows[start:]:
+        if column < len(row) and row[column] and row[column].strip():
+            return row[column].strip(), column
+    return None, column
+
+
+def collect_blocks(pdf_text, layout):
+    """Walks the document in reading order; returns the IND blocks with their grid results."""
+    start_re = re.compile(layout["block_start"], re.IGNORECASE)
+    context_re = re.compile(layout["context"], re.IGNORECASE)
+    header_re = re.compile(layout["result_header"], re.IGNORECASE)
+
+    skip = pdf_text.repeated_lines()
+    blocks, pending, current = [], [], None
+    article, open_column = None, None
+
+    for page in pdf_text.pages:
+        for kind, value in pdf_text.events(page, skip):
+            if kind == "line":
+                m = context_re.search(value)
+                if m:
+                    article = article_number(m.group("article"))
+                    current = None
+                elif start_re.match(value):
+                    current = Block(article, page["page"])
+                    current.lines.append(value)
+                    blocks.append(current)
+                    pending.append(current)
+                    open_column = None
+                elif current is not None:
+                    current.lines.append(value)
+                continue
+
+            result, column = grid_result(value, header_re, open_column)
+            if column is None:
+                continue
+            current = None
+            if result is None:
+                open_column = column    # header on this page, values on the next one
+                continue
+            open_column = None
+            if not pending:
+                continue
+            voted = pending[-1]
+            voted.grid, voted.result = value, result
+            for earlier in pending[:-1]:
+                earlier.reason = "several blocks before one voting grid"
+            pending = []
+    for block in pending:
+        if block.result is None and block.reason is None:
+            block.reason = "no voting grid found"
+    return blocks
+
+
+def parse_scope(body):
+    if WORDING_RE.search(body):
+        return "WORDING"
+    m = INCISO_RE.search(body)
+    if m:
+        ordinal = fold(m.group(2))
+        if ordinal.isdigit():
+            return f"INCISO {int(ordinal)}"
+        if ordinal == "final":
+            return "INCISO FINAL"
+        if ordinal in ORDINALS:
+            return f"INCISO {ORDINALS[ordinal]}"
+        return "INCISO"
+    return "TOTAL"
+
+
+def parse_fields(body):
+    """Action/scope/content fields from the text after the authors; None when unclear."""
+    quotes = [q.strip() for q in QUOTED_RE.findall(body)]
+    if any(ch in q for q in quotes for ch in OPENING_QUOTES):
+        return None    # nested quotes: the quoted spans cannot be delimited reliably
+    unquoted = QUOTED_RE.sub(' ', body)
+    actions = [action for action, verb in VERBS.items() if verb.search(unquoted)]
+    if len(actions) != 1:
+        return None
+    action = actions[0]
+    scope = parse_scope(unquoted)
+    fields = {"action": action, "target_scope": scope, "content": "", "content_to_remove": None, "placement_instructions": None}
+
+    if action == "SUBSTITUTE":
+        if scope == "WORDING":
+            if len(quotes) != 2:
+                return None
+            fields.update(action="MODIFY_PHRASE", content_to_remove=quotes[0], content=quotes[1])
+        else:
+            if len(quotes) != 1:
+                return None
+            fields["content"] = quotes[0]
+    elif action == "DELETE":
+        if scope == "WORDING":
+            if len(quotes) != 1:
+                return None
+            fields["content_to_remove"] = quotes[0]
+        elif quotes:
+            return None
+    elif action == "ADD":
+        if not quotes:
+            return None
+        last = list(QUOTED_RE.finditer(body))[-1]
+        verb = VERBS["ADD"].search(body)
+        placement = PLACEMENT_ARTICLE_RE.sub('', body[verb.end():last.start()])
+        placement = INTRODUCER_RE.sub('', placement).strip(" ,:")
+        if not placement:
+            return None
+        fields.update(content=last.group(1).strip(), placement_instructions=placement)
+    return fields
+
+
+def parse_block(block, block_re, members):
+    """Record for an approved block, or None (and block.reason set) when it needs the model."""
+    m = block_re.match(block.text)
+    if not m:
+        block.reason = "unrecognized block header"
+        return None
+    authors = members.match_all(m.group("authors"))
+    if authors is None:
+        block.reason = "unresolved authors"
+        return None
+    body = m.group("body")
+    fields = parse_fields(body)
+    if fields is None:
+        block.reason = "unclear action or content"
+        return None
+    article = ARTICLE_RE.search(QUOTED_RE.sub(' ', body))
+    target = article_number(article.group(1)) if article else block.article
+    if target is None:
+        block.reason = "no target article"
+        return None
+    return {
+        "number": re.sub(r'\s+', ' ', m.group("number")).strip(),
+        "authors_matched": authors,
+        "target_article": target,
+        **fields,
+    }
+
+
+def parse_report(pdf_text, layout, members):
+    """
+    Parses one TABULAR_VOTING report from its text layer.
+    Returns (records, unresolved): records for the approved indications read locally, in
+    document order, and the Blocks the model has to look at.
+    """
+    block_re = re.compile(layout["block"], re.IGNORECASE | re.DOTALL)
+    approved_re = re.compile(layout["approved"], re.IGNORECASE)
+    matcher = MemberMatcher(members)
+
+    records, unresolved = [], []
+    for block in collect_blocks(pdf_text, layout):
+        if block.result is not None and not approved_re.search(block.result):
+            continue
+        if block.result is None:
+            unresolved.append(block)
+            continue
+        record = parse_block(block, block_re, matcher)
+        if record is None:
+            unresolved.append(block)
+        else:
+            records.append(record)
+    return records, unresolved
@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import dataclasses
+from collections import OrderedDict
+
+from constitutional_proposal_tracking.gemini.files import get_default_registry
+from constitutional_proposal_tracking.gemini.metrics import record_call
+from constitutional_proposal_tracking.gemini.rate_limit import get_rate_limiter
+from constitutional_proposal_tracking.utils.files import sha256_file
+
+# --- Configuration ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_DIR = os.environ.get("GEMINI_CACHE_DIR") or os.path.join(PROJECT_ROOT, ".cache", "gemini")
+DEFAULT_MAX_BYTES = int(os.environ.get("GEMINI_CACHE_MAX_MB", "512")) * 1024 * 1024
+CACHE_DISABLED = os.environ.get("GEMINI_CACHE_DISABLED", "") not in ("", "0")
+
+
+class PdfAttachment:
+    """
+    Local PDF that is part of a prompt.
+    It is hashed by its bytes for the cache key and only uploaded on a cache miss.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._digest = None
+
+    def digest(self):
+        if self._digest is None:
+            self._digest = sha256_file(self.path)
+        return self._digest
+
+
+class CachedResponse:
+    """Minimal stand-in for a Gemini response: callers only read `.text`."""
+    def __init__(self, text):
+        self.text = text
+
+
+def _config_to_jsonable(config):
+    if config is None:
+        return None
+    if dataclasses.is_dataclass(config):
+        config = dataclasses.asdict(config)
+    elif not isinstance(config, dict):
+        config = getattr(config, "__dict__", repr(config))
+    return config
+
+
+def make_key(model_name, contents, generation_config=None, context=None):
+    """
+    Content-addressed key: sha256 over model name, prompt texts, attached PDF bytes
+    and the generation config (including response_schema). `context` is the digest of a
+    shared prompt prefix (gemini/context.py) the call is made on top of.
+    """
+    if not isinstance(contents, (list, tuple)):
+        contents = [contents]
+
+    parts = []
+    for part in contents:
+        if isinstance(part, PdfAttachment):
+            parts.append({"pdf_sha256": part.digest()})
+        elif isinstance(part, str):
+            parts.append({"text": part})
+        else:
+            # Already-uploaded handles are identified by their remote name.
+            parts.append({"file": getattr(part, "name", repr(part))})
+
+    payload = {
+        "model": model_name,
+        "contents": parts,
+        "generation_config": _config_to_jsonable(generation_config),
+    }
+    if context is not None:
+        payload["context"] = context
+    blob = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=repr)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk cache of response texts, one JSON file per key.
+    Bounded by total size; the least recently used entries (by file mtime) are evicted first.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index = self._load_index()
+        self._total_bytes = sum(self._index.values())
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            st = os.stat(os.path.join(self.cache_dir, name))
+            entries.append((st.st_mtime, name[:-5], st.st_size))
+        entries.sort()
+        return OrderedDict((key, size) for _, key, size in entries)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                os.utime(path)
+            except (OSError, ValueError):
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+            return entry["text"]
+
+    def put(self, key, text, model_name=None):
+        entry = {"model": model_name, "created": time.time(), "text": text}
+        data = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+        with self._lock:
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            if key in self._index:
+                self._total_bytes -= self._index.pop(key)
+            self._index[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def _drop(self, key):
+        size = self._index.pop(key, 0)
+        self._total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            oldest = next(iter(self._index))
+            self._drop(oldest)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self._index),
+            "bytes": self._total_bytes,
+        }
+
+    def summary(self):
+        s = self.stats()
+        return f"Cache: {s['hits']} hits / {s['misses']} misses ({s['entries']} entries, {s['bytes'] / 1e6:.1f} MB)"
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+    return _default_cache
+
+
+def _upload_attachments(contents):
+    """Replaces PdfAttachment parts by active File handles, reusing registered uploads."""
+    resolved = []
+    for part in contents:
+        if isinstance(part, PdfAttachment):
+            resolved.append(get_default_registry().get(part.path))
+        else:
+            resolved.append(part)
+    return resolved
+
+
+def generate_content(model, contents, generation_config=None, cache=None):
+    """
+    Drop-in replacement for model.generate_content with a content-addressed cache.
+    PdfAttachment parts are resolved only on a cache miss, through the upload-once registry
+    (gemini/files.py), so a PDF is not uploaded again while its earlier upload is valid.
+    Cache misses wait on the per-model rate limiter before calling the API.
+    Every call is recorded in the metrics file (gemini/metrics.py).
+    """
+    if not isinstance(contents, (list, tuple)):
+        contents = [contents]
+    model_name = getattr(model, "model_name", repr(model))
+    started = time.monotonic()
+
+    if CACHE_DISABLED:
+        cache = None
+    elif cache is None:
+        cache = get_default_cache()
+
+    key = make_key(model_name, contents, generation_config, context=getattr(model, "context_digest", None))
+    if cache is not None:
+        text = cache.get(key)
+        if text is not None:
+            record_call(model_name, contents, started, text, cached=True)
+            return CachedResponse(text)
+
+    try:
+        resolved = _upload_attachments(contents)
+        get_rate_limiter(model_name).acquire()
+        kwargs = {"generation_config": generation_config} if generation_config is not None else {}
+        response = model.generate_content(resolved, **kwargs)
+
+        # Blocked/empty responses raise here and are never cached. The response rides along on
+        # the error so retry.classify can tell a safety block from a truncated answer.
+        try:
+            text = response.text
+        except ValueError as e:
+            e.response = response
+            raise
+    except Exception as e:
+        record_call(model_name, contents, started, error=e)
+        raise
+    record_call(model_name, contents, started, text, usage=getattr(response, "usage_metadata", None))
+    if cache is not None and text:
+        cache.put(key, text, model_name=model_name)
+    return response
+
+
+# FinishReason values, for responses that carry the bare number
+FINISH_REASONS = {
+    1: "STOP", 2: "MAX_TOKENS", 3: "SAFETY", 4: "RECITATION", 5: "OTHER",
+    6: "BLOCKLIST", 7: "PROHIBITED_CONTENT", 8: "SPII",
+}
+
+
+def finish_reason(response):
+    """
+    Finish reason name ("STOP", "MAX_TOKENS"...) of a response, streamed chunk or candidate,
+    or None when it has none.
+    """
+    try:
+        reason = getattr(response, "finish_reason", None) or response.candidates[0].finish_reason
+    except (AttributeError, IndexError, TypeError):
+        return None
+    if not reason:
+        return None
+    if isinstance(reason, int) and not hasattr(reason, "name"):
+        return FINISH_REASONS.get(reason, str(reason))
+    return getattr(reason, "name", str(reason))
+
+
+def stream_content(model, contents, generation_config=None, cache=None, complete=None):
+    """
+    Streaming counterpart of generate_content: yields response text chunks as they arrive.
+    A cache hit yields the cached text as a single chunk. The full text is cached only when
+    the stream ends normally and the response is whole: the finish reason is STOP or
+    `complete(text)` holds (e.g. streaming.json_array_complete); without `complete`, a stream
+    that reports no finish reason counts as whole. Cut-off responses are never stored, so a
+    re-run asks again instead of replaying them.
+    """
+    if not isinstance(contents, (list, tuple)):
+        contents = [contents]
+    model_name = getattr(model, "model_name", repr(model))
+    started = time.monotonic()
+
+    if CACHE_DISABLED:
+        cache = None
+    elif cache is None:
+        cache = get_default_cache()
+
+    key = make_key(model_name, contents, generation_config, context=getattr(model, "context_digest", None))
+    if cache is not None:
+        text = cache.get(key)
+        if text is not None:
+            record_call(model_name, contents, started, text, cached=True, streamed=True)
+            yield text
+            return
+
+    parts = []
+    usage = None
+    finish = None
+    try:
+        resolved = _upload_attachments(contents)
+        get_rate_limiter(model_name).acquire()
+        kwargs = {"generation_config": generation_config} if generation_config is not None else {}
+        for chunk in model.generate_content(resolved, stream=True, **kwargs):
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            finish = finish_reason(chunk) or finish
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. the final finish_reason chunk)
+                continue
+            parts.append(text)
+            yield text
+    except Exception as e:
+        record_call(model_name, contents, started, "".join(parts), usage=usage, streamed=True, error=e)
+        raise
+
+    text = "".join(parts)
+    record_call(model_name, contents, started, text, usage=usage, streamed=True)
+    whole = finish == "STOP" or (complete(text) if complete is not None else finish is None)
+    if cache is not None and text and whole:
+        cache.put(key, text, model_name=model_name)
+    elif cache is not None and text:
+        print(f"  [cache] not caching an incomplete response (finish reason: {finish or 'unknown'})")
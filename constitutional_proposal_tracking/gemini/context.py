@@ -0,0 +1,128 @@
+import os
+import time
+import datetime
+import threading
+
+import google.generativeai as genai
+
+from constitutional_proposal_tracking.gemini.cache import PdfAttachment, make_key
+from constitutional_proposal_tracking.gemini.files import get_default_registry
+from constitutional_proposal_tracking.gemini.metrics import estimate_tokens, prompt_size
+
+# A large prompt prefix shared by many calls (e.g. the full candidate list of a ranking).
+#
+# The prefix is created once as Gemini cached content (on the first call that misses the
+# response cache) and every call through SharedContext.model() sends only its own parts;
+# the API bills the cached tokens at the reduced rate instead of resending them. When context caching is not available (prefix
+# below the API minimum, SDK without `caching`, GEMINI_CONTEXT_CACHE=0, creation error)
+# the model falls back to a local stand-in that prepends the prefix to each call, so the
+# calling code is the same either way. Response cache keys include the prefix digest, so
+# answers are shared between both modes and never mixed between different prefixes.
+
+# --- Configuration ---
+CONTEXT_CACHE_ENABLED = os.environ.get("GEMINI_CONTEXT_CACHE", "") != "0"
+CONTEXT_TTL_S = int(os.environ.get("GEMINI_CONTEXT_TTL_S", "3600"))
+MIN_CACHE_TOKENS = 4096        # smallest prefix the API accepts as cached content
+REFRESH_MARGIN_S = 300         # extend the TTL when less than this remains
+
+
+class ContextModel:
+    """
+    GenerativeModel-like object for calls on top of a SharedContext. `model_name` is the
+    underlying model (rate limits, metrics); `context_digest` goes into response cache keys.
+    """
+    def __init__(self, context):
+        self.context = context
+        self.model_name = context.model_name
+        self.context_digest = context.digest
+
+    def generate_content(self, contents, **kwargs):
+        if not isinstance(contents, (list, tuple)):
+            contents = [contents]
+        model, prefix = self.context._target()
+        return model.generate_content(prefix + list(contents), **kwargs)
+
+
+class SharedContext:
+    def __init__(self, model_name, parts, system_instruction=None, ttl_s=CONTEXT_TTL_S, display_name=None):
+        self.model_name = model_name if model_name.startswith("models/") else f"models/{model_name}"
+        self.parts = list(parts)
+        self.system_instruction = system_instruction
+        self.ttl_s = ttl_s
+        self.display_name = display_name
+        self.digest = make_key(self.model_name, self.parts + [system_instruction or ""])
+        chars, pages, _ = prompt_size(self.parts + [system_instruction or ""])
+        self.tokens = estimate_tokens(chars, pages)
+        self.remote = None
+        self._created = False
+        self._expires = 0.0
+        self._lock = threading.Lock()
+        self._local = None
+
+    def _resolved_parts(self):
+        registry = get_default_registry()
+        return [registry.get(p.path) if isinstance(p, PdfAttachment) else p for p in self.parts]
+
+    def _create_remote(self):
+        """Creates the remote cached content when possible; otherwise the context stays local."""
+        self._created = True
+        if not CONTEXT_CACHE_ENABLED or not hasattr(genai, "caching"):
+            print(f"  [context] context caching unavailable; sending the ~{self.tokens}-token prefix with each call")
+            return
+        if self.tokens < MIN_CACHE_TOKENS:
+            print(f"  [context] prefix of ~{self.tokens} tokens is below the {MIN_CACHE_TOKENS}-token minimum; sending it with each call")
+            return
+        try:
+            kwargs = {"system_instruction": self.system_instruction} if self.system_instruction else {}
+            self.remote = genai.caching.CachedContent.create(
+                model=self.model_name,
+                display_name=self.display_name or f"ctx-{self.digest[:12]}",
+                contents=self._resolved_parts(),
+                ttl=datetime.timedelta(seconds=self.ttl_s),
+                **kwargs,
+            )
+            self._expires = time.time() + self.ttl_s
+            print(f"  [context] cached ~{self.tokens} prefix tokens as {self.remote.name}")
+        except Exception as e:
+            print(f"  [context] could not create cached content ({e}); sending the prefix with each call")
+            self.remote = None
+
+    def _target(self):
+        """(model, prefix parts) to use for the next call, extending the remote TTL when needed."""
+        with self._lock:
+            if not self._created:
+                # Created on the first response cache miss, so fully cached reruns never pay for it
+                self._create_remote()
+            if self.remote is not None and time.time() > self._expires - REFRESH_MARGIN_S:
+                try:
+                    self.remote.update(ttl=datetime.timedelta(seconds=self.ttl_s))
+                    self._expires = time.time() + self.ttl_s
+                except Exception as e:
+                    print(f"  [context] could not extend {self.remote.name} ({e}); sending the prefix with each call")
+                    self.remote = None
+            if self.remote is not None:
+                return genai.GenerativeModel.from_cached_content(self.remote), []
+            if self._local is None:
+                kwargs = {"system_instruction": self.system_instruction} if self.system_instruction else {}
+                self._local = (genai.GenerativeModel(self.model_name, **kwargs), self._resolved_parts())
+            return self._local
+
+    def model(self):
+        return ContextModel(self)
+
+    def close(self):
+        """Deletes the remote cached content (it is billed per hour while it lives)."""
+        with self._lock:
+            if self.remote is not None:
+                try:
+                    self.remote.delete()
+                except Exception as e:
+                    print(f"  [context] could not delete {self.remote.name}: {e}")
+                self.remote = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+
+import google.generativeai as genai
+
+from constitutional_proposal_tracking.utils.files import sha256_file, write_json_atomic
+
+# Upload-once registry for Gemini File API handles.
+#
+# Maps the sha256 of a local file to the remote file name and its expiry, in
+# .cache/gemini_files.json, so the same PDF is uploaded once and reused by every call and
+# every script until shortly before it expires (the File API keeps uploads for 48 hours).
+# A reused handle is checked with get_file first; deleted or failed files are re-uploaded.
+# Threads share one in-flight upload per file; separate processes may at worst upload
+# the same file twice, and the registry keeps the last one.
+
+# --- Configuration ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_REGISTRY_PATH = os.environ.get("GEMINI_FILES_REGISTRY") or os.path.join(PROJECT_ROOT, ".cache", "gemini_files.json")
+DEFAULT_TTL_S = 48 * 3600
+REUSE_MARGIN_S = 3600          # do not hand out files that expire within the hour
+POLL_INITIAL_S = 0.5
+POLL_MAX_S = 5.0
+POLL_TIMEOUT_S = 600
+
+
+class FileNotReady(Exception):
+    """The uploaded file ended in a non-ACTIVE state (e.g. FAILED) or never left PROCESSING."""
+
+
+def wait_until_active(handle, timeout=POLL_TIMEOUT_S):
+    """Polls a PROCESSING file with exponential backoff until it is ACTIVE; returns the fresh handle."""
+    delay = POLL_INITIAL_S
+    deadline = time.monotonic() + timeout
+    while handle.state.name == "PROCESSING":
+        if time.monotonic() > deadline:
+            raise FileNotReady(f"{handle.name} still PROCESSING after {timeout}s")
+        time.sleep(delay)
+        delay = min(delay * 2, POLL_MAX_S)
+        handle = genai.get_file(handle.name)
+    if handle.state.name != "ACTIVE":
+        raise FileNotReady(f"{handle.name} is {handle.state.name}")
+    return handle
+
+
+def _expiry_of(handle):
+    expiration = getattr(handle, "expiration_time", None)
+    if expiration is not None and hasattr(expiration, "timestamp"):
+        return expiration.timestamp()
+    return time.time() + DEFAULT_TTL_S
+
+
+class FileRegistry:
+    def __init__(self, path=DEFAULT_REGISTRY_PATH):
+        self.path = path
+        self.uploads = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+        self._inflight = {}    # sha256 -> lock held while that file is being uploaded
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_entry(self, digest, entry):
+        with self._lock:
+            entries = self._read()
+            if entry is None:
+                entries.pop(digest, None)
+            else:
+                entries[digest] = entry
+            write_json_atomic(self.path, entries)
+
+    def _reusable(self, digest):
+        entry = self._read().get(digest)
+        if not entry or entry.get("expires", 0) < time.time() + REUSE_MARGIN_S:
+            return None
+        try:
+            return wait_until_active(genai.get_file(entry["name"]))
+        except Exception:
+            self._write_entry(digest, None)
+            return None
+
+    def get(self, path, display_name=None):
+        """Active File handle for `path`, uploading it only when no valid upload is registered."""
+        digest = sha256_file(path)
+        with self._lock:
+            inflight = self._inflight.setdefault(digest, threading.Lock())
+        with inflight:
+            handle = self._reusable(digest)
+            if handle is not None:
+                self.reused += 1
+                return handle
+
+            print(f"  Uploading {os.path.basename(path)}...")
+            kwargs = {"display_name": display_name} if display_name else {}
+            handle = wait_until_active(genai.upload_file(path=path, **kwargs))
+            self.uploads += 1
+            self._write_entry(digest, {
+                "name": handle.name,
+                "source": os.path.basename(path),
+                "size": os.path.getsize(path),
+                "uploaded": time.time(),
+                "expires": _expiry_of(handle),
+            })
+            return handle
+
+    def purge(self):
+        """Deletes every registered remote file and empties the registry. Returns the count."""
+        entries = self._read()
+        for entry in entries.values():
+            try:
+                genai.delete_file(entry["name"])
+            except Exception:
+                pass
+        with self._lock:
+            write_json_atomic(self.path, {})
+        return len(entries)
+
+    def summary(self):
+        return f"Files: {self.uploads} uploaded / {self.reused} reused"
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry():
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = FileRegistry()
+    return _default_registry
+
+
+def upload_once(path, display_name=None):
+    """Shortcut for scripts: the registered (or freshly uploaded) active handle for `path`."""
+    return get_default_registry().get(path, display_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registry of uploaded Gemini files.")
+    parser.add_argument("command", choices=["list", "purge"])
+    args = parser.parse_args()
+
+    registry = get_default_registry()
+    if args.command == "list":
+        now = time.time()
+        for digest, entry in sorted(registry._read().items(), key=lambda kv: kv[1].get("expires", 0)):
+            hours = (entry.get("expires", 0) - now) / 3600
+            print(f"{digest[:12]}  {entry['name']:<24} {hours:>6.1f}h left  {entry.get('source', '')}")
+    elif args.command == "purge":
+        api_key = os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
+        genai.configure(api_key=api_key)
+        print(f"Deleted {registry.purge()} registered files.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import contextlib
+import contextvars
+from collections import defaultdict
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+# Per-call prompt size and latency metrics.
+#
+# gemini/cache.generate_content and stream_content append one JSON line per call to
+# .cache/metrics/calls.jsonl: script, model, tags (commission, label...), prompt characters,
+# estimated prompt tokens, attached PDF pages, response characters, the token counts the API
+# reports, latency, and whether the answer came from the cache or failed. Scripts add tags
+# with `with tagged(commission=3):`; the retry wrapper tags each call with its label.
+# The report command lists the largest prompts per script and commission.
+
+# --- Configuration ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_METRICS_PATH = os.environ.get("GEMINI_METRICS_PATH") or os.path.join(PROJECT_ROOT, ".cache", "metrics", "calls.jsonl")
+METRICS_DISABLED = os.environ.get("GEMINI_METRICS", "") == "0"
+CHARS_PER_TOKEN = 4         # rough average for Spanish legal text
+TOKENS_PER_PDF_PAGE = 258   # what Gemini bills per attached PDF page
+
+_tags = contextvars.ContextVar("gemini_metrics_tags", default={})
+_write_lock = threading.Lock()
+_page_counts = {}
+
+
+@contextlib.contextmanager
+def tagged(**tags):
+    """Adds tags to every call recorded in this block (same thread)."""
+    token = _tags.set({**_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+def with_current_tags(fn):
+    """Wraps `fn` to run with the caller's tags, for work handed to a thread pool."""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+
+def _pdf_pages(attachment):
+    digest = attachment.digest()
+    if digest not in _page_counts:
+        pages = None
+        if pypdf is not None:
+            try:
+                pages = len(pypdf.PdfReader(attachment.path).pages)
+            except Exception:
+                pass
+        _page_counts[digest] = pages
+    return _page_counts[digest]
+
+
+def prompt_size(contents):
+    """(characters, attached PDF pages, attached files) of a prompt."""
+    chars = pages = files = 0
+    for part in contents:
+        if isinstance(part, str):
+            chars += len(part)
+        elif hasattr(part, "digest") and hasattr(part, "path"):    # cache.PdfAttachment
+            files += 1
+            pages += _pdf_pages(part) or 0
+    return chars, pages, files
+
+
+def estimate_tokens(chars, pages=0):
+    return chars // CHARS_PER_TOKEN + pages * TOKENS_PER_PDF_PAGE
+
+
+def record_call(model_name, contents, started, response_text=None, usage=None, cached=False,
+                streamed=False, error=None, path=None):
+    """Appends one call to the metrics file. Never raises: metrics must not break a run."""
+    if METRICS_DISABLED:
+        return
+    try:
+        chars, pages, files = prompt_size(contents)
+        entry = {
+            "ts": round(time.time(), 3),
+            "script": os.path.basename(sys.argv[0] or "interactive"),
+            "model": str(model_name).split("/")[-1],
+            "tags": _tags.get(),
+            "prompt_chars": chars,
+            "pdf_pages": pages,
+            "files": files,
+            "est_prompt_tokens": estimate_tokens(chars, pages),
+            "response_chars": len(response_text) if response_text is not None else None,
+            "prompt_tokens": getattr(usage, "prompt_token_count", None),
+            "response_tokens": getattr(usage, "candidates_token_count", None),
+            "latency_s": round(time.monotonic() - started, 3),
+            "cached": cached,
+            "streamed": streamed,
+            "error": type(error).__name__ if error is not None else None,
+        }
+        path = path or DEFAULT_METRICS_PATH
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with _write_lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line)
+    except Exception as e:
+        print(f"  [metrics] not recorded: {e}")
+
+
+def load_calls(path=DEFAULT_METRICS_PATH):
+    calls = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                calls.append(json.loads(line))
+            except ValueError:
+                continue    # a line cut by a killed process
+    return calls
+
+
+def report(calls, top=10, include_cached=False):
+    if not include_cached:
+        calls = [c for c in calls if not c.get("cached")]
+    if not calls:
+        print("No calls recorded.")
+        return
+
+    groups = defaultdict(list)
+    for c in calls:
+        groups[(c["script"], str(c["tags"].get("commission", "-")))].append(c)
+
+    print(f"{'script':<40} {'com':>3} {'calls':>6} {'err':>4} {'est tok':>10} {'mean':>8} {'max':>8} {'out tok':>9} {'time s':>8}")
+    print("-" * 104)
+    rows = sorted(groups.items(), key=lambda kv: -sum(c["est_prompt_tokens"] for c in kv[1]))
+    for (script, commission), group in rows:
+        est = [c["est_prompt_tokens"] for c in group]
+        out = sum(c.get("response_tokens") or (c.get("response_chars") or 0) // CHARS_PER_TOKEN for c in group)
+        print(f"{script[:40]:<40} {commission:>3} {len(group):>6} {sum(1 for c in group if c.get('error')):>4} "
+              f"{sum(est):>10} {sum(est) // len(est):>8} {max(est):>8} {out:>9} {sum(c['latency_s'] for c in group):>8.1f}")
+
+    print(f"\nTop {top} prompts by estimated tokens:")
+    for c in sorted(calls, key=lambda c: -c["est_prompt_tokens"])[:top]:
+        reported = f", {c['prompt_tokens']} reported" if c.get("prompt_tokens") else ""
+        print(f"  {c['est_prompt_tokens']:>8} tok ({c['prompt_chars']} chars, {c['pdf_pages']} PDF pages{reported}) "
+              f"{c['latency_s']:>6.1f}s  {c['script']} C{c['tags'].get('commission', '-')} {c['tags'].get('label', '')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt size and latency metrics of Gemini calls.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_report = sub.add_parser("report", help="Largest prompts per script and commission")
+    p_report.add_argument("--path", default=DEFAULT_METRICS_PATH)
+    p_report.add_argument("--top", type=int, default=10)
+    p_report.add_argument("--script", help="Only calls from this script")
+    p_report.add_argument("--include-cached", action="store_true", help="Also count cache hits")
+    p_clear = sub.add_parser("clear", help="Delete the metrics file")
+    p_clear.add_argument("--path", default=DEFAULT_METRICS_PATH)
+    args = parser.parse_args()
+
+    if args.command == "clear":
+        if os.path.exists(args.path):
+            os.remove(args.path)
+        return 0
+
+    if not os.path.exists(args.path):
+        print(f"No metrics at {args.path}")
+        return 1
+    calls = load_calls(args.path)
+    if args.script:
+        calls = [c for c in calls if c["script"] == args.script]
+    report(calls, top=args.top, include_cached=args.include_cached)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import os
+import time
+import threading
+import multiprocessing
+
+# --- Configuration ---
+# Requests per minute allowed per model. GEMINI_RPM overrides every model.
+DEFAULT_RPM = {
+    "gemini-3-flash-preview": 60,
+    "gemini-3-pro-preview": 20,
+    "gemini-2.0-flash-exp": 60,
+}
+FALLBACK_RPM = 30
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `rate` tokens are added per second up to `capacity`;
+    acquire() blocks until enough tokens are available.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    TokenBucket whose state lives in shared memory, so worker processes started with it
+    (see share_rate_limiters) draw from one budget. Pass it to workers when they are
+    created, e.g. through a pool initializer.
+    """
+    def __init__(self, rate, capacity=None, mp_context=None):
+        super().__init__(rate, capacity)
+        mp_context = mp_context or multiprocessing.get_context()
+        self._state = mp_context.Array('d', [self.capacity, time.monotonic()], lock=False)   # tokens, last refill
+        self._lock = mp_context.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._state[0] = min(self.capacity, self._state[0] + (now - self._state[1]) * self.rate)
+        self._state[1] = now
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._state[0] >= tokens:
+                    self._state[0] -= tokens
+                    return
+                wait = (tokens - self._state[0]) / self.rate
+            time.sleep(wait)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def normalize_model_name(model_name):
+    return str(model_name).split("/")[-1]
+
+
+def _bucket_args(name):
+    rpm = os.environ.get("GEMINI_RPM")
+    rpm = float(rpm) if rpm else DEFAULT_RPM.get(name, FALLBACK_RPM)
+    # Allow short bursts of a few requests, then hold the per-minute rate.
+    return {"rate": rpm / 60.0, "capacity": max(1, min(5, rpm / 10))}
+
+
+def burst_capacity(model_name):
+    """Requests `model_name`'s bucket lets through at once; callers can size concurrency by it."""
+    return int(_bucket_args(normalize_model_name(model_name))["capacity"])
+
+
+def get_rate_limiter(model_name):
+    """Returns the process-wide TokenBucket shared by every call to `model_name`."""
+    name = normalize_model_name(model_name)
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = TokenBucket(**_bucket_args(name))
+        return _limiters[name]
+
+
+def share_rate_limiters(model_names, mp_context=None):
+    """
+    Creates cross-process buckets for `model_names` in the parent process and installs them
+    here. Hand the returned dict to every worker's install_rate_limiters, so the per-model
+    rate holds for the whole run rather than per process.
+    """
+    shared = {}
+    for model_name in model_names:
+        name = normalize_model_name(model_name)
+        shared[name] = SharedTokenBucket(mp_context=mp_context, **_bucket_args(name))
+    install_rate_limiters(shared)
+    return shared
+
+
+def install_rate_limiters(limiters):
+    """Makes get_rate_limiter return these buckets (e.g. shared ones, in a worker process)."""
+    with _limiters_lock:
+        _limiters.update(limiters)
@@ -0,0 +1,281 @@
+import os
+import re
+import json
+import time
+import random
+import threading
+from collections import Counter
+
+from constitutional_proposal_tracking.gemini.cache import FINISH_REASONS, finish_reason, generate_content
+from constitutional_proposal_tracking.gemini.metrics import tagged
+
+# Retries for model calls, by error class.
+#
+# Every failure is classified (rate limit, timeout, server error, safety block, unparsable
+# JSON, schema mismatch, other). Transient classes are retried with full-jitter exponential
+# backoff, waiting at least as long as the server's retry hint when it sends one. Parse and
+# schema failures are not resent as-is (the same prompt tends to give the same answer, and a
+# cached one certainly does): the call is repeated once with a repair instruction that quotes
+# the error. A response without text is classified by its finish reason: safety blocks
+# (SAFETY, BLOCKLIST, PROHIBITED_CONTENT) and unknown errors are not retried, a MAX_TOKENS
+# cut-off is repaired, and other reasons are resent. Counters per class are kept
+# process-wide in RETRY_STATS.
+
+# --- Configuration ---
+RATE_LIMIT = "rate_limit"
+TIMEOUT = "timeout"
+SERVER = "server"
+SAFETY = "safety"
+PARSE = "parse"
+SCHEMA = "schema"
+OTHER = "other"
+ERROR_CLASSES = (RATE_LIMIT, TIMEOUT, SERVER, SAFETY, PARSE, SCHEMA, OTHER)
+
+# Retries allowed per error class (after the first attempt). RETRY_MAX scales the transient ones.
+_transient = int(os.environ.get("RETRY_MAX", "5"))
+RETRY_POLICY = {
+    RATE_LIMIT: _transient + 1,
+    TIMEOUT: max(1, _transient - 2),
+    SERVER: _transient,
+    PARSE: 1,
+    SCHEMA: 1,
+    SAFETY: 0,
+    OTHER: 0,
+}
+BACKOFF_BASE_S = float(os.environ.get("RETRY_BASE_S", "2"))
+BACKOFF_MAX_S = 60.0
+REPAIR_EXCERPT_CHARS = 2000
+
+_RATE_LIMIT_NAMES = {"ResourceExhausted", "TooManyRequests"}
+_TIMEOUT_NAMES = {"DeadlineExceeded", "GatewayTimeout", "Timeout", "ReadTimeout", "ConnectTimeout"}
+_SERVER_NAMES = {"ServiceUnavailable", "InternalServerError", "BadGateway", "ServerError", "Aborted", "ConnectionError"}
+_SAFETY_NAMES = {"BlockedPromptException"}
+_SAFETY_FINISH = {"SAFETY", "BLOCKLIST", "PROHIBITED_CONTENT"}
+_FINISH_RE = re.compile(r'finish_?reason\W*(?:is\s+)?(%s|\d+)\b' % "|".join(FINISH_REASONS.values()))
+_HINT_RES = [
+    re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)'),
+    re.compile(r'retry in ([\d.]+)\s*s', re.IGNORECASE),
+]
+
+
+class ParseError(ValueError):
+    """The response text is not the JSON the caller expects. `text` is the offending response."""
+    def __init__(self, message, text=None):
+        super().__init__(message)
+        self.text = text
+
+
+class SchemaError(ValueError):
+    """The response parsed but does not have the expected shape."""
+    def __init__(self, message, text=None):
+        super().__init__(message)
+        self.text = text
+
+
+def classify(exc):
+    """Error class of an exception raised by a model call or by parsing its response."""
+    if isinstance(exc, SchemaError):
+        return SCHEMA
+    if isinstance(exc, (ParseError, json.JSONDecodeError)):
+        return PARSE
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    message = str(exc)
+    if names & _RATE_LIMIT_NAMES or message.startswith("429") or "Resource has been exhausted" in message:
+        return RATE_LIMIT
+    if names & _TIMEOUT_NAMES or isinstance(exc, TimeoutError) or message.startswith("504"):
+        return TIMEOUT
+    if names & _SERVER_NAMES or isinstance(exc, ConnectionError) or re.match(r'50[0-3]\b', message):
+        return SERVER
+    if names & _SAFETY_NAMES:
+        return SAFETY
+    # response.text raises ValueError when the candidate has no text; the finish reason says why.
+    # A cut-off answer (MAX_TOKENS) gets the repair prompt, which asks for the complete JSON;
+    # RECITATION and OTHER tend to clear on a resend.
+    reason = finish_reason_of(exc)
+    if reason in _SAFETY_FINISH:
+        return SAFETY
+    if reason == "MAX_TOKENS":
+        return PARSE
+    if reason is not None and reason != "STOP":
+        return SERVER
+    if isinstance(exc, ValueError) and re.search(r'\bsafety\b|\bblocked\b', message, re.IGNORECASE):
+        return SAFETY
+    return OTHER
+
+
+def finish_reason_of(exc):
+    """
+    Finish reason name behind a failed call: from the response attached to the error
+    (cache.generate_content), the candidate of a StopCandidateException, or the error message.
+    """
+    for source in (getattr(exc, "response", None), *exc.args[:1]):
+        if source is not None and not isinstance(source, str):
+            reason = finish_reason(source)
+            if reason:
+                return reason
+    m = _FINISH_RE.search(str(exc))
+    if not m:
+        return None
+    value = m.group(1)
+    return FINISH_REASONS.get(int(value), value) if value.isdigit() else value
+
+
+def retry_hint(exc):
+    """Seconds the server asked us to wait, when the error carries a hint."""
+    delay = getattr(exc, "retry_delay", None)
+    if delay is not None:
+        seconds = getattr(delay, "total_seconds", None)
+        return seconds() if seconds else float(getattr(delay, "seconds", delay))
+    for pattern in _HINT_RES:
+        m = pattern.search(str(exc))
+        if m:
+            return float(m.group(1))
+    return None
+
+
+def backoff_delay(retry, hint=None):
+    """Full-jitter exponential backoff for the `retry`-th retry (0-based), never shorter than the hint."""
+    delay = random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** retry))
+    if hint is not None:
+        delay = hint + random.uniform(0, BACKOFF_BASE_S)
+    return delay
+
+
+def repair_prompt(exc):
+    excerpt = (getattr(exc, "text", None) or "")[:REPAIR_EXCERPT_CHARS]
+    out = (
+        "\n\nIMPORTANT: a previous answer to this request could not be used "
+        f"({exc}). Answer again with ONLY the JSON requested above, complete and valid, "
+        "with no commentary or markdown."
+    )
+    if excerpt:
+        out += f"\nStart of the rejected answer:\n{excerpt}"
+    return out
+
+
+class RetryStats:
+    """Process-wide counters: errors, retries and give-ups per error class, plus time slept."""
+    def __init__(self):
+        self.calls = 0
+        self.succeeded = 0
+        self.errors = Counter()
+        self.retries = Counter()
+        self.gave_up = Counter()
+        self.repaired = 0
+        self.slept_s = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, **kwargs):
+        with self._lock:
+            for name, value in kwargs.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def count(self, counter, error_class):
+        with self._lock:
+            getattr(self, counter)[error_class] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "succeeded": self.succeeded,
+                "repaired": self.repaired,
+                "slept_s": round(self.slept_s, 1),
+                "errors": dict(self.errors),
+                "retries": dict(self.retries),
+                "gave_up": dict(self.gave_up),
+            }
+
+    def summary(self):
+        s = self.stats()
+        errors = ", ".join(f"{n} {k}" for k, n in sorted(s["errors"].items())) or "none"
+        gave_up = sum(s["gave_up"].values())
+        return (f"Retries: {sum(s['retries'].values())} after errors ({errors}); "
+                f"{s['repaired']} repaired, {gave_up} gave up, {s['slept_s']}s backing off")
+
+
+RETRY_STATS = RetryStats()
+
+
+def call_with_retry(call, contents, label="call", policy=None, stats=RETRY_STATS):
+    """
+    Runs call(contents) -> result, retrying by error class (see RETRY_POLICY).
+    On a parse or schema error the next attempt gets `contents` plus a repair instruction.
+    Raises the last exception when its class has no retries left.
+    """
+    policy = policy or RETRY_POLICY
+    contents = list(contents) if isinstance(contents, (list, tuple)) else [contents]
+    attempt_contents = contents
+    used = Counter()
+    repairing = False
+    stats.add(calls=1)
+    while True:
+        try:
+            with tagged(label=label):
+                result = call(attempt_contents)
+        except Exception as e:
+            error_class = classify(e)
+            stats.count("errors", error_class)
+            if used[error_class] >= policy.get(error_class, 0):
+                stats.count("gave_up", error_class)
+                raise
+            used[error_class] += 1
+            stats.count("retries", error_class)
+            if error_class in (PARSE, SCHEMA):
+                print(f"  [retry] {label}: {error_class} error ({str(e)[:100]}); asking for a repaired answer")
+                attempt_contents = contents + [repair_prompt(e)]
+                repairing = True
+                continue
+            delay = backoff_delay(used[error_class] - 1, retry_hint(e))
+            print(f"  [retry] {label}: {error_class} ({str(e)[:100]}); retry {used[error_class]} in {delay:.1f}s")
+            stats.add(slept_s=delay)
+            time.sleep(delay)
+            continue
+        stats.add(succeeded=1, repaired=int(repairing))
+        return result
+
+
+def parse_json(text):
+    """
+    Response text -> JSON value. Accepts ```json fences and prose around a single array or
+    object; raises ParseError otherwise.
+    """
+    clean = text.replace('```json', '').replace('```', '').strip()
+    try:
+        return json.loads(clean)
+    except ValueError:
+        pass
+    starts = [i for i in (clean.find('['), clean.find('{')) if i >= 0]
+    if starts:
+        start = min(starts)
+        end = clean.rfind(']' if clean[start] == '[' else '}')
+        if end > start:
+            try:
+                return json.loads(clean[start:end + 1])
+            except ValueError as e:
+                raise ParseError(f"invalid JSON: {e}", text) from e
+    raise ParseError("no JSON value in response", text)
+
+
+def generate_json(model, contents, generation_config=None, parse=parse_json, validate=None, label=None):
+    """
+    generate_content (cached, rate limited) + parse + optional validate(value), which raises
+    SchemaError on a shape mismatch; retried by error class. Returns the parsed value.
+    """
+    def attempt(parts):
+        response = generate_content(model, parts, generation_config=generation_config)
+        text = response.text
+        try:
+            value = parse(text)
+        except ParseError:
+            raise
+        except ValueError as e:
+            raise ParseError(str(e), text) from e
+        if validate is not None:
+            try:
+                validate(value)
+            except SchemaError as e:
+                e.text = e.text or text
+                raise
+        return value
+    return call_with_retry(attempt, contents, label=label or getattr(model, "model_name", "model"))
@@ -0,0 +1,117 @@
+import os
+import json
+
+from constitutional_proposal_tracking.gemini.retry import ParseError
+
+# Incremental parsing of model responses shaped as one top-level JSON array of objects.
+#
+# Text chunks (gemini/cache.stream_content) are scanned once, tracking string/escape state
+# and nesting depth; every object that closes at depth 1 is decoded and emitted right away.
+# Anything before the opening '[' (```json fences, prose) is ignored. An object that does
+# not decode is skipped and counted instead of failing the whole response. A response cut
+# off mid-array (truncated, max tokens) yields every object completed before the cut to the
+# sidecar, but raise_if_incomplete() then fails the call so it is retried, and
+# json_array_complete() keeps stream_content from caching it.
+
+# --- Configuration ---
+STREAMING_DISABLED = os.environ.get("STREAM_RESPONSES", "") == "0"
+
+
+class JsonArrayStream:
+    def __init__(self):
+        self.objects = 0
+        self.errors = 0
+        self.complete = False    # the closing ']' of the top-level array was seen
+        self._buffer = []        # characters of the object being read
+        self._depth = 0          # 0: before the array, 1: inside it, >1: inside an element
+        self._in_string = False
+        self._escape = False
+        self._started = False
+
+    def feed(self, chunk):
+        """Consumes a text chunk; returns the objects it completed."""
+        done = []
+        for ch in chunk:
+            if self.complete:
+                break
+            if not self._started:
+                if ch == '[':
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._depth > 1:
+                self._buffer.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                if self._depth == 1:
+                    self._buffer = [ch]
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 1:
+                    obj = self._decode("".join(self._buffer))
+                    self._buffer = []
+                    if obj is not None:
+                        done.append(obj)
+                elif self._depth == 0:
+                    self.complete = True
+        return done
+
+    def raise_if_incomplete(self):
+        """Raises ParseError when the top-level array never closed."""
+        if not self.complete:
+            raise ParseError(f"response ended before the JSON array was closed ({self.objects} objects read)")
+
+    def _decode(self, text):
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            self.errors += 1
+            return None
+        self.objects += 1
+        return obj
+
+
+def json_array_complete(text):
+    """True when `text` holds a top-level JSON array that closes (stream_content's cache check)."""
+    parser = JsonArrayStream()
+    parser.feed(text)
+    return parser.complete
+
+
+def collect_json_array(chunks, sidecar_path=None):
+    """
+    Parses a streamed JSON array. Each object is appended to `sidecar_path` (JSONL) as soon
+    as it is complete, so partial results survive a failed or truncated call and later
+    stages can read them before it finishes. Returns (objects, parser).
+    The sidecar is only ever appended to: the caller clears it once per logical call, so a
+    retried attempt adds after the objects of the attempts before it (which it may repeat).
+    """
+    parser = JsonArrayStream()
+    objects = []
+    sidecar = None
+    try:
+        for chunk in chunks:
+            for obj in parser.feed(chunk):
+                objects.append(obj)
+                if sidecar_path:
+                    if sidecar is None:
+                        os.makedirs(os.path.dirname(os.path.abspath(sidecar_path)), exist_ok=True)
+                        sidecar = open(sidecar_path, 'a', encoding='utf-8')
+                    sidecar.write(json.dumps(obj, ensure_ascii=False) + "\n")
+                    sidecar.flush()
+    finally:
+        if sidecar:
+            sidecar.close()
+    return objects, parser
@@ -0,0 +1,218 @@
+import os
+import re
+import ast
+import glob
+import json
+import pickle
+import threading
+from collections import namedtuple
+
+from constitutional_proposal_tracking.utils.files import write_bytes_atomic
+
+# Shared loader for submitted_initiatives/api_extracted_*.json.
+#
+# The corpus is parsed once into compact records (authors as tuples, texts packed into a
+# single UTF-8 arena addressed by offset) and pickled to a sidecar next to the other caches.
+# The sidecar is reused while every source file keeps its size and mtime, so later stages
+# start in milliseconds instead of re-reading and re-parsing 4 MB of JSON.
+
+# --- Configuration ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+INITIATIVES_DIR = os.path.join(PROJECT_ROOT, "submitted_initiatives")
+DEFAULT_SIDECAR_PATH = os.path.join(PROJECT_ROOT, ".cache", "initiatives_index.pickle")
+SOURCE_PATTERN = "api_extracted_*.json"
+LOADER_VERSION = 1
+
+INITIATIVE_ID_RE = re.compile(r'^(\d+-\d+)')
+LEADING_NUMBER_RE = re.compile(r'^(\d+)')
+
+InitiativeRecord = namedtuple("InitiativeRecord", [
+    "key",            # original key (PDF filename)
+    "initiative_id",  # "98-6" (number-commission)
+    "number",         # "98"
+    "commission",     # int or None
+    "date",           # fecha as extracted, or None
+    "author",         # autor_matched
+    "authors",        # tuple of firmantes_matched
+    "text_offset",    # byte range of propuesta_norma in the text arena
+    "text_length",
+])
+
+
+def parse_name_list(value):
+    """firmantes_* fields come as lists or as stringified Python lists ("['A', 'B']")."""
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        value = value.strip()
+        if not value or value == "None":
+            return ()
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return (value,)
+    if isinstance(value, (list, tuple)):
+        return tuple(str(v) for v in value if v)
+    return (str(value),)
+
+
+def parse_commission(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def none_if_missing(value):
+    return None if value in (None, "", "None") else value
+
+
+def initiative_id_for(key, commission=None):
+    """'98-6-Iniciativa...' -> '98-6'; keys without the commission suffix use comision_n when known."""
+    match = INITIATIVE_ID_RE.match(key)
+    if match:
+        return match.group(1)
+    match = LEADING_NUMBER_RE.match(key)
+    if not match:
+        return key
+    if commission is not None:
+        return f"{match.group(1)}-{commission}"
+    return match.group(1)
+
+
+def source_files(directory):
+    return sorted(glob.glob(os.path.join(directory, SOURCE_PATTERN)))
+
+
+def source_fingerprint(directory):
+    """Cheap staleness check: (name, size, mtime) of every source file."""
+    entries = [LOADER_VERSION]
+    for path in source_files(directory):
+        st = os.stat(path)
+        entries.append((os.path.basename(path), st.st_size, st.st_mtime_ns))
+    return tuple(entries)
+
+
+class InitiativeCorpus:
+    """
+    In-memory index of the submitted initiatives.
+    Records are looked up by initiative_id ("98-6"), by full key (filename) or by number ("98").
+    """
+    def __init__(self, records, arena, fingerprint=None):
+        self.records = records
+        self.fingerprint = fingerprint
+        self._arena = arena
+        self.by_id = {}
+        self.by_number = {}
+        for record in records:
+            self.by_id[record.initiative_id] = record
+            self.by_id[record.key] = record
+            self.by_number.setdefault(record.number, []).append(record)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __contains__(self, id_or_key):
+        return id_or_key in self.by_id
+
+    def get(self, id_or_key, default=None):
+        return self.by_id.get(id_or_key, default)
+
+    def text(self, record_or_id):
+        """propuesta_norma of a record (or of the record with that id/key); '' when unknown."""
+        record = record_or_id if isinstance(record_or_id, InitiativeRecord) else self.get(record_or_id)
+        if record is None:
+            return ""
+        return self._arena[record.text_offset:record.text_offset + record.text_length].decode('utf-8')
+
+    def authors_by_number(self):
+        """{number: [authors...]} merged across every record sharing the number, first-seen order."""
+        merged = {}
+        for record in self.records:
+            if not record.authors:
+                continue
+            names = merged.setdefault(record.number, [])
+            for name in record.authors:
+                if name not in names:
+                    names.append(name)
+        return merged
+
+    # --- Building and persistence ---
+
+    @classmethod
+    def parse(cls, directory=INITIATIVES_DIR):
+        records, chunks, offset = [], [], 0
+        for file_path in source_files(directory):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for key, value in data.items():
+                number = LEADING_NUMBER_RE.match(key)
+                if not number:
+                    continue
+                commission = parse_commission(value.get("comision_n"))
+                text = (value.get("propuesta_norma") or "").encode('utf-8')
+                records.append(InitiativeRecord(
+                    key=key,
+                    initiative_id=initiative_id_for(key, commission),
+                    number=number.group(1),
+                    commission=commission,
+                    date=none_if_missing(value.get("fecha")),
+                    author=none_if_missing(value.get("autor_matched")),
+                    authors=parse_name_list(value.get("firmantes_matched")),
+                    text_offset=offset,
+                    text_length=len(text),
+                ))
+                chunks.append(text)
+                offset += len(text)
+        return cls(records, b"".join(chunks), fingerprint=source_fingerprint(directory))
+
+    def save(self, path=DEFAULT_SIDECAR_PATH):
+        payload = {
+            "fingerprint": self.fingerprint,
+            "records": [tuple(r) for r in self.records],
+            "arena": self._arena,
+        }
+        write_bytes_atomic(path, pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @classmethod
+    def load(cls, path=DEFAULT_SIDECAR_PATH):
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+        records = [InitiativeRecord(*r) for r in payload["records"]]
+        return cls(records, payload["arena"], fingerprint=payload["fingerprint"])
+
+
+_corpora = {}
+_corpora_lock = threading.Lock()
+
+
+def load_corpus(directory=INITIATIVES_DIR, sidecar_path=DEFAULT_SIDECAR_PATH):
+    """
+    Returns the InitiativeCorpus for `directory`, memoized per process.
+    Reuses the sidecar when the source files are unchanged; otherwise re-parses and rewrites it.
+    """
+    fingerprint = source_fingerprint(directory)
+    with _corpora_lock:
+        corpus = _corpora.get(directory)
+        if corpus is not None and corpus.fingerprint == fingerprint:
+            return corpus
+
+        corpus = None
+        if os.path.exists(sidecar_path):
+            try:
+                corpus = InitiativeCorpus.load(sidecar_path)
+            except (OSError, EOFError, KeyError, TypeError, pickle.UnpicklingError):
+                corpus = None
+            if corpus is not None and corpus.fingerprint != fingerprint:
+                corpus = None
+        if corpus is None:
+            corpus = InitiativeCorpus.parse(directory)
+            try:
+                corpus.save(sidecar_path)
+            except OSError as e:
+                print(f"Warning: could not write initiatives sidecar {sidecar_path}: {e}")
+        _corpora[directory] = corpus
+        return corpus
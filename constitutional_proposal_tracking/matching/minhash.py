@@ -0,0 +1,251 @@
+import os
+import io
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import unicodedata
+
+import numpy as np
+
+from constitutional_proposal_tracking.initiatives.loader import INITIATIVES_DIR, load_corpus
+from constitutional_proposal_tracking.utils.files import write_bytes_atomic
+
+# MinHash-LSH index over the propuesta_norma texts of submitted_initiatives/.
+#
+# Each initiative is split into article chunks; each chunk is a set of word 3-gram shingles
+# summarized by a NUM_PERM MinHash signature. Signatures are banded (BANDS x ROWS) into hash
+# buckets, so a query only looks at chunks sharing at least one band and then estimates the
+# Jaccard similarity from signature agreement. With 32 bands of 4 rows, pairs around
+# J = 0.4 collide with ~50% probability and pairs at J >= 0.6 almost always do.
+#
+# The index is saved as one .npz (signatures + chunk metadata) and rebuilt automatically
+# when the initiatives corpus (initiatives/loader.py) changes.
+
+# --- Configuration ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_INDEX_PATH = os.path.join(PROJECT_ROOT, ".cache", "initiatives_minhash.npz")
+
+NUM_PERM = 128
+BANDS = 32
+SHINGLE_SIZE = 3
+MIN_CHUNK_CHARS = 80
+SEED = 1
+INDEX_VERSION = 1
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+ARTICLE_SPLIT_RE = re.compile(r'(?=\bArt[íi]culo\s+[^\s.:]{1,15}(?:\s+(?:bis|ter|[A-Za-z]))?\s*[°º]?\s*[.:\-–—])')
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize_words(text):
+    text = unicodedata.normalize('NFKD', (text or "").lower())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return WORD_RE.findall(text)
+
+
+def shingles(text, k=SHINGLE_SIZE):
+    words = normalize_words(text)
+    if len(words) < k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def hash_shingles(shingle_set):
+    """Stable 32-bit hashes (Python's hash() is salted per process)."""
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little') for s in shingle_set],
+        dtype=np.uint64,
+    )
+
+
+def split_articles(text):
+    """Splits a propuesta_norma into article chunks; short fragments are merged into the next chunk."""
+    chunks, pending = [], ""
+    for part in ARTICLE_SPLIT_RE.split(text or ""):
+        part = pending + part
+        if len(part.strip()) < MIN_CHUNK_CHARS:
+            pending = part
+            continue
+        chunks.append(part.strip())
+        pending = ""
+    if pending.strip():
+        if chunks:
+            chunks[-1] = f"{chunks[-1]} {pending.strip()}"
+        else:
+            chunks.append(pending.strip())
+    return chunks
+
+
+def index_fingerprint(corpus):
+    blob = json.dumps([INDEX_VERSION, corpus.fingerprint])
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+class InitiativeIndex:
+    """MinHash signatures for every initiative chunk plus the LSH band buckets."""
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, seed=SEED):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.chunks = []    # [{"initiative_id", "filename", "chunk", "text"}]
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self.fingerprint = None
+        self._buckets = None
+
+    # --- Signatures ---
+
+    def signature(self, text):
+        hashes = hash_shingles(shingles(text))
+        if not len(hashes):
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        # (a*x + b) mod p, truncated to 32 bits; uint64 overflow wraps, as in the usual numpy MinHash
+        with np.errstate(over='ignore'):
+            permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _build_buckets(self):
+        self._buckets = [dict() for _ in range(self.bands)]
+        for row, signature in enumerate(self.signatures):
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(key, []).append(row)
+
+    # --- Building ---
+
+    @classmethod
+    def build(cls, directory=INITIATIVES_DIR, **kwargs):
+        index = cls(**kwargs)
+        corpus = load_corpus(directory)
+        signatures = []
+        for record in corpus:
+            for n, chunk in enumerate(split_articles(corpus.text(record))):
+                index.chunks.append({"initiative_id": record.initiative_id, "filename": record.key, "chunk": n, "text": chunk})
+                signatures.append(index.signature(chunk))
+        if signatures:
+            index.signatures = np.vstack(signatures)
+        index.fingerprint = index_fingerprint(corpus)
+        index._build_buckets()
+        return index
+
+    # --- Persistence ---
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        meta = {
+            "version": INDEX_VERSION,
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "fingerprint": self.fingerprint,
+            "chunks": self.chunks,
+        }
+        buf = io.BytesIO()
+        np.savez_compressed(buf, signatures=self.signatures, a=self._a, b=self._b,
+                            meta=np.array(json.dumps(meta, ensure_ascii=False)))
+        write_bytes_atomic(path, buf.getvalue())
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            index = cls(num_perm=meta["num_perm"], bands=meta["bands"])
+            index._a = data["a"]
+            index._b = data["b"]
+            index.signatures = data["signatures"]
+        index.chunks = meta["chunks"]
+        index.fingerprint = meta["fingerprint"]
+        index._build_buckets()
+        return index
+
+    # --- Querying ---
+
+    def candidates(self, signature):
+        rows = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            rows.update(self._buckets[band].get(key, ()))
+        return rows
+
+    def query(self, text, top_k=10, min_jaccard=0.0):
+        """
+        Initiatives whose chunks collide with `text` in at least one LSH band, best first.
+        Returns [{"initiative_id", "filename", "chunk", "jaccard"}, ...] with one entry per
+        initiative (its best chunk) and the Jaccard similarity estimated from the signatures.
+        """
+        signature = self.signature(text)
+        rows = np.fromiter(self.candidates(signature), dtype=np.int64)
+        if not len(rows):
+            return []
+        estimates = (self.signatures[rows] == signature).mean(axis=1)
+
+        best = {}
+        for row, jaccard in zip(rows, estimates):
+            if jaccard < min_jaccard:
+                continue
+            chunk = self.chunks[row]
+            current = best.get(chunk["initiative_id"])
+            if current is None or jaccard > current["jaccard"]:
+                best[chunk["initiative_id"]] = {
+                    "initiative_id": chunk["initiative_id"],
+                    "filename": chunk["filename"],
+                    "chunk": chunk["chunk"],
+                    "jaccard": round(float(jaccard), 3),
+                }
+        return sorted(best.values(), key=lambda r: -r["jaccard"])[:top_k]
+
+
+def load_or_build(directory=INITIATIVES_DIR, path=DEFAULT_INDEX_PATH, verbose=True):
+    """Loads the saved index, rebuilding it when missing or stale."""
+    fingerprint = index_fingerprint(load_corpus(directory))
+    if os.path.exists(path):
+        try:
+            index = InitiativeIndex.load(path)
+            if index.fingerprint == fingerprint:
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+    if verbose:
+        print("Building initiatives MinHash index...")
+    t0 = time.time()
+    index = InitiativeIndex.build(directory)
+    index.save(path)
+    if verbose:
+        print(f"Indexed {len(index.chunks)} chunks in {time.time() - t0:.1f}s -> {path}")
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MinHash-LSH index over submitted initiatives.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="(Re)build the index.")
+    p_build.add_argument("--dir", default=INITIATIVES_DIR)
+    p_build.add_argument("--out", default=DEFAULT_INDEX_PATH)
+
+    p_query = sub.add_parser("query", help="Candidate initiatives for a text.")
+    p_query.add_argument("text", help="Text to look up ('-' reads stdin)")
+    p_query.add_argument("--top", type=int, default=10)
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = InitiativeIndex.build(args.dir)
+        index.save(args.out)
+        print(f"Indexed {len(index.chunks)} chunks -> {args.out}")
+    elif args.command == "query":
+        text = sys.stdin.read() if args.text == "-" else args.text
+        for result in load_or_build().query(text, top_k=args.top):
+            print(f"{result['jaccard']:.3f}  {result['initiative_id']:<10} {result['filename']}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import difflib
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+# Batch text similarity for target x candidate matching.
+#
+# Scoring every pair with difflib.SequenceMatcher is O(N·M·L²). Instead, every candidate is
+# embedded once as a sparse character n-gram vector and all targets are scored against all
+# candidates in one sparse matrix product (cosine). Only the top-k candidates per target are
+# then rescored with SequenceMatcher, so returned scores are the same ratios the legacy
+# thresholds (0.6, 0.5, Likert buckets) were tuned on.
+
+NGRAM = 3
+DEFAULT_SHORTLIST = 10
+
+# (lower bound, score): ratio > bound -> score. Below every bound -> 1.
+LIKERT_BUCKETS = [
+    (0.98, 7),  # Exact match
+    (0.90, 6),  # Very high
+    (0.80, 5),  # High
+    (0.60, 4),  # Moderate
+    (0.40, 3),
+    (0.20, 2),
+]
+
+
+def sequence_ratio(a, b):
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def likert_score(ratio):
+    """Maps a SequenceMatcher ratio to the 1-7 Likert scale."""
+    for bound, score in LIKERT_BUCKETS:
+        if ratio > bound:
+            return score
+    return 1
+
+
+def char_ngrams(text, n=NGRAM):
+    padded = f" {text or ''} "
+    return [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+
+def first_above(target, candidate_texts, threshold):
+    """Index of the first candidate whose ratio exceeds `threshold`, or -1 (legacy first-hit loops)."""
+    for idx, text in enumerate(candidate_texts):
+        if sequence_ratio(target, text) > threshold:
+            return idx
+    return -1
+
+
+class CandidateIndex:
+    """
+    Character n-gram index over a fixed list of candidate texts.
+    Texts are compared as given: callers apply their own cleaning before indexing.
+    """
+    def __init__(self, candidate_texts, n=NGRAM):
+        self.texts = list(candidate_texts)
+        self.n = n
+        self.vocab = {}
+        self.matrix = self._vectorize(self.texts, grow=True)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _vectorize(self, texts, grow=False):
+        """L2-normalized n-gram count rows. Norms include n-grams unseen by the index."""
+        rows, cols, vals = [], [], []
+        for row, text in enumerate(texts):
+            counts = Counter(char_ngrams(text, self.n))
+            norm = np.sqrt(sum(c * c for c in counts.values())) or 1.0
+            for gram, count in counts.items():
+                col = self.vocab.get(gram)
+                if col is None:
+                    if not grow:
+                        continue
+                    col = self.vocab[gram] = len(self.vocab)
+                rows.append(row)
+                cols.append(col)
+                vals.append(count / norm)
+        shape = (len(texts), max(1, len(self.vocab)))
+        return sparse.csr_matrix((vals, (rows, cols)), shape=shape, dtype=np.float64)
+
+    def cosine(self, targets):
+        """Dense (len(targets) x len(candidates)) cosine similarity matrix."""
+        if not self.texts:
+            return np.zeros((len(targets), 0))
+        target_matrix = self._vectorize(targets)
+        return (target_matrix @ self.matrix.T).toarray()
+
+    def shortlist(self, targets, k=DEFAULT_SHORTLIST):
+        """Per target, candidate indexes by decreasing cosine (all candidates when k is None)."""
+        sims = self.cosine(targets)
+        n_cand = sims.shape[1]
+        if k is None or k >= n_cand:
+            return [list(np.argsort(-row, kind="stable")) for row in sims]
+        result = []
+        for row in sims:
+            top = np.argpartition(-row, k - 1)[:k]
+            result.append(list(top[np.argsort(-row[top], kind="stable")]))
+        return result
+
+    def _rank_shortlisted(self, target, indexes):
+        scored = [(int(idx), sequence_ratio(target, self.texts[idx])) for idx in indexes]
+        # Ties go to the earlier candidate, like the legacy `if ratio > best_ratio` loops
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored
+
+    def rank(self, target, k=DEFAULT_SHORTLIST):
+        """[(candidate_idx, ratio), ...] best first, for the top-k cosine candidates."""
+        return self.rank_many([target], k)[0]
+
+    def rank_many(self, targets, k=DEFAULT_SHORTLIST):
+        shortlists = self.shortlist(targets, k)
+        return [self._rank_shortlisted(t, idxs) for t, idxs in zip(targets, shortlists)]
+
+    def best_match(self, target, k=DEFAULT_SHORTLIST):
+        """(candidate_idx, ratio) of the best candidate, or (-1, 0.0) when nothing scores above 0."""
+        return self.best_matches([target], k)[0]
+
+    def best_matches(self, targets, k=DEFAULT_SHORTLIST):
+        results = []
+        for ranked in self.rank_many(targets, k):
+            if ranked and ranked[0][1] > 0:
+                results.append(ranked[0])
+            else:
+                results.append((-1, 0.0))
+        return results
@@ -0,0 +1,258 @@
+import os
+import re
+import sys
+import json
+import glob
+import argparse
+from collections import Counter
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+from constitutional_proposal_tracking.utils.files import sha256_file, write_json_atomic
+
+# Local text-layer pre-extraction for the PDFs sent to the extractors.
+#
+# Each PDF is parsed once with pdfplumber (pdfminer.six): per page, the text outside tables,
+# the tables as rows of cells and the bounding box of every cell. The result is cached as one
+# JSON file per page under .cache/pdf_text/<sha256 of the PDF>/, so re-runs and other stages
+# reuse it. Extractors then send the rendered text instead of uploading the PDF; scanned
+# PDFs (no usable text layer) and environments without pdfplumber keep uploading the binary.
+
+# --- Configuration ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_DIR = os.environ.get("PDF_TEXT_CACHE_DIR") or os.path.join(PROJECT_ROOT, ".cache", "pdf_text")
+TEXT_LAYER_DISABLED = os.environ.get("PDF_TEXT_LAYER", "") == "0"
+EXTRACTOR_VERSION = 2
+
+MIN_PAGE_CHARS = 40          # pages with less text than this count as image-only
+MIN_TEXT_PAGE_RATIO = 0.8    # share of text pages needed to trust the text layer
+MARGIN_RATIO = 0.08          # top/bottom share of the page checked for running headers/footers
+MIN_REPEATED_PAGES = 3
+
+DOCUMENT_PREAMBLE = (
+    "NOTE: The document below is the text layer extracted from the PDF, page by page "
+    "(\"=== Página N ===\"). Tables are rendered row by row with cells separated by \" | \"; "
+    "the left-to-right cell order matches the table columns."
+)
+
+DIGITS_RE = re.compile(r'\d+')
+
+
+def _table_cells(table):
+    cells = []
+    for row in table.rows:
+        cells.append([list(cell) if cell else None for cell in row.cells])
+    return cells
+
+
+def _inside(obj, bboxes):
+    cx = (obj["x0"] + obj["x1"]) / 2
+    cy = (obj["top"] + obj["bottom"]) / 2
+    return any(x0 <= cx <= x1 and top <= cy <= bottom for x0, top, x1, bottom in bboxes)
+
+
+def extract_page(page):
+    """
+    Text outside tables (whole and as positioned lines), tables (rows of cell texts) and cell
+    geometry of one pdfplumber page.
+    """
+    tables = page.find_tables()
+    bboxes = [t.bbox for t in tables]
+    outside = page.filter(lambda obj: obj.get("object_type") != "char" or not _inside(obj, bboxes)) if bboxes else page
+    return {
+        "page": page.page_number,
+        "width": float(page.width),
+        "height": float(page.height),
+        "chars": len(page.chars),
+        "text": outside.extract_text() or "",
+        "lines": [{"top": round(l["top"], 1), "text": l["text"]} for l in outside.extract_text_lines()],
+        "tables": [
+            {"bbox": list(t.bbox), "rows": t.extract(), "cells": _table_cells(t)}
+            for t in tables
+        ],
+    }
+
+
+class PdfText:
+    """Cached text layer of one PDF: a list of page dicts as produced by extract_page."""
+    def __init__(self, pdf_path, digest, pages):
+        self.pdf_path = pdf_path
+        self.digest = digest
+        self.pages = pages
+
+    @property
+    def has_text_layer(self):
+        if not self.pages:
+            return False
+        text_pages = sum(1 for p in self.pages if p["chars"] >= MIN_PAGE_CHARS)
+        return text_pages / len(self.pages) >= MIN_TEXT_PAGE_RATIO
+
+    def repeated_lines(self):
+        """Running headers/footers: margin lines (digits ignored) repeated on many pages."""
+        counts = Counter()
+        for page in self.pages:
+            margin = page["height"] * MARGIN_RATIO
+            edges = {DIGITS_RE.sub("#", l["text"].strip()) for l in page["lines"]
+                     if l["top"] < margin or l["top"] > page["height"] - margin}
+            counts.update(edges)
+        threshold = max(MIN_REPEATED_PAGES, len(self.pages) // 2)
+        return {line for line, n in counts.items() if n >= threshold}
+
+    def events(self, page, skip_lines=frozenset()):
+        """Lines and tables of a page in reading order: [("line", text) | ("table", rows)]."""
+        items = [(l["top"], 0, "line", l["text"]) for l in page["lines"]
+                 if DIGITS_RE.sub("#", l["text"].strip()) not in skip_lines]
+        items += [(t["bbox"][1], 1, "table", t["rows"]) for t in page["tables"]]
+        return [(kind, value) for _, _, kind, value in sorted(items, key=lambda item: item[:2])]
+
+    def render_page(self, page, skip_lines=frozenset()):
+        parts, lines = [], []
+        for kind, value in self.events(page, skip_lines):
+            if kind == "line":
+                lines.append(value)
+                continue
+            if lines:
+                parts.append("\n".join(lines))
+                lines = []
+            parts.append("\n".join(" | ".join((c or "").replace("\n", " ").strip() for c in row) for row in value))
+        if lines:
+            parts.append("\n".join(lines))
+        return "\n\n".join(p for p in parts if p.strip())
+
+    def render(self, pages=None):
+        """Prompt text for the given page numbers (default: all), without running headers."""
+        skip = self.repeated_lines()
+        wanted = set(pages) if pages is not None else None
+        out = []
+        for page in self.pages:
+            if wanted is not None and page["page"] not in wanted:
+                continue
+            out.append(f"=== Página {page['page']} ===\n{self.render_page(page, skip)}")
+        return "\n\n".join(out)
+
+    def pages_matching(self, pattern, context=1):
+        """Numbers of the pages whose text matches `pattern`, plus `context` pages on each side."""
+        regex = re.compile(pattern, re.IGNORECASE)
+        hits = set()
+        for page in self.pages:
+            body = page["text"] + "\n".join(" ".join(c or "" for c in row) for t in page["tables"] for row in t["rows"])
+            if regex.search(body):
+                hits.update(range(page["page"] - context, page["page"] + context + 1))
+        return sorted(hits & {p["page"] for p in self.pages})
+
+
+def _cache_dir(digest, cache_dir):
+    return os.path.join(cache_dir, digest)
+
+
+def _load_cached(digest, cache_dir):
+    meta_path = os.path.join(_cache_dir(digest, cache_dir), "meta.json")
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("version") != EXTRACTOR_VERSION:
+            return None
+        pages = []
+        for n in range(1, meta["page_count"] + 1):
+            with open(os.path.join(_cache_dir(digest, cache_dir), f"page_{n:04d}.json"), 'r', encoding='utf-8') as f:
+                pages.append(json.load(f))
+        return pages
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _save_cached(digest, cache_dir, pdf_path, pages):
+    out_dir = _cache_dir(digest, cache_dir)
+    for page in pages:
+        write_json_atomic(os.path.join(out_dir, f"page_{page['page']:04d}.json"), page, indent=None)
+    # meta.json last: its presence marks a complete entry
+    write_json_atomic(os.path.join(out_dir, "meta.json"), {
+        "version": EXTRACTOR_VERSION,
+        "source": os.path.basename(pdf_path),
+        "page_count": len(pages),
+    })
+
+
+def load_text_layer(pdf_path, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Returns the PdfText of `pdf_path`, extracting and caching it on first use.
+    Returns None when pdfplumber is unavailable; unparseable files get an empty PdfText.
+    """
+    digest = sha256_file(pdf_path)
+    pages = _load_cached(digest, cache_dir)
+    if pages is None:
+        if pdfplumber is None:
+            return None
+        try:
+            with pdfplumber.open(pdf_path) as pdf:
+                pages = [extract_page(page) for page in pdf.pages]
+        except Exception as e:
+            print(f"  [text layer] Could not parse {os.path.basename(pdf_path)}: {e}")
+            pages = []
+        _save_cached(digest, cache_dir, pdf_path, pages)
+    return PdfText(pdf_path, digest, pages)
+
+
+def usable_text_layer(pdf_path):
+    """The PdfText of `pdf_path` if it can stand in for the PDF, else None."""
+    if TEXT_LAYER_DISABLED:
+        return None
+    pdf_text = load_text_layer(pdf_path)
+    if pdf_text is None or not pdf_text.has_text_layer:
+        return None
+    return pdf_text
+
+
+def document_parts(pdf_path, page_pattern=None, context=1):
+    """
+    Prompt parts standing for a PDF: its rendered text layer when usable, else the PDF itself.
+    With `page_pattern`, only pages matching it (plus `context` neighbours) are sent; if no
+    page matches, the whole document is.
+    """
+    from constitutional_proposal_tracking.gemini.cache import PdfAttachment
+
+    pdf_text = usable_text_layer(pdf_path)
+    if pdf_text is None:
+        return [PdfAttachment(pdf_path)]
+    pages = pdf_text.pages_matching(page_pattern, context) if page_pattern else None
+    text = pdf_text.render(pages or None)
+    print(f"  [text layer] {os.path.basename(pdf_path)}: {len(pages) if pages else len(pdf_text.pages)}"
+          f"/{len(pdf_text.pages)} pages, {len(text)} chars (PDF {os.path.getsize(pdf_path)} bytes)")
+    return [DOCUMENT_PREAMBLE, text]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-extract and cache the text layer of PDFs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_extract = sub.add_parser("extract", help="Extract every PDF (default: comision-*/PDFs/*.pdf).")
+    p_extract.add_argument("pdfs", nargs="*")
+
+    p_show = sub.add_parser("show", help="Print the rendered text of one PDF.")
+    p_show.add_argument("pdf")
+    p_show.add_argument("--pattern", default=None, help="Only pages matching this regex (+1 page of context)")
+
+    args = parser.parse_args()
+    if pdfplumber is None:
+        print("pdfplumber is not installed (pip install pdfplumber).")
+        return 1
+
+    if args.command == "extract":
+        paths = args.pdfs or sorted(glob.glob(os.path.join(PROJECT_ROOT, "comision-*", "PDFs", "*.pdf")))
+        for path in paths:
+            pdf_text = load_text_layer(path)
+            status = "text" if pdf_text.has_text_layer else "NO TEXT LAYER (will be uploaded)"
+            tables = sum(len(p["tables"]) for p in pdf_text.pages)
+            print(f"{os.path.basename(path)}: {len(pdf_text.pages)} pages, {tables} tables, {status}")
+    elif args.command == "show":
+        pdf_text = load_text_layer(args.pdf)
+        pages = pdf_text.pages_matching(args.pattern) if args.pattern else None
+        print(pdf_text.render(pages or None))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import os
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+from constitutional_proposal_tracking.pdf.text_layer import DOCUMENT_PREAMBLE, PROJECT_ROOT, usable_text_layer
+from constitutional_proposal_tracking.utils.files import sha256_file
+
+# Overlapping page windows over a long PDF, so one document can be extracted with several
+# bounded calls instead of one long call that runs into output-token limits.
+#
+# Page counting and splitting are local: the text layer (pdf/text_layer.py) when the PDF has
+# one, otherwise pypdf writes each window as its own small PDF under .cache/pdf_windows/.
+
+# --- Configuration ---
+WINDOW_CACHE_DIR = os.path.join(PROJECT_ROOT, ".cache", "pdf_windows")
+
+
+def page_count(pdf_path):
+    """Number of pages, read locally. None when neither the text layer nor pypdf can read it."""
+    pdf_text = usable_text_layer(pdf_path)
+    if pdf_text is not None:
+        return len(pdf_text.pages)
+    if pypdf is not None:
+        try:
+            return len(pypdf.PdfReader(pdf_path).pages)
+        except Exception as e:
+            print(f"  [windows] Could not read {os.path.basename(pdf_path)}: {e}")
+    return None
+
+
+def plan_windows(pages, size, overlap):
+    """
+    1-based inclusive (first, last) page ranges of `size` pages, each sharing `overlap`
+    pages with the previous one. plan_windows(20, 8, 1) -> [(1, 8), (8, 15), (15, 20)].
+    """
+    if size <= overlap:
+        raise ValueError("window size must be larger than the overlap")
+    windows, first = [], 1
+    while True:
+        last = min(first + size - 1, pages)
+        windows.append((first, last))
+        if last >= pages:
+            return windows
+        first = last - overlap + 1
+
+
+def split_pdf(pdf_path, first, last, cache_dir=WINDOW_CACHE_DIR):
+    """Writes pages first..last of `pdf_path` to a cached PDF (keyed by source hash) and returns its path."""
+    out_path = os.path.join(cache_dir, f"{sha256_file(pdf_path)[:16]}_p{first:04d}-{last:04d}.pdf")
+    if not os.path.exists(out_path):
+        os.makedirs(cache_dir, exist_ok=True)
+        reader = pypdf.PdfReader(pdf_path)
+        writer = pypdf.PdfWriter()
+        for n in range(first - 1, last):
+            writer.add_page(reader.pages[n])
+        tmp_path = f"{out_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            writer.write(f)
+        os.replace(tmp_path, out_path)
+    return out_path
+
+
+def window_parts(pdf_path, first, last):
+    """Prompt parts for pages first..last: their text layer, else a PDF of just those pages."""
+    from constitutional_proposal_tracking.gemini.cache import PdfAttachment
+
+    pdf_text = usable_text_layer(pdf_path)
+    if pdf_text is not None:
+        return [DOCUMENT_PREAMBLE, pdf_text.render(range(first, last + 1))]
+    return [PdfAttachment(split_pdf(pdf_path, first, last))]
@@ -0,0 +1,148 @@
+import os
+import sys
+import json
+import argparse
+import threading
+
+import numpy as np
+
+# Author sets as bitsets over the convention members.
+#
+# convention_members.json is a closed list of ~155 names. AuthorRegistry gives each member a
+# fixed bit (its position in the list), so an author set is a plain int: union and
+# intersection are | and &, and sizes are int.bit_count(). Names outside the list (spelling
+# variants, "UNKNOWN_AUTHOR") get the next free bits in first-seen order and are kept
+# verbatim. For aggregates over many sets (every article of every step) matrix() packs the
+# masks into a uint64 array, and author counts and co-authorship counts are numpy reductions
+# over it. Names go back out in registry order (members in list order, then other names
+# sorted), so exported author lists no longer depend on set iteration order.
+
+# --- Configuration ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_MEMBERS_PATH = os.path.join(PROJECT_ROOT, "convention_members.json")
+WORD_BITS = 64
+
+
+class AuthorRegistry:
+    def __init__(self, members=()):
+        self.names = []     # bit -> name
+        self._bits = {}     # name -> bit
+        self._lock = threading.Lock()
+        for name in members:
+            self.bit(name)
+        self.n_members = len(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def bit(self, name):
+        """Bit of `name`, assigning the next free one to names not seen before."""
+        bit = self._bits.get(name)
+        if bit is None:
+            with self._lock:
+                bit = self._bits.get(name)
+                if bit is None:
+                    bit = len(self.names)
+                    self.names.append(name)
+                    self._bits[name] = bit
+        return bit
+
+    def mask(self, names):
+        """Bitset of an iterable of names."""
+        mask = 0
+        for name in names or ():
+            mask |= 1 << self.bit(name)
+        return mask
+
+    def to_names(self, mask):
+        """Names in a bitset: members in list order, then other names sorted."""
+        members, others = [], []
+        while mask:
+            low = mask & -mask
+            bit = low.bit_length() - 1
+            (members if bit < self.n_members else others).append(self.names[bit])
+            mask ^= low
+        return members + sorted(others)
+
+    # --- Vectorized aggregates ---
+
+    def matrix(self, masks):
+        """(len(masks), words) uint64 array, bit i of a mask in word i // 64."""
+        words = max(1, -(-len(self.names) // WORD_BITS))
+        data = b"".join(m.to_bytes(words * 8, 'little') for m in masks)
+        return np.frombuffer(data, dtype='<u8').reshape(len(masks), words)
+
+    def bits(self, masks):
+        """(len(masks), len(registry)) 0/1 uint8 array."""
+        packed = self.matrix(masks).view(np.uint8)
+        return np.unpackbits(packed, axis=1, bitorder='little')[:, :len(self.names)]
+
+    def union(self, masks):
+        words = np.bitwise_or.reduce(self.matrix(masks), axis=0) if masks else ()
+        return int.from_bytes(np.asarray(words, dtype='<u8').tobytes(), 'little')
+
+    def counts(self, masks):
+        """{name: number of sets containing it}, for names present at least once."""
+        totals = self.bits(masks).sum(axis=0, dtype=np.int64) if masks else ()
+        return {self.names[i]: int(n) for i, n in enumerate(totals) if n}
+
+    def coauthorship(self, masks):
+        """(len(registry), len(registry)) int array: sets containing both authors (diagonal: each one)."""
+        b = self.bits(masks).astype(np.int32)
+        return b.T @ b
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def load_registry(path=DEFAULT_MEMBERS_PATH):
+    """AuthorRegistry over the members in `path`, memoized per process (empty when the file is missing)."""
+    with _registries_lock:
+        registry = _registries.get(path)
+        if registry is None:
+            members = []
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    members = json.load(f)
+            else:
+                print(f"Warning: {path} not found; author bits follow first-seen order.")
+            registry = _registries[path] = AuthorRegistry(members)
+        return registry
+
+
+def main():
+    from constitutional_proposal_tracking.drafts.history_store import HistoryStore
+
+    parser = argparse.ArgumentParser(description="Author counts and co-authorship over the applier's draft snapshots.")
+    parser.add_argument("base_dir", nargs="?", default=".")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    registry = load_registry(os.path.join(args.base_dir, "convention_members.json"))
+    store = HistoryStore()
+    store.load_all(args.base_dir)
+    # Latest snapshot of each commission (drafts are inserted in step order)
+    latest = {com_n: records for (com_n, _), records in store.drafts.items()}
+    masks = [registry.mask(r.get("accumulated_authors")) for records in latest.values() for r in records]
+    if not masks:
+        print("No draft snapshots found.")
+        return 1
+
+    print(f"{len(masks)} articles in the latest snapshot of commissions {sorted(latest)}")
+    counts = sorted(registry.counts(masks).items(), key=lambda kv: -kv[1])
+    print("\nArticles per author:")
+    for name, n in counts[:args.top]:
+        print(f"  {n:5d}  {name}")
+
+    pairs = np.triu(registry.coauthorship(masks), k=1)
+    top = np.argsort(pairs, axis=None)[::-1][:args.top]
+    print("\nCo-authored articles:")
+    for i, j in zip(*np.unravel_index(top, pairs.shape)):
+        if pairs[i, j]:
+            print(f"  {pairs[i, j]:5d}  {registry.names[i]} + {registry.names[j]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,27 +14,36 @@ sys.path.append(project_root)
 
 # Try importing config
 try:
-    from constitutional_proposal_tracking.config.commission_profiles import PROMPTS, COMMISSION_MAP
+    from constitutional_proposal_tracking.config.commission_profiles import PROMPTS, COMMISSION_MAP, RECORD_SCHEMAS
+    from constitutional_proposal_tracking.extraction.records import RecordSchema
+    from constitutional_proposal_tracking.gemini.cache import generate_content, get_default_cache, stream_content
+    from constitutional_proposal_tracking.gemini.metrics import tagged
+    from constitutional_proposal_tracking.gemini.retry import RETRY_STATS, call_with_retry, parse_json
+    from constitutional_proposal_tracking.gemini.streaming import STREAMING_DISABLED, collect_json_array, json_array_complete
+    from constitutional_proposal_tracking.pdf.text_layer import document_parts
 except ImportError:
     # Fallback if structure is slightly different or running from different cwd
     # Try direct import if we are deeper
     sys.path.append(os.path.dirname(project_root))
-    from constitutional_proposal_tracking.constitutional_proposal_tracking.config.commission_profiles import PROMPTS, COMMISSION_MAP
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.config.commission_profiles import PROMPTS, COMMISSION_MAP, RECORD_SCHEMAS
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.extraction.records import RecordSchema
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.gemini.cache import generate_content, get_default_cache, stream_content
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.gemini.metrics import tagged
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.gemini.retry import RETRY_STATS, call_with_retry, parse_json
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.gemini.streaming import STREAMING_DISABLED, collect_json_array, json_array_complete
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.pdf.text_layer import document_parts
 
 # --- Configuration ---
 API_KEY = os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
 BASE_DIR = os.path.dirname(current_dir)
 
-def extract_genesis(pdf_path, commission_id):
+def extract_genesis(pdf_path, commission_id, sidecar_path=None):
     if not API_KEY:
         raise ValueError("API Key not found.")
         
     genai.configure(api_key=API_KEY)
     model = genai.GenerativeModel('gemini-3-flash-preview')
     
-    print(f"Uploading {os.path.basename(pdf_path)}...")
-    sample_file = genai.upload_file(path=pdf_path)
-    
     # 1. Get Profile
     profile = COMMISSION_MAP.get(commission_id, {})
     prompt_key = profile.get("genesis", "NARRATIVE_GENESIS") # Default
@@ -44,20 +53,31 @@ def extract_genesis(pdf_path, commission_id):
         return []
         
     prompt_text = PROMPTS.get(prompt_key)
+    record_schema = RecordSchema(RECORD_SCHEMAS[prompt_key], prompt_key)
+    config = record_schema.generation_config()
     
     print(f"Strategy: {prompt_key}")
     
-    # 2. Generate
-    response = model.generate_content([prompt_text, sample_file])
-    
-    # 3. Clean and Parse
-    try:
-        text = response.text.replace('```json', '').replace('```', '').strip()
-        data = json.loads(text)
-        return data
-    except Exception as e:
-        print(f"Error parsing Gemini response: {e}")
-        return []
+    # 2. Generate (cached; the local text layer replaces the PDF when it has one,
+    #    otherwise the PDF is only uploaded on a cache miss)
+    #    The response is constrained to an array of the profile's record schema and retried by
+    #    error class; records that fail local validation are re-asked one by one
+    contents = [prompt_text] + document_parts(pdf_path)
+    label = os.path.basename(pdf_path)
+    if not STREAMING_DISABLED:
+        # Articles are parsed (and appended to the JSONL sidecar) as they stream in
+        def attempt(parts):
+            data, parser = collect_json_array(stream_content(model, parts, config, complete=json_array_complete), sidecar_path)
+            # A truncated array is retried; its objects stay in the sidecar if every retry fails
+            parser.raise_if_incomplete()
+            if parser.errors:
+                print(f"  Warning: skipped {parser.errors} malformed articles (kept {parser.objects})")
+            return data
+        data = call_with_retry(attempt, contents, label=label)
+    else:
+        # 3. Clean and Parse
+        data = call_with_retry(lambda parts: parse_json(generate_content(model, parts, config).text), contents, label=label)
+    return record_schema.enforce(data, model, prompt_text, label)
 
 def post_process_data(data, commission_id):
     """
@@ -109,18 +129,29 @@ def main():
         if os.path.exists(out_path):
             print("  Skipping (Already Exists)")
             continue
+
+        # Streamed articles land here first; kept only if the call fails
+        sidecar_path = out_path.replace(".json", ".partial.jsonl")
+        if os.path.exists(sidecar_path):
+            os.remove(sidecar_path)    # stale partial results of an earlier run
             
         try:
-            raw_data = extract_genesis(pdf_path, com_id)
+            with tagged(commission=com_id):
+                raw_data = extract_genesis(pdf_path, com_id, sidecar_path)
             final_data = post_process_data(raw_data, com_id)
             
             with open(out_path, 'w', encoding='utf-8') as f:
                 json.dump(final_data, f, ensure_ascii=False, indent=2)
                 
             print(f"  Saved {len(final_data)} articles to {out_name}")
+            if os.path.exists(sidecar_path):
+                os.remove(sidecar_path)
             
         except Exception as e:
             print(f"  FAILED: {e}")
 
+    print(get_default_cache().summary())
+    print(RETRY_STATS.summary())
+
 if __name__ == "__main__":
     main()
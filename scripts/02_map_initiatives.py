@@ -1,12 +1,16 @@
 
 import os
-import glob
+import sys
 import json
-import re
 import time
 import google.generativeai as genai
 from typing import Dict, List, Any
 
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from constitutional_proposal_tracking.gemini.files import upload_once
+from constitutional_proposal_tracking.initiatives.loader import load_corpus
+
 # --- Configuration ---
 # API Key should be set in environment variable
 # Improved logic: Check GEMINI_API_KEY first, then GOOGLE_API_KEY (used in other project scripts)
@@ -26,33 +30,6 @@ def load_json(path):
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def load_initiatives(directory: str) -> Dict[str, Any]:
-    """
-    Loads all initiative JSON files and creates a map of InitiativeID -> Data.
-    Extracts ID from the key in the JSON (e.g., "98-6-..." -> "98-6").
-    """
-    initiatives_map = {}
-    pattern = os.path.join(directory, "api_extracted_*.json")
-    files = glob.glob(pattern)
-    
-    print(f"Found {len(files)} initiative files in {directory}")
-    
-    for file_path in files:
-        data = load_json(file_path)
-        for key, value in data.items():
-            # Extract ID from the filename-like key
-            # Example: "98-6-Iniciativa..." -> "98-6"
-            # It seems the format is NUMBER-NUMBER-Title...
-            match = re.match(r"^(\d+-\d+)", key)
-            if match:
-                init_id = match.group(1)
-                initiatives_map[init_id] = value
-                # Also store under the full key just in case
-                initiatives_map[key] = value
-    
-    print(f"Loaded {len(initiatives_map)} initiatives.")
-    return initiatives_map
-
 def get_gemini_mapping(pdf_path: str, members_list: List[str]) -> List[Dict[str, Any]]:
     """
     Uses Gemini to parse the PDF and extract Article -> Initiative ID mapping.
@@ -64,9 +41,8 @@ def get_gemini_mapping(pdf_path: str, members_list: List[str]) -> List[Dict[str,
     
     # Upload the file
     print(f"Uploading {pdf_path} to Gemini...")
-    sample_file = genai.upload_file(path=pdf_path, display_name="Texto Sistematizado")
+    sample_file = upload_once(pdf_path, display_name="Texto Sistematizado")
     
-    # Wait for file to differ processing state (usually immediate for small docs but good practice)
     print(f"Uploaded file '{sample_file.display_name}' as: {sample_file.uri}")
     
     # Model configuration
@@ -127,8 +103,9 @@ def main():
         print("Warning: convention_members.json not found.")
         members = []
 
-    # 2. Load Initiatives
-    initiatives_data = load_initiatives(INITIATIVES_DIR)
+    # 2. Load Initiatives (ID -> record, cached index shared with the other stages)
+    initiatives_data = load_corpus(INITIATIVES_DIR)
+    print(f"Loaded {len(initiatives_data)} initiatives.")
     
     # 3. Extract Mapping from PDF
     print("Extracting mapping from PDF via Gemini...")
@@ -158,10 +135,10 @@ def main():
             
             # Try to find the initiative data
             if init_id in initiatives_data:
-                init_info = initiatives_data[init_id]
+                init_info = initiatives_data.get(init_id)
                 source_data["found_in_database"] = True
-                source_data["title"] = init_info.get("propuesta_norma", "")[:50] + "..." # Snippet
-                source_data["authors_matched"] = init_info.get("firmantes_matched", [])
+                source_data["title"] = initiatives_data.text(init_info)[:50] + "..." # Snippet
+                source_data["authors_matched"] = list(init_info.authors)
             else:
                 # Try simple fuzzy match or variation? 
                 # Sometimes IDs might differ slightly (e.g. leading zeros)
@@ -1,9 +1,19 @@
 
 import os
+import sys
 import json
-import time
+from collections import deque
+
 import google.generativeai as genai
 
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from constitutional_proposal_tracking.extraction.records import RecordSchema
+from constitutional_proposal_tracking.gemini.cache import get_default_cache
+from constitutional_proposal_tracking.gemini.metrics import tagged
+from constitutional_proposal_tracking.gemini.retry import RETRY_STATS, generate_json
+from constitutional_proposal_tracking.pdf.text_layer import document_parts
+
 # --- Configuration ---
 API_KEY = os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
 if not API_KEY:
@@ -23,26 +33,29 @@ PDF_FILES = [
 
 OUTPUT_FILE = os.path.join(COM4_DIR, "genesis-extracted", "C4_ICC_POOL.json")
 
+# A PDF whose extraction fails goes back to the end of the queue, up to this many tries
+MAX_PASSES = 2
+
+# One approved ICC block (sent as response_schema, validated locally)
+ICC_SCHEMA = RecordSchema({
+    "type": "object",
+    "properties": {
+        "icc_id": {"type": "string", "description": "ICC number, e.g. '11' or '89-4'."},
+        "text": {"type": "string"},
+        "voting_result": {"type": "string"},
+    },
+    "required": ["icc_id", "text", "voting_result"],
+}, "icc")
+
 def extract_approved_iccs(pdf_filename):
     pdf_path = os.path.join(PDF_DIR, pdf_filename)
     if not os.path.exists(pdf_path):
         print(f"Error: File not found {pdf_path}")
         return []
 
-    print(f"Uploading {pdf_filename} to Gemini...")
-    try:
-        # Upload file using the File API
-        myfile = genai.upload_file(pdf_path)
-        print(f"Uploaded: {myfile.name}")
-    except Exception as e:
-        print(f"Error uploading file: {e}")
-        return []
-
-    # Wait for processing if necessary (images/videos usually need it, PDFs might be quick)
-    while myfile.state.name == "PROCESSING":
-        print("Processing file...")
-        time.sleep(2)
-        myfile = genai.get_file(myfile.name)
+    # Only pages mentioning an ICC (plus neighbours, where the vote may continue) are sent
+    # when the PDF has a text layer; otherwise the whole PDF is uploaded.
+    document = document_parts(pdf_path, page_pattern=r"ICC\s*N")
 
     # Use the requested model
     model_name = "gemini-3-pro-preview" 
@@ -77,40 +90,47 @@ def extract_approved_iccs(pdf_filename):
     """
 
     print(f"Generating content with {model_name}...")
-    try:
-        response = model.generate_content([myfile, prompt])
-        print("Response received.")
-        
-        # Clean markdown
-        text = response.text
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0]
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0]
-        
-        data = json.loads(text.strip())
-        return data
-
-    except Exception as e:
-        print(f"Error generating/parsing: {e}")
-        return []
+    # Schema-constrained and retried by error class; raises once retries are exhausted so a
+    # failed report does not end up as an empty part of the pool
+    data = generate_json(model, document + [prompt], generation_config=ICC_SCHEMA.generation_config(), label=pdf_filename)
+    print("Response received.")
+    return ICC_SCHEMA.enforce(data, model, prompt, pdf_filename)
 
 def main():
-    all_iccs = []
-    
-    for pdf in PDF_FILES:
+    results_by_pdf = {}
+    failed = []
+    queue = deque((pdf, 1) for pdf in PDF_FILES)
+
+    while queue:
+        pdf, passes = queue.popleft()
         print(f"\nProcessing {pdf}...")
-        results = extract_approved_iccs(pdf)
+        try:
+            with tagged(commission=4):
+                results = extract_approved_iccs(pdf)
+        except Exception as e:
+            if passes < MAX_PASSES:
+                print(f"  FAILED: {e} (requeued)")
+                queue.append((pdf, passes + 1))
+            else:
+                print(f"  FAILED: {e} (giving up after {passes} tries)")
+                failed.append(pdf)
+            continue
         print(f"Found {len(results)} approved items in {pdf}")
-        all_iccs.extend(results)
+        results_by_pdf[pdf] = results
 
-    # Save consolidated
+    # Save consolidated, in PDF_FILES order; failed reports are left out, not written as empty
+    all_iccs = [icc for pdf in PDF_FILES for icc in results_by_pdf.get(pdf, [])]
     os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
     with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
         json.dump(all_iccs, f, ensure_ascii=False, indent=2)
     
     print(f"\nTotal Approved ICC blocks extracted: {len(all_iccs)}")
     print(f"Saved to {OUTPUT_FILE}")
+    if failed:
+        print(f"Missing from the pool (extraction failed): {', '.join(failed)}")
+    print(get_default_cache().summary())
+    print(RETRY_STATS.summary())
+    return 1 if failed else 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,13 +1,18 @@
 
 import os
+import sys
 import json
-import glob
 import re
 import difflib
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Any, List
+
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from constitutional_proposal_tracking.initiatives.loader import load_corpus
+from constitutional_proposal_tracking.matching.minhash import load_or_build
 
 # --- Configuration ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -20,29 +25,6 @@ def load_json(path):
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def load_initiatives(directory: str) -> Dict[str, str]:
-    """
-    Loads initiative texts. Returns map: InitiativeID -> Text content (propuesta_norma)
-    """
-    initiatives_text = {}
-    pattern = os.path.join(directory, "api_extracted_*.json")
-    files = glob.glob(pattern)
-    
-    print(f"Loading initiative texts from {len(files)} files...")
-    
-    for file_path in files:
-        data = load_json(file_path)
-        for key, value in data.items():
-            # Extract ID usually found at start "98-6-..."
-            match = re.match(r"^(\d+-\d+)", key)
-            if match:
-                init_id = match.group(1)
-                text = value.get("propuesta_norma", "")
-                if text:
-                    initiatives_text[init_id] = text
-    
-    return initiatives_text
-
 def normalize_article_key(key: str) -> str:
     """
     Tries to convert "Artículo 1" or "1" to a standard string "1".
@@ -67,7 +49,8 @@ def main():
     # 1. Load Data
     final_articles = load_json(FINAL_TEXT_PATH) # List of {"article_id": "...", "text": "..."}
     mapping_data = load_json(MAPPING_PATH) # List of {"article": "Artículo X", "sources": [{"initiative_id": "..."}]}
-    initiatives_map = load_initiatives(INITIATIVES_DIR)
+    initiatives = load_corpus(INITIATIVES_DIR) # InitiativeID -> record, text via initiatives.text(id)
+    lsh_index = load_or_build(INITIATIVES_DIR)
     
     # 2. Build Comparison Table
     comparison_data = []
@@ -99,8 +82,9 @@ def main():
             source_texts = []
             
             for sid in source_ids:
-                if sid in initiatives_map:
-                    source_texts.append(initiatives_map[sid])
+                text = initiatives.text(sid)
+                if text:
+                    source_texts.append(text)
             
             # Combine all source texts to find best match overlap
             full_source_text = "\n".join(source_texts)
@@ -124,12 +108,18 @@ def main():
         else:
             source_summary = "No Mapping Found"
 
+        # Closest initiative by article-level MinHash, independent of the mapping
+        lsh_results = lsh_index.query(final_text, top_k=1)
+        lsh_top = lsh_results[0] if lsh_results else None
+
         comparison_data.append({
             "Article ID": art_id,
             "Final Length": len(final_text),
             "Similarity": best_similarity,
             "Source Initiatives": source_summary,
-            "Status": "Mapped" if mapping_entry else "Unmapped"
+            "Status": "Mapped" if mapping_entry else "Unmapped",
+            "LSH Top Initiative": lsh_top["initiative_id"] if lsh_top else "None",
+            "LSH Jaccard": lsh_top["jaccard"] if lsh_top else 0.0
         })
         
     # 3. Visualization
@@ -151,7 +141,7 @@ def main():
         color='Similarity',
         color_continuous_scale='Redor', # Red (Low) to Orange to... or 'RdYlGn'
         title='Index of Mutation: Initiative Text vs. Final Draft Text',
-        hover_data=['Source Initiatives', 'Final Length'],
+        hover_data=['Source Initiatives', 'Final Length', 'LSH Top Initiative', 'LSH Jaccard'],
         labels={'Similarity': 'Similarity Score (0-1)'}
     )
     
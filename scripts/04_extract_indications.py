@@ -1,11 +1,16 @@
 
 import os
+import sys
 import json
 import glob
 import time
 import google.generativeai as genai
 from typing import List, Dict, Any
 
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from constitutional_proposal_tracking.gemini.files import upload_once
+
 # --- Configuration ---
 API_KEY = os.environ.get("GEMINI_API_KEY") 
 if not API_KEY:
@@ -29,8 +34,7 @@ def extract_indications_gemini(pdf_path: str, members_list: List[str]) -> List[D
     # Model - Flash is efficient for this bulk task
     model = genai.GenerativeModel('gemini-3-flash-preview')
     
-    print(f"Uploading {os.path.basename(pdf_path)}...")
-    sample_file = genai.upload_file(path=pdf_path)
+    sample_file = upload_once(pdf_path)
     
     members_str = ", ".join(members_list)
     
@@ -57,12 +61,6 @@ def extract_indications_gemini(pdf_path: str, members_list: List[str]) -> List[D
     
     print(f"Generating content for {os.path.basename(pdf_path)}...")
     response = model.generate_content([prompt, sample_file])
-    
-    # Clean up file from Google Cloud to be polite (and avoid limits eventually)
-    try:
-        genai.delete_file(name=sample_file.name)
-    except:
-        pass
 
     try:
         text = response.text.replace('```json', '').replace('```', '').strip()
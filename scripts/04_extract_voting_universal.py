@@ -2,10 +2,9 @@
 import os
 import sys
 import json
-import re
 import glob
-import time
 import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # --- Setup Imports ---
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -14,15 +13,32 @@ sys.path.append(project_root)
 
 # Try importing config
 try:
-    from constitutional_proposal_tracking.config.commission_profiles import PROMPTS, COMMISSION_MAP
+    from constitutional_proposal_tracking.config.commission_profiles import PROMPTS, COMMISSION_MAP, LAYOUTS, RECORD_SCHEMAS
+    from constitutional_proposal_tracking.extraction.records import RecordSchema
+    from constitutional_proposal_tracking.extraction.tabular_voting import parse_report
+    from constitutional_proposal_tracking.gemini.cache import generate_content, get_default_cache, stream_content
+    from constitutional_proposal_tracking.gemini.metrics import tagged
+    from constitutional_proposal_tracking.gemini.retry import RETRY_STATS, ParseError, call_with_retry, parse_json
+    from constitutional_proposal_tracking.gemini.streaming import STREAMING_DISABLED, collect_json_array, json_array_complete
+    from constitutional_proposal_tracking.pdf.text_layer import DOCUMENT_PREAMBLE, document_parts, usable_text_layer
+    from constitutional_proposal_tracking.utils.files import write_json_atomic
 except ImportError:
     sys.path.append(os.path.dirname(project_root))
-    from constitutional_proposal_tracking.constitutional_proposal_tracking.config.commission_profiles import PROMPTS, COMMISSION_MAP
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.config.commission_profiles import PROMPTS, COMMISSION_MAP, LAYOUTS, RECORD_SCHEMAS
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.extraction.records import RecordSchema
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.extraction.tabular_voting import parse_report
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.gemini.cache import generate_content, get_default_cache, stream_content
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.gemini.metrics import tagged
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.gemini.retry import RETRY_STATS, ParseError, call_with_retry, parse_json
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.gemini.streaming import STREAMING_DISABLED, collect_json_array, json_array_complete
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.pdf.text_layer import DOCUMENT_PREAMBLE, document_parts, usable_text_layer
+    from constitutional_proposal_tracking.constitutional_proposal_tracking.utils.files import write_json_atomic
 
 # --- Configuration ---
 API_KEY = os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
 BASE_DIR = os.path.dirname(current_dir)
 MEMBERS_PATH = os.path.join(BASE_DIR, "convention_members.json")
+MAX_WORKERS = int(os.environ.get("VOTING_WORKERS", "8"))
 
 def load_members():
     if os.path.exists(MEMBERS_PATH):
@@ -30,13 +46,46 @@ def load_members():
             return json.load(f)
     return []
 
-def extract_voting(pdf_path, commission_id, members_list):
+def parse_response(text):
+    """The JSON array of the response; raises ParseError (retried with a repair prompt) otherwise."""
+    data = parse_json(text)
+    if not isinstance(data, list):
+        raise ParseError("expected a JSON array", text)
+    return data
+
+def call_model(full_prompt, document, record_schema, sidecar_path=None, label="call"):
+    """
+    Approved-indication records for `document`. The response is constrained to an array of
+    `record_schema` records; records that still fail local validation are re-asked one by one.
+    """
     if not API_KEY:
         raise ValueError("API Key not found.")
-        
+
     genai.configure(api_key=API_KEY)
     model = genai.GenerativeModel('gemini-3-flash-preview')
-    
+
+    # Cached; the local text layer replaces the PDF when it has one,
+    # otherwise the PDF is only uploaded on a cache miss
+    config = record_schema.generation_config()
+    if STREAMING_DISABLED:
+        records = call_with_retry(lambda parts: parse_response(generate_content(model, parts, config).text),
+                                  [full_prompt] + document, label=label)
+        return record_schema.enforce(records, model, full_prompt, label)
+
+    # Objects are parsed (and appended to the JSONL sidecar) as they stream in
+    def attempt(parts):
+        records, parser = collect_json_array(stream_content(model, parts, config, complete=json_array_complete), sidecar_path)
+        # A truncated array is retried; its objects stay in the sidecar if every retry fails
+        parser.raise_if_incomplete()
+        if parser.errors:
+            print(f"  Warning: skipped {parser.errors} malformed objects (kept {parser.objects})")
+        return records
+    records = call_with_retry(attempt, [full_prompt] + document, label=label)
+    return record_schema.enforce(records, model, full_prompt, label)
+
+def extract_voting(pdf_path, commission_id, members_list, sidecar_path=None):
+    name = os.path.basename(pdf_path)
+
     # 1. Check Profile
     profile = COMMISSION_MAP.get(commission_id, {})
     voting_strategy = profile.get("voting", "NARRATIVE_VOTING")
@@ -45,41 +94,56 @@ def extract_voting(pdf_path, commission_id, members_list):
         print(f"  [SKIP] Complex voting strategy required (e.g. Com 2). Use specialized script.")
         return None
         
-    print(f"  Strategy: {voting_strategy}")
+    print(f"  [{name}] Strategy: {voting_strategy}")
     prompt_template = PROMPTS.get(voting_strategy)
     
     # Inject Members list into prompt context for better matching
     members_str = ", ".join(members_list)
     full_prompt = f"{prompt_template}\n\nOfficial Member List for Matching:\n{members_str}"
-    
-    print(f"  Uploading {os.path.basename(pdf_path)}...")
-    sample_file = genai.upload_file(path=pdf_path)
-    
-    # 2. Generate
-    response = model.generate_content([full_prompt, sample_file])
-    
-    # Cleanup
-    try:
-        genai.delete_file(sample_file.name)
-    except:
-        pass
-        
-    # 3. Parse
+    record_schema = RecordSchema(RECORD_SCHEMAS[voting_strategy], voting_strategy)
+
+    # 2. Fixed layouts are parsed from the text layer; only the blocks the parser
+    #    cannot read confidently go to the model
+    pdf_text = usable_text_layer(pdf_path) if voting_strategy in LAYOUTS else None
+    if pdf_text is not None:
+        records, unresolved = parse_report(pdf_text, LAYOUTS[voting_strategy], members_list)
+        print(f"  [{name}] Local parser: {len(records)} approved indications, {len(unresolved)} blocks for the model")
+        if unresolved:
+            blocks = "\n\n".join(block.render() for block in unresolved)
+            records += call_model(full_prompt, [DOCUMENT_PREAMBLE, blocks], record_schema, sidecar_path, label=name)
+        return records
+
+    # 3. Generate
+    return call_model(full_prompt, document_parts(pdf_path), record_schema, sidecar_path, label=name)
+
+def process_file(pdf_path, com_id, members):
+    """
+    Extracts one voting report and writes its JSON atomically.
+    Returns a short status line for the progress log.
+    """
+    name = os.path.basename(pdf_path)
+    out_dir = os.path.join(BASE_DIR, f"comision-{com_id}", "indicaciones-universal-extracted")
+    out_path = os.path.join(out_dir, name.replace(".pdf", ".json"))
+    # Streamed objects land here first; kept only if the call fails
+    sidecar_path = os.path.join(out_dir, name.replace(".pdf", ".partial.jsonl"))
+    if os.path.exists(sidecar_path):
+        os.remove(sidecar_path)    # stale partial results of an earlier run
+
     try:
-        text = response.text
-        # Look for the first '[' and last ']' to extract the JSON array
-        match = re.search(r'\[.*\]', text, re.DOTALL)
-        if match:
-            json_str = match.group(0)
-            data = json.loads(json_str)
-            return data
-        else:
-            # Fallback to previous method if no brackets found
-            clean_text = text.replace('```json', '').replace('```', '').strip()
-            return json.loads(clean_text)
+        with tagged(commission=com_id):
+            results = extract_voting(pdf_path, com_id, members, sidecar_path)
     except Exception as e:
-        print(f"  Error parsing Gemini response: {e}")
-        return []
+        if os.path.exists(sidecar_path):
+            return f"[{name}] FAILED: {e} (partial results in {os.path.basename(sidecar_path)})"
+        return f"[{name}] FAILED: {e}"
+
+    if results is None:
+        return f"[{name}] Skipped (complex strategy)"
+
+    write_json_atomic(out_path, results)
+    if os.path.exists(sidecar_path):
+        os.remove(sidecar_path)
+    return f"[{name}] Saved {len(results)} approved indications."
 
 def main():
     print("--- Universal Voting Extraction ---")
@@ -98,33 +162,28 @@ def main():
         
     print(f"Found {len(found_files)} voting files to process.")
     
+    # Skip-if-exists is decided up front so only pending files reach the pool
+    pending = []
     for pdf_path, com_id in found_files:
-        print(f"\nProcessing {os.path.basename(pdf_path)} (Com {com_id})...")
-        
         out_dir = os.path.join(BASE_DIR, f"comision-{com_id}", "indicaciones-universal-extracted")
-        if not os.path.exists(out_dir): os.makedirs(out_dir)
-        
-        out_name = os.path.basename(pdf_path).replace(".pdf", ".json")
-        out_path = os.path.join(out_dir, out_name)
-        
+        out_path = os.path.join(out_dir, os.path.basename(pdf_path).replace(".pdf", ".json"))
         if os.path.exists(out_path):
-            print("  Skipping (Already Exists)")
+            print(f"  Skipping {os.path.basename(pdf_path)} (Already Exists)")
             continue
-            
-        try:
-            results = extract_voting(pdf_path, com_id, members)
-            
-            if results is None:
-                continue # Skipped complex
-                
-            with open(out_path, 'w', encoding='utf-8') as f:
-                json.dump(results, f, ensure_ascii=False, indent=2)
-            
-            print(f"  Saved {len(results)} approved indications.")
-            time.sleep(1) # Rate limit hygiene
-            
-        except Exception as e:
-            print(f"  FAILED: {e}")
+        pending.append((pdf_path, com_id))
+
+    print(f"Extracting {len(pending)} files with {MAX_WORKERS} workers...")
+
+    # Rate limiting is handled per model inside generate_content (token bucket)
+    done = 0
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = [pool.submit(process_file, pdf_path, com_id, members) for pdf_path, com_id in pending]
+        for future in as_completed(futures):
+            done += 1
+            print(f"  ({done}/{len(pending)}) {future.result()}")
+
+    print(get_default_cache().summary())
+    print(RETRY_STATS.summary())
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,16 @@
 import os
+import sys
 import json
 import glob
 import time
 import re
 import google.generativeai as genai
 
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from constitutional_proposal_tracking.gemini.cache import generate_content, get_default_cache
+from constitutional_proposal_tracking.pdf.text_layer import document_parts
+
 # --- Configuration ---
 API_KEY = os.environ.get("GEMINI_API_KEY") 
 if not API_KEY:
@@ -22,14 +28,6 @@ def load_json(path):
     return []
 
 def extract_from_pdf_chunk(model, pdf_path, members_str):
-    print(f"  Uploading {os.path.basename(pdf_path)}...")
-    sample_file = genai.upload_file(path=pdf_path)
-    
-    # Wait for processing
-    while sample_file.state.name == "PROCESSING":
-        time.sleep(2)
-        sample_file = genai.get_file(sample_file.name)
-        
     prompt = f"""
     ACT AS: Legal Data Specialist.
     DOC: "Informe de Reemplazo" (Replacement Report).
@@ -70,7 +68,8 @@ def extract_from_pdf_chunk(model, pdf_path, members_str):
     """
     
     try:
-        response = model.generate_content([prompt, sample_file])
+        # Text layer when the PDF has one; otherwise the PDF is uploaded (only on a cache miss)
+        response = generate_content(model, [prompt] + document_parts(pdf_path))
         text = response.text
         
         # Clean JSON
@@ -86,12 +85,6 @@ def extract_from_pdf_chunk(model, pdf_path, members_str):
     except Exception as e:
         print(f"    Error parsing {os.path.basename(pdf_path)}: {e}")
         return []
-    finally:
-        # Cleanup
-        try:
-             genai.delete_file(sample_file.name)
-        except:
-             pass
 
 def main():
     print("--- Extracting FULL Report 1 Structure (Columns 1, 2, 3) ---")
@@ -128,6 +121,7 @@ def main():
         json.dump(full_report_structure, f, ensure_ascii=False, indent=2)
         
     print(f"\nSaved full report structure ({len(full_report_structure)} blocks) to {OUTPUT_PATH}")
+    print(get_default_cache().summary())
 
 if __name__ == "__main__":
     main()
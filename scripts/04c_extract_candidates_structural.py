@@ -1,9 +1,19 @@
 
 import os
+import sys
 import json
-import time
 import google.generativeai as genai
-import re
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from constitutional_proposal_tracking.drafts.numbering import normalize_article_number
+from constitutional_proposal_tracking.extraction.records import RecordSchema
+from constitutional_proposal_tracking.gemini.cache import get_default_cache
+from constitutional_proposal_tracking.gemini.metrics import tagged, with_current_tags
+from constitutional_proposal_tracking.gemini.retry import RETRY_STATS, generate_json
+from constitutional_proposal_tracking.pdf.text_layer import document_parts
+from constitutional_proposal_tracking.pdf.windows import page_count, plan_windows, window_parts
 
 # --- Configuration ---
 API_KEY = os.environ.get("GEMINI_API_KEY") 
@@ -16,28 +26,54 @@ OUTPUT_DIR = os.path.join(BASE_DIR, "comision-2", "indicaciones-api-extracted")
 OUTPUT_PATH = os.path.join(OUTPUT_DIR, "candidates_com2.json")
 MEMBERS_PATH = os.path.join(BASE_DIR, "convention_members.json")
 
+# Page windows: each call sees WINDOW_PAGES pages, consecutive windows share WINDOW_OVERLAP
+# pages so a block cut at a boundary is seen whole at least once.
+WINDOW_PAGES = int(os.environ.get("WINDOW_PAGES", "8"))
+WINDOW_OVERLAP = int(os.environ.get("WINDOW_OVERLAP", "1"))
+WINDOW_WORKERS = int(os.environ.get("WINDOW_WORKERS", "4"))
+CONTINUED = "CONTINUED"
+
+# One Parent Article block of the hierarchical output (sent as response_schema, validated locally)
+BLOCK_SCHEMA = RecordSchema({
+    "type": "object",
+    "properties": {
+        "parent_article_ref": {"type": "string", "description": f"e.g. 'Artículo 14', or '{CONTINUED}'."},
+        "parent_context_snippet": {"type": "string", "nullable": True},
+        "indications": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "number": {"type": "string"},
+                    "text": {"type": "string"},
+                    "authors": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["number", "text", "authors"],
+            },
+        },
+    },
+    "required": ["parent_article_ref", "indications"],
+}, "candidate_block")
+
 def load_json(path):
     if os.path.exists(path):
         with open(path, 'r', encoding='utf-8') as f:
             return json.load(f)
     return []
 
-def get_pdf_page_count(model, sample_file):
-    """Asks the model for the page count to plan the batching."""
-    prompt = "How many pages are in this PDF document? Return ONLY the integer number."
-    try:
-        response = model.generate_content([prompt, sample_file])
-        text = response.text.strip()
-        # Find first number
-        match = re.search(r'\d+', text)
-        if match:
-            return int(match.group(0))
-    except Exception as e:
-        print(f"Error getting page count: {e}")
-    return 50 # Default fallback
-
-def extract_candidates_full(model, sample_file, members_str):
-    print(f"  > Processing full document with hierarchical structural analysis...")
+def extract_candidates_full(model, document, members_str, window=None):
+    if window:
+        print(f"  > Pages {window[0]}-{window[1]}: hierarchical structural analysis...")
+        window_note = f"""
+    PAGE RANGE: These are ONLY pages {window[0]} to {window[1]} of a longer document.
+    - If the first indications on these pages belong to a Parent Article whose Column 1 cell
+      started on an earlier page (no "Artículo N" header visible above them), put them in a
+      block with "parent_article_ref": "{CONTINUED}".
+    - Extract indications cut at the last page as far as they are visible.
+    """
+    else:
+        print(f"  > Processing full document with hierarchical structural analysis...")
+        window_note = ""
     
     prompt = f"""
     ACT AS: Senior Legislative Data Architect.
@@ -74,20 +110,69 @@ def extract_candidates_full(model, sample_file, members_str):
     {members_str}
     
     Return ONLY JSON. Ensure you capture the correct Parent scope for every indication.
-    """
+    {window_note}"""
     
-    try:
-        response = model.generate_content([prompt, sample_file])
-        text = response.text
-        match = re.search(r'\[.*\]', text, re.DOTALL)
-        if match:
-            return json.loads(match.group(0))
-        else:
-            return json.loads(text.replace('```json', '').replace('```', '').strip())
-            
-    except Exception as e:
-        print(f"  Error in hierarchical extraction: {e}")
-        return []
+    # Retried by error class; raises once retries are exhausted so a failed window is never
+    # stitched in as an empty one. Blocks that fail validation are re-asked one by one.
+    label = f"pages {window[0]}-{window[1]}" if window else "document"
+    blocks = generate_json(model, [prompt] + document, generation_config=BLOCK_SCHEMA.generation_config(), label=label)
+    return BLOCK_SCHEMA.enforce(blocks, model, prompt, label)
+
+def parent_key(ref):
+    return normalize_article_number(ref) or str(ref or "").strip().lower()
+
+def stitch_windows(window_results):
+    """
+    Joins the per-window hierarchical blocks in page order.
+    CONTINUED (or unlabelled) blocks at a window start belong to the previous window's last
+    parent; consecutive blocks of the same parent are merged; indications seen twice in the
+    overlap are kept once, with the longer text.
+    """
+    stitched = []
+    for blocks in window_results:
+        for i, block in enumerate(blocks):
+            ref = str(block.get("parent_article_ref") or "").strip()
+            continued = ref.upper() == CONTINUED or (i == 0 and not ref)
+            if stitched and (continued or parent_key(ref) == parent_key(stitched[-1]["parent_article_ref"])):
+                stitched[-1]["indications"].extend(block.get("indications", []))
+                continue
+            if continued:
+                ref = "Unknown"
+            stitched.append(dict(block, parent_article_ref=ref, indications=list(block.get("indications", []))))
+
+    seen = {}
+    for block in stitched:
+        kept = []
+        for ind in block["indications"]:
+            number = str(ind.get("number") or "").strip()
+            if not number:
+                kept.append(ind)
+                continue
+            previous = seen.get(number)
+            if previous is None:
+                seen[number] = ind
+                kept.append(ind)
+            elif len(ind.get("text") or "") > len(previous.get("text") or ""):
+                previous.update(ind)
+        block["indications"] = kept
+    return [block for block in stitched if block["indications"]]
+
+def extract_candidates_windowed(model, pdf_path, members_str):
+    """Extracts overlapping page windows in parallel; falls back to one call if the PDF cannot be read locally."""
+    pages = page_count(pdf_path)
+    if pages is None or pages <= WINDOW_PAGES:
+        return extract_candidates_full(model, document_parts(pdf_path), members_str)
+
+    windows = plan_windows(pages, WINDOW_PAGES, WINDOW_OVERLAP)
+    print(f"  {pages} pages -> {len(windows)} windows of {WINDOW_PAGES} (overlap {WINDOW_OVERLAP}), {WINDOW_WORKERS} workers")
+
+    def run(window):
+        return extract_candidates_full(model, window_parts(pdf_path, *window), members_str, window)
+
+    # Rate limiting is handled per model inside generate_content (token bucket)
+    with ThreadPoolExecutor(max_workers=WINDOW_WORKERS) as pool:
+        results = list(pool.map(with_current_tags(run), windows))
+    return stitch_windows(results)
 
 def main():
     print("--- Phase 2: Structural Candidate Extraction (Commission 2) ---")
@@ -100,20 +185,16 @@ def main():
     # Using Pro for reasoning capabilities and long context
     model = genai.GenerativeModel('gemini-3-pro-preview') 
     
-    print(f"Uploading {os.path.basename(PDF_PATH)}...")
-    sample_file = genai.upload_file(path=PDF_PATH)
-    
-    while sample_file.state.name == "PROCESSING":
-        print(".", end="", flush=True)
-        time.sleep(1)
-        sample_file = genai.get_file(sample_file.name)
-        
-    print(f"\\nDocument ready.")
-    
     members = load_json(MEMBERS_PATH)
     members_str = ", ".join(members)
     
-    all_hierarchical_data = extract_candidates_full(model, sample_file, members_str)
+    try:
+        with tagged(commission=2):
+            all_hierarchical_data = extract_candidates_windowed(model, PDF_PATH, members_str)
+    except Exception as e:
+        print(f"  Error in hierarchical extraction: {e}")
+        print(RETRY_STATS.summary())
+        return
     
     # Flatten for downstream compatibility
     flattened_candidates = []
@@ -133,9 +214,8 @@ def main():
         json.dump(flattened_candidates, f, ensure_ascii=False, indent=2)
         
     print(f"Saved {len(flattened_candidates)} total candidates to {OUTPUT_PATH}")
-    
-    # Cleanup
-    genai.delete_file(sample_file.name)
+    print(get_default_cache().summary())
+    print(RETRY_STATS.summary())
 
 if __name__ == "__main__":
     main()
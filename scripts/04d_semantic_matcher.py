@@ -1,10 +1,17 @@
 
 import os
+import sys
 import json
 import re
 import time
 import google.generativeai as genai
-from difflib import SequenceMatcher
+
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from constitutional_proposal_tracking.gemini.cache import get_default_cache
+from constitutional_proposal_tracking.gemini.retry import RETRY_STATS, generate_json
+from constitutional_proposal_tracking.matching.similarity import first_above
+from constitutional_proposal_tracking.utils.authors import load_registry
 
 # --- Configuration ---
 API_KEY = os.environ.get("GEMINI_API_KEY") 
@@ -13,6 +20,7 @@ if not API_KEY:
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 INPUT_DIR = os.path.join(BASE_DIR, "comision-2", "indicaciones-api-extracted")
+MEMBERS_PATH = os.path.join(BASE_DIR, "convention_members.json")
 GOALS_PATH = os.path.join(INPUT_DIR, "goals_com2.json")
 CANDIDATES_PATH = os.path.join(INPUT_DIR, "candidates_com2.json")
 OUTPUT_PATH = os.path.join(INPUT_DIR, "indications_com2_final_matched.json")
@@ -38,44 +46,41 @@ def load_genesis_data(path):
     """Loads genesis data as a list of dicts."""
     return load_json(path)
 
-def find_genesis_match(final_art, genesis_list):
+def group_genesis_by_num(genesis_list):
+    """Groups genesis articles by normalized article number (numbers repeat across chapters)."""
+    by_num = {}
+    for gen in genesis_list:
+        by_num.setdefault(normalize_article_num(gen.get("article")), []).append(gen)
+    return by_num
+
+def find_genesis_match(final_art, genesis_list, genesis_by_num=None):
     """
     Finds the corresponding article in Genesis based on Title (primary) and Reference/Text (secondary).
     This handles cases where Article numbers repeat across chapters.
+    `genesis_by_num` (from group_genesis_by_num) can be built once and reused across calls.
     """
     final_title = final_art.get("title", "").lower().strip()
     final_ref = normalize_article_num(final_art.get("article_ref"))
     final_text_start = final_art.get("text", "")[:50].lower()
 
-    # 1. Try Title Match + Number Match (Strongest)
+    if genesis_by_num is None:
+        genesis_by_num = group_genesis_by_num(genesis_list)
+    # Genesis JSON has no structured title field ("article": "Artículo 1", "text": "..."),
+    # so only articles sharing the number are compared.
+    same_num = genesis_by_num.get(final_ref, [])
+
+    # 1. Try Title Match + Number Match (Strongest): same number AND text starts similarly
     if final_title:
-        for gen in genesis_list:
-            gen_title = gen.get("article", "").lower() # Genesis puts title in unrelated fields sometimes, but 'article' usually holds Ref. 
-            # Note: Genesis JSON structure provided earlier showed "article": "Artículo 1" and no separate title field in some entries, 
-            # but let's check text content for title-like matches if needed. 
-            # Actually, looking at Genesis file: "article": "Artículo 1", "text": "..."
-            # It doesn't have a structured title field. It's implicit in the text or metadata.
-            
-            gen_ref = normalize_article_num(gen.get("article"))
-            
-            # Simple heuristic: If same number AND text starts similarly
-            gen_text_start = gen.get("text", "")[:50].lower()
-            
-            if gen_ref == final_ref:
-                # Calculate text similarity ratio for the start
-                ratio = SequenceMatcher(None, gen_text_start, final_text_start).ratio()
-                if ratio > 0.6: # Good match
-                    return gen
+        starts = [gen.get("text", "")[:50].lower() for gen in same_num]
+        idx = first_above(final_text_start, starts, 0.6) # Good match
+        if idx >= 0:
+            return same_num[idx]
     
     # 2. Try just Text Similarity for same number (Fallback)
-    for gen in genesis_list:
-        gen_ref = normalize_article_num(gen.get("article"))
-        if gen_ref == final_ref:
-             gen_text = gen.get("text", "")
-             # If high overlap
-             ratio = SequenceMatcher(None, gen_text, final_art.get("text", "")).ratio()
-             if ratio > 0.5:
-                 return gen
+    texts = [gen.get("text", "") for gen in same_num]
+    idx = first_above(final_art.get("text", ""), texts, 0.5) # High overlap
+    if idx >= 0:
+        return same_num[idx]
                  
     return None
 
@@ -119,13 +124,7 @@ def semantic_judge(model, genesis_text, final_art, candidates):
     """
     
     try:
-        response = model.generate_content(prompt)
-        text = response.text
-        match = re.search(r'\{.*\}', text, re.DOTALL)
-        if match:
-             return json.loads(match.group(0))
-        else:
-             return json.loads(text.replace('```json', '').replace('```', '').strip())
+        return generate_json(model, prompt, label=f"judge {final_art.get('article_ref')}")
     except Exception as e:
         print(f"  Judge Error: {e}")
         return {"match_found": False, "error": str(e)}
@@ -157,6 +156,8 @@ def main():
         if n not in candidates_by_num: candidates_by_num[n] = []
         candidates_by_num[n].append(c)
         
+    genesis_by_num = group_genesis_by_num(genesis_articles)
+    registry = load_registry(MEMBERS_PATH)
     final_matches = []
     
     print(f"Processing {len(final_articles)} final articles...")
@@ -168,7 +169,7 @@ def main():
         print(f"\nAnalyzing: {art_ref} - {final_art.get('title')}")
         
         # 1. Find Genesis Ancestor
-        genesis_match = find_genesis_match(final_art, genesis_articles)
+        genesis_match = find_genesis_match(final_art, genesis_articles, genesis_by_num)
         genesis_text = genesis_match.get("text") if genesis_match else None
         
         if genesis_text:
@@ -194,18 +195,18 @@ def main():
                 print(f"  -> MATCH: {sel_ids} ({decision.get('change_type')})")
                 
                 # Fetch Authors
-                authors = set()
+                authors = 0
                 for sid in sel_ids:
                     for c in candidates:
                          if str(c.get("number")) == str(sid):
-                             authors.update(c.get("authors_matched", []))
+                             authors |= registry.mask(c.get("authors_matched", []))
                 
                 final_matches.append({
                     "final_article": f"{art_ref} - {final_art.get('title')}",
                     "final_text": final_art.get("text"),
                     "genesis_source": genesis_match.get("article") if genesis_match else "NEW",
                     "matched_indications": sel_ids,
-                    "authors": list(authors),
+                    "authors": registry.to_names(authors),
                     "reasoning": decision.get("reasoning")
                 })
             else:
@@ -219,6 +220,8 @@ def main():
     with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
         json.dump(final_matches, f, ensure_ascii=False, indent=2)
     print(f"\nSaved {len(final_matches)} matches to {OUTPUT_PATH}")
+    print(get_default_cache().summary())
+    print(RETRY_STATS.summary())
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,18 @@
 import json
 import os
+import sys
 import re
 import glob
 
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from constitutional_proposal_tracking.initiatives.loader import load_corpus
+from constitutional_proposal_tracking.utils.authors import load_registry
+
 # --- CONFIGURATION ---
 BASE_DIR = "/Users/anibaloliveramorales/Desktop/Doctorado/-Projects-/B - Convención Constitucional - Data/constitutional_proposal_tracking"
 SUBMITTED_INITIATIVES_DIR = os.path.join(BASE_DIR, "submitted_initiatives")
+MEMBERS_PATH = os.path.join(BASE_DIR, "convention_members.json")
 
 # Exclude Comision 2 as requested
 TARGET_COMISSIONS = [1, 3, 4, 5, 6, 7] 
@@ -32,43 +39,11 @@ def load_authors_map():
     """
     Loads all authors from submitted_initiatives JSONs into a map.
     Returns: { "514": ["Tammy Pustilnick", ...], ... }
+    Keys are the initiative number (the first number before the first hyphen of the filename);
+    initiatives sharing a number are merged.
     """
-    authors_map = {}
-    
-    # Find all api_extracted files
-    pattern = os.path.join(SUBMITTED_INITIATIVES_DIR, "api_extracted_*_corrected_4.json")
-    files = glob.glob(pattern)
-    
-    print(f"Loading authors from {len(files)} files...")
-    
-    for file_path in files:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            try:
-                data = json.load(f)
-                # Data structure is: { "filename.pdf": { "propuesta_norma": ..., "firmantes_matched": [...] }, ... }
-                
-                for key, val in data.items():
-                    # Extract ID from key or content? 
-                    # The keys in these files are filenames like "99-3-c-Iniciativa...pdf".
-                    # The ID usually is the first number BEFORE the first hyphen.
-                    match = re.match(r'^(\d+)-', key)
-                    if match:
-                        raw_id = match.group(1)
-                        norm_id = normalize_icc_id(raw_id)
-                        
-                        firmantes = val.get('firmantes_matched', [])
-                        if firmantes:
-                            # If ID exists, we extend/merge just in case, though usually IDs are unique per file
-                            if norm_id in authors_map:
-                                # Merge and dedup
-                                existing = set(authors_map[norm_id])
-                                new_ones = set(firmantes)
-                                authors_map[norm_id] = list(existing.union(new_ones))
-                            else:
-                                authors_map[norm_id] = firmantes
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
-                
+    corpus = load_corpus(SUBMITTED_INITIATIVES_DIR)
+    authors_map = corpus.authors_by_number()
     print(f"Loaded author map with {len(authors_map)} unique initiative IDs.")
     return authors_map
 
@@ -103,12 +78,13 @@ def process_commission(com_n, authors_map):
         articles = json.load(f)
         
     updated_count = 0
+    registry = load_registry(MEMBERS_PATH)
     
     for article in articles:
         # Get source IDs
         sources = article.get('sources', [])
         # Iterate and find authors
-        article_authors = set()
+        article_authors = 0
         
         # sources might be a string "514" or list ["514"]
         if isinstance(sources, str):
@@ -117,7 +93,7 @@ def process_commission(com_n, authors_map):
         for src in sources:
             norm_src = normalize_icc_id(src)
             if norm_src in authors_map:
-                article_authors.update(authors_map[norm_src])
+                article_authors |= registry.mask(authors_map[norm_src])
             else:
                 # Debug: only print if source is not empty
                 if src:
@@ -125,7 +101,7 @@ def process_commission(com_n, authors_map):
                     pass
         
         # Add to article
-        article['authors'] = list(article_authors)
+        article['authors'] = registry.to_names(article_authors)
         if article_authors:
             updated_count += 1
             
@@ -1,22 +1,71 @@
 
 import os
+import sys
 import json
 import glob
 import re
 import time
+import contextlib
+import traceback
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig
 from datetime import datetime
 
+# --- Setup Imports ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+from constitutional_proposal_tracking.gemini.cache import generate_content, get_default_cache
+from constitutional_proposal_tracking.gemini.metrics import tagged, with_current_tags
+from constitutional_proposal_tracking.gemini.rate_limit import burst_capacity, install_rate_limiters, share_rate_limiters
+from constitutional_proposal_tracking.gemini.retry import RETRY_STATS, SchemaError, call_with_retry, parse_json
+from constitutional_proposal_tracking.drafts.local_applier import resolve_locally
+from constitutional_proposal_tracking.drafts.context import rekey_new_articles, select_context
+from constitutional_proposal_tracking.drafts.master_draft import MasterDraft
+from constitutional_proposal_tracking.drafts.shards import combine_updates, find_conflicts, shard_indications
+from constitutional_proposal_tracking.drafts.checkpoints import CheckpointStore, chain_hash
+from constitutional_proposal_tracking.utils.authors import load_registry
+from constitutional_proposal_tracking.utils.files import write_json_atomic, sha256_file
+
 # --- CONFIGURATION ---
 BASE_DIR = "/Users/anibaloliveramorales/Desktop/Doctorado/-Projects-/B - Convención Constitucional - Data/constitutional_proposal_tracking"
 MODEL_NAME = "gemini-3-pro-preview" 
+MEMBERS_PATH = os.path.join(BASE_DIR, "convention_members.json")
 
 # Target Commissions: Start with 7 as requested for testing, then expand.
 TARGET_COMISSIONS = [7] 
 # TARGET_COMISSIONS = [1, 3, 4, 5, 6, 7]
 
-MAX_RETRIES = 5
+# Commissions share no state: with more than one target each chain runs in its own worker
+# process (up to APPLY_WORKERS), logging to comision-N/draft-after-indications/apply_indications.log.
+# Workers draw from one shared per-model rate limit. Chains mostly wait on the API, so the
+# default is the CPU count or the model's rate-limit burst, whichever is larger.
+# APPLY_WORKERS=1 runs them one after another in this process.
+APPLY_WORKERS = int(os.environ.get("APPLY_WORKERS") or "0") or max(os.cpu_count() or 1, burst_capacity(MODEL_NAME))
+LOG_NAME = "apply_indications.log"
+
+# Model calls are retried by error class (gemini/retry.py); RETRY_MAX sets the transient retry budget.
+
+# Checkpoints go to draft-after-indications/draft_checkpoints.jsonl (delta-encoded).
+# Set WRITE_LEGACY_SNAPSHOTS=1 to also write the full draft_after_*.json file per step.
+WRITE_LEGACY_SNAPSHOTS = os.environ.get("WRITE_LEGACY_SNAPSHOTS", "") not in ("", "0")
+
+# Runs resume from the first checkpoint whose inputs (genesis, indication files, model) changed.
+# FORCE_RESTART=1 rebuilds the chain from genesis. Bump CHECKPOINT_VERSION when the merge or
+# local rule logic changes in a way that should invalidate stored checkpoints.
+FORCE_RESTART = os.environ.get("FORCE_RESTART", "") not in ("", "0")
+CHECKPOINT_VERSION = 2
+
+# Author sets are bitsets over convention_members.json (utils/authors.py), kept by the
+# MasterDraft while merging and written back as names in member-list order before each save.
+
+# Articles sent to the model on each side of every targeted article (CONTEXT_WINDOW=-1 sends the full draft).
+CONTEXT_WINDOW = int(os.environ.get("CONTEXT_WINDOW", "1"))
+
+# Unresolved indications of a report are split into up to APPLY_SHARDS groups that touch
+# disjoint articles and sent concurrently (APPLY_SHARDS=1 sends the whole report in one call).
+APPLY_SHARDS = int(os.environ.get("APPLY_SHARDS", "4"))
 
 def setup_gemini():
     api_key = os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
@@ -83,11 +132,12 @@ def build_schema():
 
 def initialize_genesis_with_history(genesis_path):
     """
-    Loads genesis JSON and transforms it into the Robust History Structure.
+    Loads genesis JSON and transforms it into the Robust History Structure (a MasterDraft).
     """
     with open(genesis_path, 'r', encoding='utf-8') as f:
         raw_data = json.load(f)
         
+    registry = load_registry(MEMBERS_PATH)
     structured_draft = []
     
     for idx, item in enumerate(raw_data):
@@ -106,7 +156,7 @@ def initialize_genesis_with_history(genesis_path):
             "current_number": item.get('article', str(idx+1)),
             "status": "active",
             "final_content": content,
-            "accumulated_authors": list(set(gen_authors)), # Start with genesis authors
+            "accumulated_authors": registry.to_names(registry.mask(gen_authors)), # Start with genesis authors
             
             # The History Log
             "history": [
@@ -122,7 +172,7 @@ def initialize_genesis_with_history(genesis_path):
         }
         structured_draft.append(article_obj)
         
-    return structured_draft
+    return MasterDraft(structured_draft, registry)
 
 def create_sparse_draft(full_draft):
     """
@@ -144,28 +194,272 @@ def create_sparse_draft(full_draft):
         })
     return sparse
 
-def process_commission(com_n, model):
+def build_checkpoint_manifest(genesis_path, indic_files):
+    """
+    Expected [(step_name, input_hash), ...] for the whole chain: the genesis file first,
+    then one entry per indication file. Hashes are chained, so editing any input
+    invalidates its step and every later one.
+    """
+    h = chain_hash(None, CHECKPOINT_VERSION, sha256_file(genesis_path))
+    expected = [("draft_00_genesis_master.json", h)]
+    for indic_path in indic_files:
+        h = chain_hash(h, MODEL_NAME, sha256_file(indic_path))
+        expected.append((f"draft_after_{os.path.basename(indic_path)}", h))
+    return expected
+
+def build_prompt(sparse_context, indications_data, partial=False):
+    if partial:
+        draft_title = "BORRADOR ACTUAL (Extracto: artículos objetivo y sus vecinos; el resto del borrador no cambia)"
+    else:
+        draft_title = "BORRADOR ACTUAL (Lista simplificada para contexto)"
+    return f"""
+ROL: Secretario Técnico Convención Constitucional.
+TAREA: Aplica las INDICACIONES al BORRADOR y genera la lista de actualizaciones.
+
+INPUT:
+1. {draft_title}:
+{json.dumps(sparse_context, ensure_ascii=False, indent=2)}
+
+2. INDICACIONES APROBADAS:
+{json.dumps(indications_data, ensure_ascii=False, indent=2)}
+
+INSTRUCCIONES CRÍTICAS:
+1. Analiza CADA indicación y encuentra su artículo objetivo en el Borrador (por número o contenido).
+2. Genera un objeto 'ArticleUpdate' SOLO para los artículos que sufren cambios (contenido, estado o numeración).
+3. Si un artículo NO cambia, NO lo incluyas en la respuesta (para ahorrar output).
+4. Si la indicación SUPRIME un artículo: retorna status="deleted", content="" y mantén su 'original_id'.
+5. Si la indicación AGREGA un artículo NUEVO que no existía: inventa un 'original_id' único (ej: "NEW-1"), pon status="active".
+6. 'applied_indication_ids': Lista estricta de los números de indicación usados.
+
+SALIDA ESPERADA: JSON Array de actualizaciones únicamente.
+"""
+
+def call_model_for_updates(model, master_draft, indications_data, label="updates"):
+    """
+    Sends the indications the local engine could not resolve, with only the articles
+    they target (plus neighbours) as context. Does not modify master_draft.
+    Returns the list of ArticleUpdate dicts, or None if every retry failed. Ids outside the
+    context are new articles and never overwrite an existing one (rekey_new_articles).
+    """
+    # Prepare Prompt Context (Sparse, windowed around the targeted articles)
+    if CONTEXT_WINDOW < 0:
+        context_articles = list(master_draft)
+    else:
+        context_articles = select_context(master_draft, indications_data, window=CONTEXT_WINDOW)
+    partial = len(context_articles) < len(master_draft)
+    sparse_context = create_sparse_draft(context_articles)
+    prompt = build_prompt(sparse_context, indications_data, partial=partial)
+    print(f"   -> [{label}] Contexto: {len(context_articles)}/{len(master_draft)} artículos, "
+          f"{len(prompt)} chars (~{len(prompt) // 4} tokens)")
+
+    # Call Gemini: retried by error class (rate limits back off, unparsable or malformed
+    # answers are re-asked with a repair prompt); None signals failure after all retries
+    def attempt(parts):
+        t0 = time.monotonic()
+        response = generate_content(
+            model,
+            parts,
+            generation_config=GenerationConfig(
+                response_mime_type="application/json",
+                response_schema=build_schema()
+            )
+        )
+        updates = parse_json(response.text)
+        validate_updates(updates)
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            print(f"   -> [{label}] Tokens: {usage.prompt_token_count} in / {usage.candidates_token_count} out, "
+                  f"{time.monotonic() - t0:.1f}s")
+        else:
+            print(f"   -> [{label}] Respuesta en caché ({time.monotonic() - t0:.2f}s)")
+        return updates
+
+    try:
+        updates = call_with_retry(attempt, [prompt], label=label)
+    except Exception as e:
+        print(f"   [{label}] Error: {str(e)[:200]}")
+        return None
+    context_ids = {a['original_id'] for a in context_articles}
+    return rekey_new_articles(updates, context_ids, set(master_draft.ids()))
+
+def apply_model_updates(model, master_draft, unresolved, indic_author_map, step_label, fname):
+    """
+    Sends the unresolved indications to the model in shards that touch disjoint articles,
+    concurrently, and merges their updates. Indications that cannot be located form one more
+    shard with the whole draft as context. Shards that fail or that update the same article
+    as another shard are re-sent together, in report order, on top of the merged draft (whose
+    ids, new articles of the merged shards included, the re-sent call's new ids avoid).
+    Returns False when some indications could not be applied.
+    """
+    shards, unlocated = shard_indications(master_draft, unresolved, window=CONTEXT_WINDOW, max_shards=APPLY_SHARDS)
+    if unlocated and shards:
+        shards.append(unlocated)
+    pending = unresolved
+    if len(shards) > 1:
+        print(f"   -> {len(shards)} grupos independientes ({' + '.join(str(len(s)) for s in shards)} indicaciones"
+              f"{'; el último sin ubicar, con el borrador completo' if unlocated else ''})")
+        call = with_current_tags(lambda k: call_model_for_updates(model, master_draft, shards[k], label=f"updates {k + 1}/{len(shards)}"))
+        with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+            shard_updates = list(pool.map(call, range(len(shards))))
+
+        existing_ids = master_draft.ids()
+        failed = {k for k, updates in enumerate(shard_updates) if updates is None}
+        conflicts = find_conflicts(shard_updates, existing_ids)
+        if conflicts:
+            print(f"   -> Conflicto: los grupos {sorted(k + 1 for k in conflicts)} modifican los mismos artículos; se re-envían juntos.")
+        if failed:
+            print(f"   -> Fallaron los grupos {sorted(k + 1 for k in failed)}; se re-envían juntos.")
+
+        merged = combine_updates([None if k in failed | conflicts else u for k, u in enumerate(shard_updates)], existing_ids)
+        if merged:
+            print(f"   -> Recibidos {len(merged)} cambios desde AI.")
+            merge_updates(master_draft, merged, indic_author_map, step_label, fname, engine="model")
+
+        redo = {id(ind) for k in failed | conflicts for ind in shards[k]}
+        pending = [ind for ind in unresolved if id(ind) in redo]
+        if not pending:
+            return True
+
+    updates_received = call_model_for_updates(model, master_draft, pending)
+    if updates_received is None: # None indicates failure after all retries
+        return False
+    print(f"   -> Recibidos {len(updates_received)} cambios desde AI.")
+    merge_updates(master_draft, updates_received, indic_author_map, step_label, fname, engine="model")
+    return True
+
+def validate_updates(updates):
+    """merge_updates needs a list of objects with an original_id."""
+    if not isinstance(updates, list):
+        raise SchemaError("expected a JSON array of ArticleUpdate objects")
+    for u in updates:
+        if not isinstance(u, dict) or not u.get('original_id'):
+            raise SchemaError("every ArticleUpdate needs an 'original_id'")
+
+def merge_updates(master_draft, updates_received, indic_author_map, step_label, fname, engine="model"):
+    """
+    MERGE / UPDATE MASTER DRAFT (The Python Logic).
+    `engine` records whether the update came from the local rule engine or from the model.
+    """
+    registry = master_draft.registry
+
+    # Index updates by ID for fast lookup
+    update_map = {u['original_id']: u for u in updates_received}
+    
+    # A. Update Existing Articles (O(1) lookup by original_id; articles without an update keep their state)
+    for gid in list(update_map):
+        article = master_draft.get(gid)
+        if article is not None:
+            upd = update_map[gid]
+            
+            # Check for Authors
+            img_ids = upd.get('applied_indication_ids', [])
+            new_authors = 0
+            for iid in img_ids:
+                new_authors |= indic_author_map.get(iid, 0)
+            
+            # Update Root Fields (through the draft, so number and status indexes follow)
+            master_draft.update(gid, status=upd['status'], current_number=upd['current_number'],
+                                final_content=upd['content'])
+            
+            # Update Accumulators (bitsets; names are written back before the checkpoint)
+            master_draft.add_authors(gid, new_authors)
+            
+            # Append History Log
+            log_entry = {
+                "step": step_label,
+                "filename": fname,
+                "action": "UPDATE" if article['status'] == 'active' else "DELETE",
+                "content_snapshot": upd['content'],
+                "applied_indications": img_ids,
+                "authors_involved": registry.to_names(new_authors),
+                "engine": engine,
+                "timestamp": datetime.now().isoformat()
+            }
+            article['history'].append(log_entry)
+            
+            # Mark as processed in map to detect New Articles later
+            del update_map[gid]
+
+    # Articles with no update keep their previous state; no "No Change" history entry.
+            
+    # B. Handle New Articles (Additions)
+    # Any items left in update_map are NEW insertions created by AI (IDs like "NEW-X")
+    for new_id, upd in update_map.items():
+        # Authors logic
+        img_ids = upd.get('applied_indication_ids', [])
+        new_authors = 0
+        for iid in img_ids:
+            new_authors |= indic_author_map.get(iid, 0)
+        
+        # Create New Object
+        new_obj = {
+            "original_id": new_id, # Keep the ID assigned by AI or generate one
+            "current_number": upd['current_number'],
+            "status": upd['status'],
+            "final_content": upd['content'],
+            "accumulated_authors": [],
+            "history": [
+                {
+                    "step": step_label,
+                    "filename": fname,
+                    "action": "CREATE_NEW",
+                    "content_snapshot": upd['content'],
+                    "applied_indications": img_ids,
+                    "authors_involved": registry.to_names(new_authors),
+                    "engine": engine,
+                    "timestamp": datetime.now().isoformat()
+                }
+            ]
+        }
+        master_draft.append(new_obj)
+        master_draft.add_authors(new_id, new_authors)
+        print(f"   -> Insertado NUEVO artículo: {new_id} ({upd['current_number']})")
+
+def process_commission(com_n, model, progress=None):
+    """
+    Applies every indication report of commission `com_n` in order. `progress(done, total, fname)`
+    is called after each checkpoint. Returns a short status for the run summary.
+    """
     print(f"\n=== COMISIÓN {com_n} (Estrategia Historial Incrustado) ===")
+    progress = progress or (lambda done, total, fname: None)
     
     genesis_path, indic_files = get_files_ordered(com_n)
     if not genesis_path:
         print(f"[C{com_n}] No enriched genesis file found.")
-        return
+        return "sin génesis"
 
     # OUTPUT DIRECTORY
     out_dir = os.path.join(BASE_DIR, f"comision-{com_n}", "draft-after-indications")
     os.makedirs(out_dir, exist_ok=True)
     
-    # 1. INITIALIZE MASTER DRAFT
-    print(f"[C{com_n}] Inicializando Master Draft desde Génesis...")
-    master_draft = initialize_genesis_with_history(genesis_path)
+    registry = load_registry(MEMBERS_PATH)
+
+    # 1. INITIALIZE MASTER DRAFT (or RESUME from the last valid checkpoint)
+    store = CheckpointStore(out_dir)
+    expected = build_checkpoint_manifest(genesis_path, indic_files)
+    n_valid = 0 if FORCE_RESTART else store.valid_prefix(expected)
     
-    # Save Step 0
-    with open(os.path.join(out_dir, "draft_00_genesis_master.json"), 'w', encoding='utf-8') as f:
-        json.dump(master_draft, f, ensure_ascii=False, indent=2)
+    if n_valid:
+        resume_step = expected[n_valid - 1][0]
+        store.truncate_after(resume_step)
+        master_draft = MasterDraft(store.materialize(resume_step), registry)
+        print(f"[C{com_n}] Reanudando desde {resume_step} ({n_valid - 1}/{len(indic_files)} informes ya aplicados).")
+    else:
+        print(f"[C{com_n}] Inicializando Master Draft desde Génesis...")
+        master_draft = initialize_genesis_with_history(genesis_path)
+        
+        # Save Step 0 (base of the delta-encoded checkpoint chain)
+        store.write_base("draft_00_genesis_master.json", master_draft.articles, input_hash=expected[0][1])
+        if WRITE_LEGACY_SNAPSHOTS:
+            store.export_legacy("draft_00_genesis_master.json", os.path.join(out_dir, "draft_00_genesis_master.json"))
+    progress(max(0, n_valid - 1), len(indic_files), None)
 
     # 2. ITERATE INDICATIONS
     for step_idx, indic_path in enumerate(indic_files):
+        # Steps covered by valid checkpoints are already in master_draft
+        if step_idx + 1 < n_valid:
+            continue
+        
         fname = os.path.basename(indic_path)
         time_slice = extract_time_slice(fname)
         step_label = f"Informe-{time_slice}"
@@ -176,152 +470,125 @@ def process_commission(com_n, model):
         with open(indic_path, 'r', encoding='utf-8') as f:
             indications_data = json.load(f)
             
-        # Map Indication Authors per ID
+        # Map Indication Authors per ID (as author bitsets)
         indic_author_map = {}
         for ind in indications_data:
             num = str(ind.get('number', ''))
             auths = ind.get('authors_matched', [])
-            indic_author_map[num] = auths
+            indic_author_map[num] = registry.mask(auths)
             
-        # Prepare Prompt Context (Sparse)
-        sparse_context = create_sparse_draft(master_draft)
-        
-        prompt = f"""
-ROL: Secretario Técnico Convención Constitucional.
-TAREA: Aplica las INDICACIONES al BORRADOR y genera la lista de actualizaciones.
+        # 3a. LOCAL RULE ENGINE: apply what the structured fields fully determine
+        local_updates, unresolved = resolve_locally(master_draft, indications_data)
+        print(f"   -> Motor local: {len(indications_data) - len(unresolved)}/{len(indications_data)} indicaciones aplicadas ({len(local_updates)} artículos).")
+        merge_updates(master_draft, local_updates, indic_author_map, step_label, fname, engine="local")
 
-INPUT:
-1. BORRADOR ACTUAL (Lista simplificada para contexto):
-{json.dumps(sparse_context, ensure_ascii=False, indent=2)}
+        # 3b. MODEL: only the unresolved residue goes to Gemini
+        if unresolved:
+            if not apply_model_updates(model, master_draft, unresolved, indic_author_map, step_label, fname):
+                 print(f"FATAL: Fallo en {fname}. Abortando cadena de esta comisión.")
+                 return f"abortada en {fname}"
 
-2. INDICACIONES APROBADAS:
-{json.dumps(indications_data, ensure_ascii=False, indent=2)}
+        # 4. SAVE CHECKPOINT (only the articles changed in this step)
+        master_draft.sync_authors()
+        out_name = f"draft_after_{fname}"
+        n_changed = store.append_step(out_name, master_draft.articles, input_hash=expected[step_idx + 1][1])
+        if WRITE_LEGACY_SNAPSHOTS:
+            write_json_atomic(os.path.join(out_dir, out_name), master_draft.articles)
+            
+        print(f"   -> Checkpoint guardado: {out_name} ({n_changed} artículos modificados)")
+        progress(step_idx + 1, len(indic_files), fname)
 
-INSTRUCCIONES CRÍTICAS:
-1. Analiza CADA indicación y encuentra su artículo objetivo en el Borrador (por número o contenido).
-2. Genera un objeto 'ArticleUpdate' SOLO para los artículos que sufren cambios (contenido, estado o numeración).
-3. Si un artículo NO cambia, NO lo incluyas en la respuesta (para ahorrar output).
-4. Si la indicación SUPRIME un artículo: retorna status="deleted", content="" y mantén su 'original_id'.
-5. Si la indicación AGREGA un artículo NUEVO que no existía: inventa un 'original_id' único (ej: "NEW-1"), pon status="active".
-6. 'applied_indication_ids': Lista estricta de los números de indicación usados.
+    return "ok"
 
-SALIDA ESPERADA: JSON Array de actualizaciones únicamente.
-"""
-        
-        # Call Gemini
-        updates_received = []
-        for attempt in range(MAX_RETRIES):
-            try:
-                response = model.generate_content(
-                    prompt,
-                    generation_config=GenerationConfig(
-                        response_mime_type="application/json",
-                        response_schema=build_schema()
-                    )
-                )
-                updates_received = json.loads(response.text)
-                break
-            except Exception as e:
-                wait_time = 2 ** attempt
-                print(f"   [Intento {attempt+1}] Error: {str(e)[:100]}... Esperando {wait_time}s")
-                time.sleep(wait_time)
-        
-        if updates_received is None: # None indicates failure after all retries
-             print(f"FATAL: Fallo en {fname}. Abortando cadena de esta comisión.")
-             break
+# --- Commission-parallel driver ---
+_progress_queue = None
 
-        # 3. MERGE / UPDATE MASTER DRAFT (The Python Logic)
-        print(f"   -> Recibidos {len(updates_received)} cambios desde AI.")
-        
-        # Index updates by ID for fast lookup
-        update_map = {u['original_id']: u for u in updates_received}
-        
-        # A. Update Existing Articles
-        for article in master_draft:
-            gid = article['original_id']
-            if gid in update_map:
-                upd = update_map[gid]
-                
-                # Check for Authors
-                img_ids = upd.get('applied_indication_ids', [])
-                new_authors = set()
-                for iid in img_ids:
-                    if iid in indic_author_map:
-                        new_authors.update(indic_author_map[iid])
-                
-                # Update Root Fields
-                article['status'] = upd['status']
-                article['current_number'] = upd['current_number']
-                article['final_content'] = upd['content']
-                
-                # Update Accumulators
-                current_acc = set(article.get('accumulated_authors', []))
-                current_acc.update(new_authors)
-                article['accumulated_authors'] = list(current_acc)
-                
-                # Append History Log
-                log_entry = {
-                    "step": step_label,
-                    "filename": fname,
-                    "action": "UPDATE" if article['status'] == 'active' else "DELETE",
-                    "content_snapshot": upd['content'],
-                    "applied_indications": img_ids,
-                    "authors_involved": list(new_authors),
-                    "timestamp": datetime.now().isoformat()
-                }
-                article['history'].append(log_entry)
-                
-                # Mark as processed in map to detect New Articles later
-                del update_map[gid]
-                
-            else:
-                # No change reported by AI -> Implicitly "Keep Previous State"
-                # We do NOT add a history entry for "No Change" to keep log clean.
-                pass
-                
-        # B. Handle New Articles (Additions)
-        # Any items left in update_map are NEW insertions created by AI (IDs like "NEW-X")
-        for new_id, upd in update_map.items():
-            # Authors logic
-            img_ids = upd.get('applied_indication_ids', [])
-            new_authors = set()
-            for iid in img_ids:
-                if iid in indic_author_map:
-                    new_authors.update(indic_author_map[iid])
-            
-            # Create New Object
-            new_obj = {
-                "original_id": new_id, # Keep the ID assigned by AI or generate one
-                "current_number": upd['current_number'],
-                "status": upd['status'],
-                "final_content": upd['content'],
-                "accumulated_authors": list(new_authors),
-                "history": [
-                    {
-                        "step": step_label,
-                        "filename": fname,
-                        "action": "CREATE_NEW",
-                        "content_snapshot": upd['content'],
-                        "applied_indications": img_ids,
-                        "authors_involved": list(new_authors),
-                        "timestamp": datetime.now().isoformat()
-                    }
-                ]
-            }
-            master_draft.append(new_obj)
-            print(f"   -> Insertado NUEVO artículo: {new_id} ({upd['current_number']})")
 
-        # 4. SAVE CHECKPOINT
-        out_name = f"draft_after_{fname}"
-        with open(os.path.join(out_dir, out_name), 'w', encoding='utf-8') as f:
-            json.dump(master_draft, f, ensure_ascii=False, indent=2)
-            
-        print(f"   -> Checkpoint guardado: {out_name}")
-        time.sleep(2)
+def _init_worker(limiters, progress_queue):
+    global _progress_queue
+    install_rate_limiters(limiters)
+    _progress_queue = progress_queue
+    setup_gemini()
+
+
+def _commission_worker(com_n):
+    """Runs one commission chain in a worker process, with its output in the commission log."""
+    out_dir = os.path.join(BASE_DIR, f"comision-{com_n}", "draft-after-indications")
+    os.makedirs(out_dir, exist_ok=True)
+    log_path = os.path.join(out_dir, LOG_NAME)
+
+    def progress(done, total, fname):
+        _progress_queue.put((com_n, done, total, fname))
+
+    with open(log_path, 'a', encoding='utf-8', buffering=1) as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        print(f"\n##### {datetime.now().isoformat()} #####")
+        try:
+            with tagged(commission=com_n):
+                status = process_commission(com_n, genai.GenerativeModel(MODEL_NAME), progress)
+        except Exception:
+            traceback.print_exc()
+            raise
+        finally:
+            print(get_default_cache().summary())
+            print(RETRY_STATS.summary())
+    return status, RETRY_STATS.stats()
+
+
+def _print_progress(state, commissions):
+    cells = []
+    for c in commissions:
+        done, total, last = state.get(c, (0, None, ""))
+        cells.append(f"C{c} {last}" if total is None else f"C{c} {done}/{total}")
+    print("   " + " | ".join(cells))
+
+
+def run_parallel(commissions, workers):
+    """One worker process per commission chain; progress is shown here and logs go per commission."""
+    mp_context = multiprocessing.get_context()
+    limiters = share_rate_limiters([MODEL_NAME], mp_context=mp_context)
+    manager = mp_context.Manager()
+    progress_queue = manager.Queue()
+    state = {c: (0, None, "en cola") for c in commissions}
+    results = {}
+
+    print(f"Procesando comisiones {commissions} con {workers} procesos (logs en comision-N/draft-after-indications/{LOG_NAME})")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context,
+                             initializer=_init_worker, initargs=(limiters, progress_queue)) as pool:
+        futures = {pool.submit(_commission_worker, c): c for c in commissions}
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            while not progress_queue.empty():
+                c, done, total, fname = progress_queue.get()
+                state[c] = (done, total, "")
+                _print_progress(state, commissions)
+            for future in finished:
+                c = futures[future]
+                try:
+                    status, retry_stats = future.result()
+                except Exception as e:
+                    status, retry_stats = f"error: {e}", None
+                results[c] = (status, retry_stats)
+                state[c] = (0, None, status)
+                print(f"[C{c}] {status}")
+                _print_progress(state, commissions)
+    manager.shutdown()
+
+    for c in commissions:
+        status, retry_stats = results[c]
+        retries = sum(retry_stats["retries"].values()) if retry_stats else "-"
+        print(f"  C{c}: {status} (reintentos: {retries})")
+
 
 def main():
     if setup_gemini():
         print(f"Modelo Configurado: {MODEL_NAME}")
+        workers = min(APPLY_WORKERS, len(TARGET_COMISSIONS))
+        if workers > 1:
+            run_parallel(TARGET_COMISSIONS, workers)
+            return
+
         try:
             model = genai.GenerativeModel(MODEL_NAME)
         except Exception as e:
@@ -329,7 +596,11 @@ def main():
             return
 
         for c in TARGET_COMISSIONS:
-            process_commission(c, model)
+            with tagged(commission=c):
+                process_commission(c, model)
+
+        print(get_default_cache().summary())
+        print(RETRY_STATS.summary())
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,14 @@
 
 import os
+import sys
 import json
 import re
 import google.generativeai as genai
 
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from constitutional_proposal_tracking.gemini.files import upload_once
+
 # --- Configuration ---
 API_KEY = os.environ.get("GEMINI_API_KEY") 
 if not API_KEY:
@@ -20,8 +25,7 @@ def process_genesis_gemini(pdf_path: str):
     genai.configure(api_key=API_KEY)
     model = genai.GenerativeModel('gemini-3-flash-preview') # Back to Flash as Pro is failing
     
-    print(f"Uploading {os.path.basename(pdf_path)}...")
-    sample_file = genai.upload_file(path=pdf_path)
+    sample_file = upload_once(pdf_path)
     
     prompt = """
     You are an expert legal data extractor.
@@ -1,8 +1,13 @@
 
 import os
+import sys
 import json
 import google.generativeai as genai
 
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from constitutional_proposal_tracking.gemini.files import upload_once
+
 # --- Configuration ---
 API_KEY = os.environ.get("GEMINI_API_KEY") 
 if not API_KEY:
@@ -23,8 +28,7 @@ def extract_from_table(pdf_path: str, members_list: list):
     # If table is very complex, Pro represents relationships better, but Flash is capable.
     model = genai.GenerativeModel('gemini-3-flash-preview')
     
-    print(f"Uploading {os.path.basename(pdf_path)}...")
-    sample_file = genai.upload_file(path=pdf_path)
+    sample_file = upload_once(pdf_path)
     
     members_str = ", ".join(members_list)
     
@@ -1,10 +1,15 @@
 import os
+import sys
 import json
 import glob
 import time
 import re
 import google.generativeai as genai
 
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from constitutional_proposal_tracking.gemini.files import upload_once
+
 # --- Configuration ---
 API_KEY = os.environ.get("GEMINI_API_KEY") 
 if not API_KEY:
@@ -23,13 +28,7 @@ def load_json(path):
     return []
 
 def extract_full_rows_from_pdf_chunk(model, pdf_path, members_str):
-    print(f"  Uploading {os.path.basename(pdf_path)}...")
-    sample_file = genai.upload_file(path=pdf_path)
-    
-    # Wait for processing
-    while sample_file.state.name == "PROCESSING":
-        time.sleep(2)
-        sample_file = genai.get_file(sample_file.name)
+    sample_file = upload_once(pdf_path)
         
     prompt = f"""
     You are an expert legal data extractor.
@@ -86,11 +85,6 @@ def extract_full_rows_from_pdf_chunk(model, pdf_path, members_str):
     except Exception as e:
         print(f"    Error parsing {os.path.basename(pdf_path)}: {e}")
         return []
-    finally:
-        try:
-             genai.delete_file(sample_file.name)
-        except:
-             pass
 
 def main():
     print("--- Extracting FULL DATA (Text + Indications) from Report 1 ---")
@@ -1,9 +1,15 @@
 
 import os
+import sys
 import json
 import glob
 import google.generativeai as genai
-import difflib
+
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from constitutional_proposal_tracking.extraction.passes import Pass, run_passes
+from constitutional_proposal_tracking.gemini.cache import PdfAttachment
+from constitutional_proposal_tracking.matching.similarity import CandidateIndex
 
 # --- Configuration ---
 API_KEY = os.environ.get("GEMINI_API_KEY") 
@@ -29,48 +35,25 @@ def load_json(path):
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def extract_goal_text(files: list):
-    """
-    Extracts the full text of articles that were approved in the replacement reports.
-    Returns: Dict { "Article 1": "Full text...", "Article 2": "Full text..." }
-    """
-    genai.configure(api_key=API_KEY)
-    model = genai.GenerativeModel('gemini-3-flash-preview')
-    
-    combined_goals = {}
-    
-    for pdf in files:
-        print(f"Extracting Goal Text from {os.path.basename(pdf)}...")
-        sample_file = genai.upload_file(path=pdf)
-        
-        prompt = """
+GOAL_PROMPT = """
         Extract all Articles found in this document. 
         This document represents the "Approved New Articles".
         Return a JSON object where keys are the Article Name (e.g., "Artículo 1", "Artículo 12") and values are the Full Text content.
         Do NOT summarize. Extract exact text.
         """
-        
-        response = model.generate_content([prompt, sample_file])
-        try:
-            text = response.text.replace('```json', '').replace('```', '').strip()
-            data = json.loads(text)
-            combined_goals.update(data)
-        except Exception as e:
-            print(f"Error parsing goal text: {e}")
-            
-    return combined_goals
 
-def extract_candidates(pdf_path: str):
+def goal_pass(pdf: str):
+    """
+    Extracts the full text of articles that were approved in one replacement report.
+    Result: Dict { "Article 1": "Full text...", "Article 2": "Full text..." }
+    """
+    return Pass(f"goals {os.path.basename(pdf)}", GOAL_PROMPT, document=[PdfAttachment(pdf)])
+
+def candidates_pass(pdf_path: str):
     """
     Extracts all indications from the Comparado file.
-    Returns: List of { "number": "1", "content": "...", "authors": ... }
+    Result: List of { "number": "1", "content": "...", "authors": ... }
     """
-    genai.configure(api_key=API_KEY)
-    model = genai.GenerativeModel('gemini-3-flash-preview')
-    
-    print(f"Extracting Candidates from {os.path.basename(pdf_path)}...")
-    sample_file = genai.upload_file(path=pdf_path)
-    
     # We load members for matching
     members_list = load_json(MEMBERS_PATH) if os.path.exists(MEMBERS_PATH) else []
     members_str = ", ".join(members_list)
@@ -93,15 +76,7 @@ def extract_candidates(pdf_path: str):
     
     Return a JSON List.
     """
-    
-    response = model.generate_content([prompt, sample_file])
-    try:
-        text = response.text.replace('```json', '').replace('```', '').strip()
-        data = json.loads(text)
-        return data
-    except Exception as e:
-        print(f"Error parsing candidates: {e}")
-        return []
+    return Pass("candidates", prompt, document=[PdfAttachment(pdf_path)])
 
 
 def clean_candidate_content(text):
@@ -136,34 +111,37 @@ def match_logic(goals: dict, candidates: list):
     matched_indications = []
     
     print(f"Matching {len(goals)} goals against {len(candidates)} candidates...")
-    
+
+    # Skip withdrawals or suppressions (they don't produce text)
+    eligible = []
+    for cand in candidates:
+        cand_raw = cand.get("content", "")
+        if "Retirada" in cand_raw or "suprimir" in cand_raw.lower():
+            continue
+        cand_clean = " ".join(clean_candidate_content(cand_raw).split())
+        eligible.append((cand, cand_clean))
+    index = CandidateIndex([cand_clean for _, cand_clean in eligible])
+
     for art_name, goal_text in goals.items():
         # Normalize Goal: remove newlines, extra spaces, and headers
         goal_curr = clean_goal_content(goal_text)
         goal_clean = " ".join(goal_curr.split())
         best_ratio = 0.0
         best_candidate = None
-        
-        for cand in candidates:
-            cand_raw = cand.get("content", "")
-            
-            # Skip withdrawals or suppressions (they don't produce text)
-            if "Retirada" in cand_raw or "suprimir" in cand_raw.lower():
-                continue
-                
-            cand_clean = clean_candidate_content(cand_raw)
-            cand_clean = " ".join(cand_clean.split())
-            
-            # 1. Direct Containment (Strongest Signal)
-            # If the goal text is fully inside the candidate (quoted part), or vice versa
-            if len(goal_clean) > 20 and (goal_clean in cand_clean or cand_clean in goal_clean):
-                ratio = 1.0
-            else:
-                ratio = difflib.SequenceMatcher(None, goal_clean, cand_clean).ratio()
-            
-            if ratio > best_ratio:
-                best_ratio = ratio
-                best_candidate = cand
+
+        # 1. Direct Containment (Strongest Signal)
+        # If the goal text is fully inside the candidate (quoted part), or vice versa
+        if len(goal_clean) > 20:
+            for cand, cand_clean in eligible:
+                if goal_clean in cand_clean or cand_clean in goal_clean:
+                    best_ratio, best_candidate = 1.0, cand
+                    break
+
+        # 2. Text similarity over the n-gram shortlist
+        if best_candidate is None:
+            best_idx, best_ratio = index.best_match(goal_clean)
+            if best_idx >= 0:
+                best_candidate = eligible[best_idx][0]
         
         # Threshold
         if best_ratio > 0.6: # Lowered threshold slightly
@@ -194,12 +172,19 @@ def main():
         print("Candidate file missing.")
         return
 
-    # 1. Get the Goals (The 'Answer Key')
-    goals = extract_goal_text(GOAL_FILES)
+    # 1 + 2. The Goals (the 'Answer Key') and the Candidates (the 'Possibilities'), extracted concurrently
+    genai.configure(api_key=API_KEY)
+    goal_passes = [goal_pass(pdf) for pdf in GOAL_FILES]
+    results, errors = run_passes([], goal_passes + [candidates_pass(CANDIDATE_FILE)])
+    for name, error in errors.items():
+        print(f"Error parsing {name}: {error}")
+
+    goals = {}
+    for p in goal_passes:
+        goals.update(results.get(p.name, {}))
     print(f"DEBUG: Found {len(goals)} goal articles.")
     
-    # 2. Get the Candidates (The 'Possibilities')
-    candidates = extract_candidates(CANDIDATE_FILE)
+    candidates = results.get("candidates", [])
     print(f"DEBUG: Found {len(candidates)} candidate indications.")
     
     # 3. Solve
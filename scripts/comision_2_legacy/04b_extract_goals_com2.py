@@ -1,9 +1,14 @@
 
 import os
+import sys
 import json
 import google.generativeai as genai
 import time
 
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from constitutional_proposal_tracking.gemini.files import upload_once
+
 # --- Configuration ---
 API_KEY = os.environ.get("GEMINI_API_KEY") 
 if not API_KEY:
@@ -24,14 +29,7 @@ def extract_approved_articles(pdf_path):
     genai.configure(api_key=API_KEY)
     model = genai.GenerativeModel('gemini-3-flash-preview')
     
-    print(f"Uploading {os.path.basename(pdf_path)}...")
-    sample_file = genai.upload_file(path=pdf_path)
-    
-    # Wait for processing
-    while sample_file.state.name == "PROCESSING":
-        print(".", end="", flush=True)
-        time.sleep(1)
-        sample_file = genai.get_file(sample_file.name)
+    sample_file = upload_once(pdf_path)
         
     prompt = """
     ACT AS: Legal Data Extractor.
@@ -62,9 +60,6 @@ def extract_approved_articles(pdf_path):
         # Add metadata
         for item in data:
             item["source_pdf"] = os.path.basename(pdf_path)
-            
-        # Clean file
-        genai.delete_file(sample_file.name)
         
         return data
         
@@ -1,9 +1,13 @@
 import os
-import time
+import sys
 import json
 import re
 import google.generativeai as genai
 
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from constitutional_proposal_tracking.gemini.files import upload_once
+
 # --- Configuration ---
 API_KEY = os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -11,14 +15,7 @@ PDF_PATH = os.path.join(BASE_DIR, "comision-2", "PDFs", "C2_COMPLEX_BORRADOR-CON
 OUTPUT_PATH = os.path.join(BASE_DIR, "comision-2", "indicaciones-api-extracted", "final_draft_com2.json")
 
 def extract_final_articles(model, pdf_path):
-    print(f"Uploading PDF: {os.path.basename(pdf_path)}...")
-    sample_file = genai.upload_file(path=pdf_path)
-    
-    print("Waiting for file processing...")
-    while sample_file.state.name == "PROCESSING":
-        time.sleep(2)
-        sample_file = genai.get_file(sample_file.name)
-        
+    sample_file = upload_once(pdf_path)
     print(f"File ready. State: {sample_file.state.name}")
     
     prompt = """
@@ -70,9 +67,6 @@ def extract_final_articles(model, pdf_path):
     except Exception as e:
         print(f"Error extracting data: {e}")
         return []
-    finally:
-        print("Cleaning up uploaded file...")
-        genai.delete_file(sample_file.name)
 
 def main():
     if not API_KEY:
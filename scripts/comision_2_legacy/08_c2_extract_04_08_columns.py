@@ -1,7 +1,12 @@
 import google.generativeai as genai
 import json
 import os
-import time
+import sys
+
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from constitutional_proposal_tracking.extraction.passes import Pass, run_passes
+from constitutional_proposal_tracking.gemini.cache import PdfAttachment
 
 # Configuration
 API_KEY = os.environ.get("GEMINI_API_KEY")
@@ -13,30 +18,9 @@ OUTPUT_SISTEMATIZADO = "/Users/anibaloliveramorales/Desktop/Doctorado/-Projects-
 OUTPUT_INDICATIONS = "/Users/anibaloliveramorales/Desktop/Doctorado/-Projects-/B - Convención Constitucional - Data/constitutional_proposal_tracking/comision-2/reconstructed/C2_INDICATIONS_04_08_candidates.json"
 
 MODEL_NAME = "gemini-3-pro-preview" # Using the pro model as requested
+JSON_CONFIG = {"response_mime_type": "application/json"}
 
-def upload_file(path):
-    print(f"Uploading file: {path}")
-    file = genai.upload_file(path)
-    print(f"File uploaded: {file.name}")
-    return file
-
-def wait_for_files_active(files):
-    print("Waiting for file processing...")
-    for file in files: # Fix: iterate over file objects directly or names, but keep consistency
-        file_obj = genai.get_file(file.name)
-        while file_obj.state.name == "PROCESSING":
-            print(".", end="", flush=True)
-            time.sleep(2)
-            file_obj = genai.get_file(file.name)
-        if file_obj.state.name != "ACTIVE":
-            raise Exception(f"File {file_obj.name} failed to process")
-    print("...all files active")
-
-def extract_sistematizado(pdf_file):
-    print("Extracting 'Sistematizado' column...")
-    model = genai.GenerativeModel(model_name=MODEL_NAME)
-    
-    prompt = """
+SISTEMATIZADO_PROMPT = """
     Analiza este PDF ("Comparado"). Tu objetivo es extraer SOLAMENTE el contenido de la columna izquierda llamada "SISTEMATIZADO".
     
     Ignora las columnas "INDICACIONES" y "RESULTADO".
@@ -54,16 +38,8 @@ def extract_sistematizado(pdf_file):
     Si el texto de un artículo está cortado entre páginas, únelo coherentemente.
     Asegúrate de capturar TODOS los artículos (deberían ser alrededor de 96, revisa bien).
     """
-    
-    # Passing prompt first, then file content
-    response = model.generate_content([prompt, pdf_file], generation_config={"response_mime_type": "application/json"})
-    return response.text
 
-def extract_indications(pdf_file):
-    print("Extracting 'Indicaciones' column...")
-    model = genai.GenerativeModel(model_name=MODEL_NAME)
-    
-    prompt = """
+INDICATIONS_PROMPT = """
     Analiza este PDF ("Comparado"). Tu objetivo es extraer SOLAMENTE el contenido de la columna central llamada "INDICACIONES".
     
     Ignora la columna "SISTEMATIZADO" y la columna "RESULTADO" (que está vacía).
@@ -88,9 +64,12 @@ def extract_indications(pdf_file):
     
     Presta atención a indicaciones como "Para sustituir el artículo...", "Para agregar...", "Para suprimir...".
     """
-    
-    response = model.generate_content([prompt, pdf_file], generation_config={"response_mime_type": "application/json"})
-    return response.text
+
+# One pass per column over the same document; they run concurrently.
+COLUMNS = [
+    ("Sistematizado", SISTEMATIZADO_PROMPT, OUTPUT_SISTEMATIZADO),
+    ("Indications", INDICATIONS_PROMPT, OUTPUT_INDICATIONS),
+]
 
 def main():
     # 0. Configure API
@@ -99,39 +78,23 @@ def main():
         return
     genai.configure(api_key=API_KEY)
 
-    # 1. Upload File
     if not os.path.exists(PDF_PATH):
         print(f"Error: File not found at {PDF_PATH}")
         return
 
-    pdf_file = upload_file(PDF_PATH)
-    wait_for_files_active([pdf_file])
-
-    # 2. Call 1: Sistematizado
-    try:
-        sistematizado_raw = extract_sistematizado(pdf_file)
-        sistematizado_json = json.loads(sistematizado_raw)
-        
-        os.makedirs(os.path.dirname(OUTPUT_SISTEMATIZADO), exist_ok=True)
-        with open(OUTPUT_SISTEMATIZADO, 'w', encoding='utf-8') as f:
-            json.dump(sistematizado_json, f, indent=2, ensure_ascii=False)
-        print(f"Saved Sistematizado to {OUTPUT_SISTEMATIZADO}")
-        
-    except Exception as e:
-        print(f"Error extracting Sistematizado: {e}")
+    # 1. Both columns from one shared upload
+    passes = [Pass(name, prompt, model_name=MODEL_NAME, generation_config=JSON_CONFIG) for name, prompt, _ in COLUMNS]
+    results, errors = run_passes([PdfAttachment(PDF_PATH)], passes)
 
-    # 3. Call 2: Indicaciones
-    try:
-        indications_raw = extract_indications(pdf_file)
-        indications_json = json.loads(indications_raw)
-        
-        os.makedirs(os.path.dirname(OUTPUT_INDICATIONS), exist_ok=True)
-        with open(OUTPUT_INDICATIONS, 'w', encoding='utf-8') as f:
-            json.dump(indications_json, f, indent=2, ensure_ascii=False)
-        print(f"Saved Indications to {OUTPUT_INDICATIONS}")
-        
-    except Exception as e:
-        print(f"Error extracting Indications: {e}")
+    # 2. Save each column
+    for name, _, output_path in COLUMNS:
+        if name in errors:
+            print(f"Error extracting {name}: {errors[name]}")
+            continue
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(results[name], f, indent=2, ensure_ascii=False)
+        print(f"Saved {name} to {output_path}")
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,10 @@
 import json
-import difflib
 import os
+import sys
+
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from constitutional_proposal_tracking.matching.similarity import CandidateIndex
 
 # Configuration Paths
 BASE_DIR = "/Users/anibaloliveramorales/Desktop/Doctorado/-Projects-/B - Convención Constitucional - Data/constitutional_proposal_tracking"
@@ -27,31 +31,19 @@ def main():
     
     mapped_articles = []
     
-    # Create a simple index of 03-02 texts for matching
+    # Index 03-02 texts once; every target is shortlisted against all of them in one batch
     base_texts = [clean_text(a['text']) for a in data_03_02]
+    base_index = CandidateIndex(base_texts)
+    target_texts = [clean_text(a['text']) for a in data_03_08]
+    best_matches = base_index.best_matches(target_texts)
     
     for target_idx, target_art in enumerate(data_03_08):
-        target_text_clean = clean_text(target_art['text'])
         target_title = target_art['article']
         
         print(f"\nProcessing: {target_title}")
         
-        # Find best match
-        # Using SequenceMatcher is slow for large lists, but 96 is small.
-        best_match_idx = -1
-        best_ratio = 0.0
-        
-        for base_idx, base_text_clean in enumerate(base_texts):
-            # Optimization: Check if titles match first? 
-            # Titles might have changed (renumbering). Content is king.
-            
-            # Quick overlap check before expensive SequenceMatcher?
-            # Nah, 96 items is tiny.
-            
-            ratio = difflib.SequenceMatcher(None, target_text_clean, base_text_clean).ratio()
-            if ratio > best_ratio:
-                best_ratio = ratio
-                best_match_idx = base_idx
+        # Find best match (titles might have changed with renumbering: content is king)
+        best_match_idx, best_ratio = best_matches[target_idx]
         
         # Threshold
         if best_ratio > 0.4: # Fairly loose because text might have changed
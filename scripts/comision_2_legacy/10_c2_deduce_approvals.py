@@ -1,7 +1,12 @@
 import json
 import os
+import sys
 import google.generativeai as genai
-import difflib
+
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from constitutional_proposal_tracking.gemini.files import upload_once
+from constitutional_proposal_tracking.matching.similarity import CandidateIndex, likert_score, sequence_ratio
 
 # Configuration
 API_KEY = os.environ.get("GEMINI_API_KEY")
@@ -22,13 +27,7 @@ def extract_ground_truth(pdf_path):
     genai.configure(api_key=API_KEY)
     model = genai.GenerativeModel(model_name=MODEL_NAME)
     
-    file_ref = genai.upload_file(pdf_path)
-    
-    # Simple wait
-    import time
-    while file_ref.state.name == "PROCESSING":
-        time.sleep(1)
-        file_ref = genai.get_file(file_ref.name)
+    file_ref = upload_once(pdf_path)
         
     prompt = """
     You are a legal expert or stenographer. Extract all articles from this "Borrador Constitucional" VERBATIM.
@@ -59,7 +58,7 @@ def semantic_match(ground_truth, candidate_text):
     # User asked for "Semantic Deduction" and "Likert Scale".
     # Let's use difflib for speed and mapping to Likert.
     
-    ratio = difflib.SequenceMatcher(None, ground_truth, candidate_text).ratio()
+    ratio = sequence_ratio(ground_truth, candidate_text)
     
     # Map ratio to 1-7 Likert
     # 7: Exact match (1.0)
@@ -67,14 +66,7 @@ def semantic_match(ground_truth, candidate_text):
     # 5: High (0.8+)
     # 4: Moderate (0.6+)
     # 1: No match
-    
-    if ratio > 0.98: score = 7
-    elif ratio > 0.90: score = 6
-    elif ratio > 0.80: score = 5
-    elif ratio > 0.60: score = 4
-    elif ratio > 0.40: score = 3
-    elif ratio > 0.20: score = 2
-    else: score = 1
+    score = likert_score(ratio)
     
     return score, ratio
 
@@ -139,14 +131,16 @@ def main():
             best_ind = None
             best_score = 0
             
-            for ind in candidates:
-                cand_content = ind['content']
-                # Clean content (remove "Para sustituir...")? 
-                # Ideally yes, but let's compare raw for now or minimal clean
-                score, ratio = semantic_match(gt_text, cand_content)
-                if score > best_score:
-                    best_score = score
-                    best_ind = ind
+            # Clean content (remove "Para sustituir...")? 
+            # Ideally yes, but let's compare raw for now or minimal clean
+            if candidates:
+                index = CandidateIndex([ind['content'] for ind in candidates])
+                ranked = index.rank(gt_text)
+                if ranked:
+                    best_score = likert_score(ranked[0][1])
+                    # First candidate (in report order) reaching the best Likert bucket
+                    best_idx = min(idx for idx, ratio in ranked if likert_score(ratio) == best_score)
+                    best_ind = candidates[best_idx]
             
             if best_ind and best_score >= 4: # Moderate match
                 log_entries.append(f"REQ: {gt_title} | SOURCE: Indication {best_ind.get('number')} | CONFIDENCE: {best_score}/7")
@@ -1,7 +1,14 @@
 import json
 import os
+import sys
 import google.generativeai as genai
-import time
+
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from constitutional_proposal_tracking.gemini.cache import get_default_cache
+from constitutional_proposal_tracking.gemini.context import SharedContext
+from constitutional_proposal_tracking.gemini.metrics import estimate_tokens, tagged
+from constitutional_proposal_tracking.gemini.retry import RETRY_STATS, SchemaError, generate_json
 
 # Configuration
 API_KEY = os.environ.get("GEMINI_API_KEY")
@@ -15,34 +22,27 @@ OUTPUT_RANKINGS = os.path.join(BASE_DIR, "comision-2/reconstructed/C2_MAPPING_ca
 
 MODEL_NAME = "gemini-3-pro-preview"
 
+# Token budget per batch. The candidate list is a cached context shared by every batch;
+# each call only sends its targets. Batches are filled with targets until the estimated
+# response or the prompt budget left after the cached prefix would be exceeded; the
+# response estimate per target is updated from the answers as the run goes.
+CONTEXT_WINDOW_TOKENS = 1_000_000
+MAX_OUTPUT_TOKENS = 8192
+BATCH_PROMPT_TOKENS = 32000
+OUTPUT_TOKENS_PER_TARGET = 350    # initial estimate: 5 candidates with a short reason
+OUTPUT_MARGIN = 0.8               # fraction of MAX_OUTPUT_TOKENS to plan for
+MAX_BATCH = 25
+
 def load_json(path):
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def rank_candidates_batch(model, targets_batch, all_candidates):
-    # Construct candidates string once
-    candidates_str = ""
-    for i, cand in enumerate(all_candidates):
-        candidates_str += f"ID {i} | TITLE: {cand['article']} | TEXT: {cand['text']}\n"
-        
-    # Construct targets string with IDs
-    targets_str = ""
-    for idx, t in enumerate(targets_batch):
-        # We use a temporary Batch ID (0 to batch_size-1) for matching
-        targets_str += f"TARGET_ID: {idx}\nTITLE: {t['article']}\nTEXT: {t['text']}\n---\n"
-
-    prompt = f"""
-    TASK: For EACH of the Target Articles listed below (identified by TARGET_ID), identify the Top 5 candidates from the Candidates List that are most semantically similar.
+RANKING_INSTRUCTIONS = """
+    TASK: For EACH of the Target Articles given after this context (identified by TARGET_ID), identify the Top 5 candidates from the Candidates List that are most semantically similar.
     Focus on CONTENT overlap.
-    
-    CANDIDATES LIST:
-    {candidates_str}
-    
-    TARGETS LIST:
-    {targets_str}
-    
-    OUTPUT FORMAT: JSON List of Objects. 
-    IMPORTANT: You must include "target_id" corresponding to the TARGET_ID in the list above.
+
+    OUTPUT FORMAT: JSON List of Objects, one per target.
+    IMPORTANT: You must include "target_id" corresponding to the TARGET_ID of the target.
     [
       {{
         "target_id": 0,
@@ -55,11 +55,71 @@ def rank_candidates_batch(model, targets_batch, all_candidates):
       ...
     ]
     Return ONLY JSON.
+
+    CANDIDATES LIST:
+    {candidates_str}
     """
-    
+
+
+def candidates_context(all_candidates):
+    """Shared prefix with the instructions and every candidate, sent once for all batches."""
+    candidates_str = ""
+    for i, cand in enumerate(all_candidates):
+        candidates_str += f"ID {i} | TITLE: {cand['article']} | TEXT: {cand['text']}\n"
+    return SharedContext(MODEL_NAME, [RANKING_INSTRUCTIONS.format(candidates_str=candidates_str)],
+                         display_name="c2-ranking-candidates")
+
+
+def target_block(idx, t):
+    # We use a temporary Batch ID (0 to batch_size-1) for matching
+    return f"TARGET_ID: {idx}\nTITLE: {t['article']}\nTEXT: {t['text']}\n---\n"
+
+
+class BatchPlanner:
+    """Sizes each batch from the token budget and the observed response size per target."""
+    def __init__(self, prompt_budget):
+        self.prompt_budget = prompt_budget
+        self.output_per_target = OUTPUT_TOKENS_PER_TARGET
+
+    def next_size(self, pending):
+        by_output = max(1, int(MAX_OUTPUT_TOKENS * OUTPUT_MARGIN) // self.output_per_target)
+        size = tokens = 0
+        for t in pending[:min(MAX_BATCH, by_output)]:
+            t_tokens = estimate_tokens(len(target_block(size, t)))
+            if size and tokens + t_tokens > self.prompt_budget:
+                break
+            size += 1
+            tokens += t_tokens
+        return max(1, size)
+
+    def observe(self, batch_size, returned, response_chars):
+        if returned:
+            per_target = estimate_tokens(response_chars) // returned
+            self.output_per_target = max(1, (self.output_per_target + per_target) // 2)
+        if returned < batch_size:
+            # Missing targets usually mean a truncated answer: plan smaller batches.
+            self.output_per_target = self.output_per_target * batch_size // max(1, returned)
+
+
+def validate_rankings(value):
+    if not isinstance(value, list):
+        raise SchemaError(f"expected a JSON list, got {type(value).__name__}")
+
+
+def rank_candidates_batch(model, targets_batch):
+    # Construct targets string with IDs; the candidates come from the cached context
+    targets_str = "".join(target_block(idx, t) for idx, t in enumerate(targets_batch))
+    prompt = f"""
+    TARGETS LIST:
+    {targets_str}
+    Return ONLY JSON.
+    """
+
     try:
-        response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
-        return json.loads(response.text)
+        return generate_json(model, [prompt],
+                             generation_config={"response_mime_type": "application/json",
+                                                "max_output_tokens": MAX_OUTPUT_TOKENS},
+                             validate=validate_rankings, label="rank batch")
     except Exception as e:
         print(f"Error ranking batch: {e}")
         return []
@@ -70,57 +130,73 @@ def main():
         return
         
     genai.configure(api_key=API_KEY)
-    model = genai.GenerativeModel(MODEL_NAME)
     
     targets = load_json(INPUT_TARGET_04_08)
     candidates = load_json(INPUT_CANDIDATES_03_02)
     
-    results = []
-    batch_size = 5
-    
-    print(f"Ranking {len(targets)} Targets in batches of {batch_size}...")
-    
-    for i in range(0, len(targets), batch_size):
-        batch = targets[i:i+batch_size]
-        print(f"Processing Batch {i//batch_size + 1} ({len(batch)} articles)...")
-        
-        batch_results = rank_candidates_batch(model, batch, candidates)
-        
-        # Map results by target_id
-        result_map = {res.get('target_id'): res for res in batch_results}
-        
-        for idx, t in enumerate(batch):
-            # idx matches the TARGET_ID sent in prompt
-            res = result_map.get(idx)
-            
-            enriched_candidates = []
-            if res:
-                for cand_res in res.get('top_candidates', []):
-                    c_idx = cand_res.get('candidate_index')
-                    if c_idx is not None and 0 <= c_idx < len(candidates):
-                        c = candidates[c_idx]
-                        enriched_candidates.append({
-                            "candidate_article": c['article'],
-                            "candidate_text_snippet": c['text'], 
-                            "similarity_score": cand_res.get('similarity_score'),
-                            "reason": cand_res.get('reason')
-                        })
-            else:
-                print(f"Warning: No ranking returned for Target ID {idx} ({t['article']})")
-
-            results.append({
-                "target_article": t['article'],
-                "target_text_snippet": t['text'], 
-                "top_candidates": enriched_candidates
-            })
-            
-        time.sleep(2) # Rate limit
+    results = {}
+    pending = list(enumerate(targets))
+    requeued = set()
+    batch_no = 0
+
+    with candidates_context(candidates) as context:
+        model = context.model()
+        planner = BatchPlanner(min(BATCH_PROMPT_TOKENS, CONTEXT_WINDOW_TOKENS - context.tokens - MAX_OUTPUT_TOKENS))
+        print(f"Ranking {len(targets)} Targets against {len(candidates)} candidates (~{context.tokens} cached tokens)...")
+
+        while pending:
+            size = planner.next_size([t for _, t in pending])
+            batch, pending = pending[:size], pending[size:]
+            batch_no += 1
+            print(f"Processing Batch {batch_no} ({len(batch)} articles, {len(pending)} left)...")
+
+            with tagged(commission=2, label=f"batch {batch_no}"):
+                batch_results = rank_candidates_batch(model, [t for _, t in batch])
+
+            # Map results by target_id
+            result_map = {res.get('target_id'): res for res in batch_results if isinstance(res, dict)}
+            planner.observe(len(batch), sum(1 for idx in range(len(batch)) if idx in result_map),
+                            len(json.dumps(batch_results, ensure_ascii=False)))
+
+            for idx, (pos, t) in enumerate(batch):
+                # idx matches the TARGET_ID sent in prompt
+                res = result_map.get(idx)
+                if res is None and pos not in requeued:
+                    # Ask once more in a later (smaller) batch
+                    requeued.add(pos)
+                    pending.append((pos, t))
+                    continue
+
+                enriched_candidates = []
+                if res:
+                    for cand_res in res.get('top_candidates', []):
+                        c_idx = cand_res.get('candidate_index')
+                        if c_idx is not None and 0 <= c_idx < len(candidates):
+                            c = candidates[c_idx]
+                            enriched_candidates.append({
+                                "candidate_article": c['article'],
+                                "candidate_text_snippet": c['text'], 
+                                "similarity_score": cand_res.get('similarity_score'),
+                                "reason": cand_res.get('reason')
+                            })
+                else:
+                    print(f"Warning: No ranking returned for Target {pos} ({t['article']})")
+
+                results[pos] = {
+                    "target_article": t['article'],
+                    "target_text_snippet": t['text'], 
+                    "top_candidates": enriched_candidates
+                }
+
+    results = [results[pos] for pos in sorted(results)]
         
     # Save
     with open(OUTPUT_RANKINGS, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
         
     print(f"Rankings saved to {OUTPUT_RANKINGS}")
+    print(get_default_cache().summary())
+    print(RETRY_STATS.summary())
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,10 @@
 import json
 import os
-import difflib
+import sys
+
+# --- Setup Imports ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from constitutional_proposal_tracking.matching.similarity import CandidateIndex
 
 # Paths
 BASE_DIR = "/Users/anibaloliveramorales/Desktop/Doctorado/-Projects-/B - Convención Constitucional - Data/constitutional_proposal_tracking/comision-2"
@@ -17,12 +21,13 @@ def load_json(path):
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def find_best_match_in_genesis(target_article, genesis_articles):
+def find_best_match_in_genesis(target_article, genesis_articles, genesis_index=None):
     """
     Tries to find the genesis article that matches the target.
     Logic:
     1. Exact Title Match
     2. High Text Similarity
+    `genesis_index` (a CandidateIndex over the genesis texts) can be built once and reused.
     """
     target_title = target_article['article']
     target_text = target_article['text']
@@ -33,15 +38,9 @@ def find_best_match_in_genesis(target_article, genesis_articles):
             return g_idx, g
             
     # 2. Fuzzy Text Match? (Optional, but 99 implies we should look harder)
-    # Using python's difflib for a quick check
-    best_score = 0
-    best_idx = -1
-    
-    for g_idx, g in enumerate(genesis_articles):
-        score = difflib.SequenceMatcher(None, target_text, g['text']).ratio()
-        if score > best_score:
-            best_score = score
-            best_idx = g_idx
+    if genesis_index is None:
+        genesis_index = CandidateIndex([g['text'] for g in genesis_articles])
+    best_idx, best_score = genesis_index.best_match(target_text)
             
     if best_score > 0.6: # Threshold
         return best_idx, genesis_articles[best_idx]
@@ -58,6 +57,8 @@ def main():
     print(f"Loaded {len(genesis_articles)} genesis articles.")
     print(f"Loaded {len(target_articles)} target articles.")
     
+    genesis_index = CandidateIndex([g['text'] for g in genesis_articles])
+    
     # Track mapped genesis IDs
     mapped_genesis_ids = set()
     
@@ -94,7 +95,7 @@ def main():
                 if code == 99:
                     # Search globally in Genesis
                     print(f"Processing manual code [99] for target: {target['article']}")
-                    idx, obj = find_best_match_in_genesis(target, genesis_articles)
+                    idx, obj = find_best_match_in_genesis(target, genesis_articles, genesis_index)
                     if obj:
                         print(f"  -> Found match: ID {idx} | {obj['article']}")
                         mapped_genesis_idx = idx
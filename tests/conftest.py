@@ -0,0 +1,9 @@
+import importlib
+
+# The gemini modules import google.generativeai at module level. Without the SDK, the
+# benchmark's stand-in (bench/fake_genai.py) takes its place; no test calls the API.
+try:
+    importlib.import_module("google.generativeai")
+except ImportError:
+    from constitutional_proposal_tracking.bench import fake_genai
+    fake_genai.install()
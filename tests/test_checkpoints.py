@@ -0,0 +1,136 @@
+import copy
+import json
+
+import pytest
+
+from constitutional_proposal_tracking.drafts.checkpoints import CheckpointStore, chain_hash, legacy_bytes
+from constitutional_proposal_tracking.drafts.history_store import SNAPSHOT_DIR, HistoryStore
+
+GENESIS = "draft_00_genesis_master.json"
+
+
+def article(gid, number, content, history=()):
+    return {"original_id": gid, "current_number": number, "status": "active", "final_content": content,
+            "accumulated_authors": ["Bassa, Jaime"], "history": list(history)}
+
+
+def entry(step, snapshot):
+    return {"step": step, "action": "MODIFY", "content_snapshot": snapshot, "applied_indications": ["1"]}
+
+
+def chain():
+    """(step, draft) for a genesis draft and three reports: an edit, an insertion, a deletion of a key."""
+    base = [article("G-1", "1", "Uno."), article("G-2", "2", "Dos.")]
+    edited = copy.deepcopy(base)
+    edited[0]["final_content"] = "Uno bis."
+    edited[0]["history"].append(entry("draft_after_a.json", "Uno bis."))
+    inserted = copy.deepcopy(edited)
+    inserted.insert(1, article("G-1-new", "1 bis", "Nuevo."))
+    inserted[2]["current_number"] = "3"
+    trimmed = copy.deepcopy(inserted)
+    del trimmed[0]["accumulated_authors"]
+    return [(GENESIS, base), ("draft_after_a.json", edited), ("draft_after_b.json", inserted), ("draft_after_c.json", trimmed)]
+
+
+def hashes(steps):
+    out, h = [], None
+    for step, _ in steps:
+        h = chain_hash(h, step)
+        out.append((step, h))
+    return out
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    steps = chain()
+    for (step, draft), (_, h) in zip(steps, hashes(steps)):
+        if step == GENESIS:
+            store.write_base(step, draft, input_hash=h)
+        else:
+            store.append_step(step, draft, input_hash=h)
+    return store
+
+
+def records(store):
+    with open(store.path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_steps_store_only_the_changed_articles(store):
+    base, edited, inserted, trimmed = records(store)
+    assert base["kind"] == "base" and len(base["articles"]) == 2
+    assert edited["changes"] == {"G-1": {"set": {"final_content": "Uno bis."},
+                                         "history_append": [entry("draft_after_a.json", "Uno bis.")]}}
+    assert "order" not in edited
+    assert set(inserted["changes"]) == {"G-1-new", "G-2"} and inserted["order"] == ["G-1", "G-1-new", "G-2"]
+    assert list(trimmed["changes"]["G-1"]) == ["replace"]    # a removed key needs the full article
+
+
+def test_materialize_round_trips_every_step(store):
+    for step, draft in chain():
+        assert legacy_bytes(store.materialize(step)) == legacy_bytes(draft)
+    assert store.materialize() == chain()[-1][1]
+    assert store.steps() == [step for step, _ in chain()]
+
+
+def test_iter_drafts_and_legacy_export_match(store, tmp_path):
+    assert [(step, legacy_bytes(draft)) for step, draft in store.iter_drafts()] == \
+        [(step, legacy_bytes(draft)) for step, draft in chain()]
+    out = tmp_path / "legacy"
+    store.export_all_legacy(str(out))
+    for step, draft in chain():
+        assert (out / step).read_text(encoding='utf-8') == legacy_bytes(draft)
+
+
+def test_valid_prefix(store, tmp_path):
+    expected = hashes(chain())
+    assert store.valid_prefix(expected) == 4
+    assert store.valid_prefix(expected[:2]) == 2
+    changed = expected[:2] + [("draft_after_b.json", "edited input")] + expected[3:]
+    assert store.valid_prefix(changed) == 2
+    renamed = expected[:1] + [("draft_after_z.json", expected[1][1])] + expected[2:]
+    assert store.valid_prefix(renamed) == 1
+    assert CheckpointStore(str(tmp_path / "missing")).valid_prefix(expected) == 0
+
+
+def test_valid_prefix_stops_at_a_corrupted_tail(store):
+    with open(store.path, 'a', encoding='utf-8') as f:
+        f.write('{"kind": "delta", "step": "draft_after_d.json", "chan')    # interrupted mid-write
+    expected = hashes(chain() + [("draft_after_d.json", None)])
+    assert store.valid_prefix(expected) == 4
+    with pytest.raises(ValueError):
+        store.steps()
+
+
+def test_steps_without_hash_never_match(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.write_base(GENESIS, chain()[0][1])
+    assert store.valid_prefix([(GENESIS, None)]) == 0
+
+
+def test_truncate_after_resumes_the_chain(store):
+    steps = chain()
+    store.truncate_after("draft_after_a.json")
+    assert store.steps() == [GENESIS, "draft_after_a.json"]
+    assert store.materialize() == steps[1][1]
+    # resuming appends against the truncated chain, not the dropped steps
+    store.append_step("draft_after_b.json", steps[2][1])
+    assert store.steps() == [GENESIS, "draft_after_a.json", "draft_after_b.json"]
+    assert legacy_bytes(store.materialize()) == legacy_bytes(steps[2][1])
+
+
+def test_history_store_loads_from_the_checkpoint_log(tmp_path):
+    out_dir = tmp_path / "comision-3" / SNAPSHOT_DIR
+    out_dir.mkdir(parents=True)
+    store = CheckpointStore(str(out_dir))
+    steps = chain()
+    store.write_base(*steps[0])
+    for step, draft in steps[1:]:
+        store.append_step(step, draft)
+    (out_dir / "draft_after_stale.json").write_text("[]", encoding='utf-8')    # ignored next to a log
+
+    history = HistoryStore()
+    assert history.load_all(str(tmp_path)) == {3: 4}
+    for step, draft in steps:
+        assert history.draft((3, step)) == draft
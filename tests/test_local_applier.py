@@ -0,0 +1,246 @@
+import pytest
+
+from constitutional_proposal_tracking.drafts.local_applier import apply_one, parse_inciso, resolve_locally
+from constitutional_proposal_tracking.drafts.master_draft import MasterDraft
+
+ARTICLE = "Primer inciso. Segunda oración del primero.\nSegundo inciso del artículo."
+
+
+def add(placement, scope="INCISO", content="Texto agregado."):
+    return {"action": "ADD", "target_scope": scope, "placement_instructions": placement, "content": content}
+
+
+@pytest.mark.parametrize("scope, placement", [
+    ("INCISO", "como inciso final"),
+    ("INCISO", "como nuevo inciso final"),
+    ("INCISO", "agrega un nuevo inciso final"),
+    ("INCISO", "agréguese un inciso final"),
+    ("INCISO", "como inciso final nuevo"),
+    ("INCISO", "al final"),
+])
+def test_add_new_final_paragraph(scope, placement):
+    assert apply_one(ARTICLE, add(placement, scope)) == (ARTICLE + "\nTexto agregado.", "active")
+
+
+@pytest.mark.parametrize("scope, placement", [
+    ("INCISO 1", "al final del inciso primero"),
+    ("INCISO 3", "al final del inciso tercero"),
+    ("WORDING", "al final de la segunda oración"),
+    ("WORDING", "al final la frase (del numeral 6)"),
+    ("WORDING", "al final, luego del punto que pasa a ser una coma"),
+    ("INCISO 3", "luego del punto final, que pasa a ser punto seguido"),
+    ("INCISO 1", "incorpora una frase final al inciso primero"),
+    ("WORDING", "añade en su parte final"),
+    ("WORDING", "al final"),
+    ("INCISO", "a continuación del actual inciso final"),
+])
+def test_add_inside_existing_text_is_unresolved(scope, placement):
+    assert apply_one(ARTICLE, add(placement, scope)) is None
+
+
+@pytest.mark.parametrize("content_to_remove", [None, "", ARTICLE, "Artículo 4.- " + ARTICLE.replace("\n", " ")])
+def test_total_changes_apply_to_the_whole_body(content_to_remove):
+    delete = {"action": "DELETE", "target_scope": "TOTAL", "content_to_remove": content_to_remove}
+    substitute = dict(delete, action="SUBSTITUTE", content="Nuevo texto.")
+    assert apply_one(ARTICLE, delete) == ("", "deleted")
+    assert apply_one(ARTICLE, substitute) == ("Nuevo texto.", "active")
+
+
+@pytest.mark.parametrize("content_to_remove", ["Segunda oración del primero.", "Del derecho a la vivienda"])
+def test_total_changes_naming_part_of_the_article_are_unresolved(content_to_remove):
+    delete = {"action": "DELETE", "target_scope": "TOTAL", "content_to_remove": content_to_remove}
+    substitute = dict(delete, action="SUBSTITUTE", content="Nuevo texto.")
+    assert apply_one(ARTICLE, delete) is None
+    assert apply_one(ARTICLE, substitute) is None
+
+
+def modify(content_to_remove, content):
+    return {"action": "MODIFY_PHRASE", "target_scope": "WORDING", "content_to_remove": content_to_remove, "content": content}
+
+
+def test_modify_phrase_keeps_text_outside_the_edit():
+    article = "El Estado  reconoce ,  en especial, la vivienda digna.\nSegundo  inciso ; intacto."
+    result = apply_one(article, modify("la vivienda digna", "“el derecho a la vivienda”"))
+    assert result == ("El Estado  reconoce ,  en especial, el derecho a la vivienda.\nSegundo  inciso ; intacto.", "active")
+
+
+@pytest.mark.parametrize("old, new, expected", [
+    ("especial", "particular", "El Estado reconoce, en particular, la vivienda."),
+    (", en especial", "", "El Estado reconoce, la vivienda."),
+    ("en especial,", "", "El Estado reconoce, la vivienda."),
+    ("El Estado", "La República", "La República reconoce, en especial, la vivienda."),
+    ("la vivienda", "", "El Estado reconoce, en especial,."),
+])
+def test_modify_phrase_fixes_spacing_only_at_the_seams(old, new, expected):
+    assert apply_one("El Estado reconoce, en especial, la vivienda.", modify(old, new)) == (expected, "active")
+
+
+@pytest.mark.parametrize("old", ["", "no aparece", "la"])
+def test_modify_phrase_needs_exactly_one_match(old):
+    assert apply_one("la casa y la vivienda.", modify(old, "x")) is None
+
+
+def test_delete_phrase_goes_through_the_same_splice():
+    delete = {"action": "DELETE", "target_scope": "WORDING", "content_to_remove": "“, en especial”"}
+    assert apply_one("Reconoce  la casa, en especial, la vivienda.\nOtro  inciso.", delete) == \
+        ("Reconoce  la casa, la vivienda.\nOtro  inciso.", "active")
+
+
+# --- ADD between two words ---
+
+def between(placement, content="y social"):
+    return {"action": "ADD", "target_scope": "WORDING", "placement_instructions": placement, "content": content}
+
+
+def test_add_between_two_adjacent_words():
+    result = apply_one("Un Estado democrático de derecho.", between('entre la palabra "democrático" y la palabra "de"'))
+    assert result == ("Un Estado democrático y social de derecho.", "active")
+
+
+def test_add_between_with_leading_punctuation():
+    result = apply_one("Un Estado democrático de derecho.", between("entre “democrático” y “de”", content=", plurinacional"))
+    assert result == ("Un Estado democrático, plurinacional de derecho.", "active")
+
+
+@pytest.mark.parametrize("content", [
+    "Un Estado plurinacional de derecho.",                              # no match
+    "Un Estado democrático de derecho y democrático de hecho.",         # two matches
+    "Un Estado democrático y de derecho.",                              # words not adjacent
+])
+def test_add_between_needs_exactly_one_adjacent_match(content):
+    assert apply_one(content, between('entre "democrático" y "de"')) is None
+
+
+def test_add_between_needs_two_quoted_words():
+    assert apply_one("Un Estado democrático de derecho.", between('entre "democrático" y la palabra de')) is None
+
+
+# --- DELETE / SUBSTITUTE on an inciso ---
+
+THREE = "Uno.\nDos.\nTres."
+
+
+@pytest.mark.parametrize("scope, expected", [
+    ("INCISO 2", 2), ("inciso 10", 10), ("INCISO FINAL", -1),
+    ("INCISO", None), ("INCISO 2 Y 3", None), ("INCISOS 1-2", None), ("TOTAL", None), (None, None),
+])
+def test_parse_inciso(scope, expected):
+    assert parse_inciso(scope) == expected
+
+
+@pytest.mark.parametrize("scope, expected", [
+    ("INCISO 1", "Dos.\nTres."), ("INCISO 2", "Uno.\nTres."), ("INCISO FINAL", "Uno.\nDos."),
+])
+def test_delete_inciso(scope, expected):
+    assert apply_one(THREE, {"action": "DELETE", "target_scope": scope}) == (expected, "active")
+
+
+@pytest.mark.parametrize("scope, expected", [
+    ("INCISO 1", "Nuevo.\nDos.\nTres."), ("INCISO FINAL", "Uno.\nDos.\nNuevo."),
+])
+def test_substitute_inciso(scope, expected):
+    assert apply_one(THREE, {"action": "SUBSTITUTE", "target_scope": scope, "content": "“Nuevo.”"}) == (expected, "active")
+
+
+@pytest.mark.parametrize("content, scope", [
+    (THREE, "INCISO 4"),          # past the last inciso
+    (THREE, "INCISO"),            # which one is not said
+    ("Uno solo.", "INCISO 1"),    # single-paragraph article: the whole text, leave it to the model
+])
+@pytest.mark.parametrize("action", ["DELETE", "SUBSTITUTE"])
+def test_inciso_changes_out_of_range_are_unresolved(content, scope, action):
+    assert apply_one(content, {"action": action, "target_scope": scope, "content": "Nuevo."}) is None
+
+
+# --- ADD as a new numbered inciso ---
+
+def ordinal(n):
+    return add(f"como nuevo inciso {n}")
+
+
+@pytest.mark.parametrize("n, expected", [
+    ("primero", "Texto agregado.\nUno.\nDos.\nTres."),
+    ("segundo", "Uno.\nTexto agregado.\nDos.\nTres."),
+    ("cuarto", "Uno.\nDos.\nTres.\nTexto agregado."),
+])
+def test_add_ordinal_inciso(n, expected):
+    assert apply_one(THREE, ordinal(n)) == (expected, "active")
+
+
+@pytest.mark.parametrize("content, n", [
+    (THREE, "quinto"),            # would leave a gap after the last inciso
+    (THREE, "undécimo"),          # ordinal the engine does not know
+    ("Uno solo.", "primero"),     # ambiguous on a single-paragraph article
+])
+def test_add_ordinal_inciso_out_of_bounds_is_unresolved(content, n):
+    assert apply_one(content, ordinal(n)) is None
+
+
+def test_add_ordinal_inciso_after_single_paragraph():
+    assert apply_one("Uno solo.", ordinal("segundo")) == ("Uno solo.\nTexto agregado.", "active")
+
+
+# --- resolve_locally ---
+
+def draft(*articles):
+    return MasterDraft([
+        {"original_id": f"G-{i + 1}", "current_number": number, "status": status, "final_content": content}
+        for i, (number, content, status) in enumerate(articles)
+    ])
+
+
+def ind(number, target, **fields):
+    return {"number": number, "target_article": target, **fields}
+
+
+def test_resolve_locally_applies_in_report_order_and_keeps_the_draft():
+    master = draft(("1", "El Estado reconoce la vivienda.", "active"))
+    updates, unresolved = resolve_locally(master, [
+        ind(1, "Artículo 1", **modify("reconoce", "garantiza")),
+        ind(2, "1", **modify("garantiza la vivienda", "garantiza la vivienda digna")),
+    ])
+    assert unresolved == []
+    assert updates == [{"original_id": "G-1", "current_number": "1", "content": "El Estado garantiza la vivienda digna.",
+                        "status": "active", "applied_indication_ids": ["1", "2"]}]
+    assert master.get("G-1")["final_content"] == "El Estado reconoce la vivienda."
+
+
+def test_resolve_locally_folds_duplicate_amendments():
+    master = draft(("1", "El Estado reconoce la vivienda.", "active"))
+    updates, unresolved = resolve_locally(master, [
+        ind(1, "1", **modify("reconoce", "garantiza")),
+        ind(2, "1", **modify("“reconoce”", "garantiza")),      # same effect, voted twice
+    ])
+    assert unresolved == []
+    assert updates[0]["content"] == "El Estado garantiza la vivienda."
+    assert updates[0]["applied_indication_ids"] == ["1", "2"]
+
+
+def test_resolve_locally_defers_the_rest_of_an_article_after_an_unresolved_indication():
+    master = draft(("1", "El Estado reconoce la vivienda.", "active"), ("2", "Otro artículo.", "active"))
+    later = ind(3, "1", **modify("vivienda", "casa"))
+    updates, unresolved = resolve_locally(master, [
+        ind(1, "1", **modify("no aparece", "x")),
+        ind(2, "2", **modify("Otro", "Un")),
+        later,
+    ])
+    assert [u["original_id"] for u in updates] == ["G-2"]
+    assert [i["number"] for i in unresolved] == [1, 3]
+    assert unresolved[1] is later
+
+
+def test_resolve_locally_stops_at_a_deleted_article():
+    master = draft(("1", "El Estado reconoce la vivienda.", "active"))
+    updates, unresolved = resolve_locally(master, [
+        ind(1, "1", action="DELETE", target_scope="TOTAL"),
+        ind(2, "1", **modify("vivienda", "casa")),
+    ])
+    assert updates[0]["status"] == "deleted" and updates[0]["applied_indication_ids"] == ["1"]
+    assert [i["number"] for i in unresolved] == [2]
+
+
+@pytest.mark.parametrize("target", ["7", "3"])
+def test_resolve_locally_needs_a_single_active_target(target):
+    master = draft(("3", "A.", "active"), ("3", "B.", "active"), ("4", "C.", "deleted"))
+    updates, unresolved = resolve_locally(master, [ind(1, target, **modify("A", "Z"))])
+    assert updates == [] and len(unresolved) == 1
@@ -0,0 +1,90 @@
+import pytest
+
+from constitutional_proposal_tracking.drafts.master_draft import MasterDraft
+from constitutional_proposal_tracking.drafts.numbering import article_sort_key, normalize_article_number
+from constitutional_proposal_tracking.utils.authors import AuthorRegistry
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("Artículo 6° A", "6 a"),
+    ("Artículo 1 A.- Forma de Estado.", "1 a"),
+    ("Art. N° 5 bis", "5 bis"),
+    (12.0, "12"),
+    ("Artículo 1.2 (Autor)", "1.2"),
+    ("3 y 4", "3"),
+    ("3 a 5", "3"),
+    ("Artículo 71 y Artículo 72", "71"),
+    ("Artículo 62 A y Artículo 62 B", "62 a"),
+    ("S/N", "s/n"),
+    ("", None),
+    (None, None),
+])
+def test_normalize_article_number(value, expected):
+    assert normalize_article_number(value) == expected
+
+
+def test_article_sort_key_follows_constitutional_order():
+    numbers = ["S/N", "10", "2 ter", "2 b", "2", "1.2", "2 bis", "1", "2 a"]
+    ordered = sorted(numbers, key=article_sort_key)
+    assert ordered[:3] == ["1", "1.2", "2"]
+    assert set(ordered[3:5]) == {"2 a", "2 bis"} and set(ordered[5:7]) == {"2 b", "2 ter"}
+    assert ordered[7:] == ["10", "S/N"]
+
+
+def article(gid, number, status="active", **fields):
+    return {"original_id": gid, "current_number": number, "status": status, "final_content": f"Texto {gid}.", **fields}
+
+
+def draft():
+    return MasterDraft([
+        article("G-1", "1"), article("G-2", "10"), article("G-3", "2"),
+        article("G-4", "Artículo 2 bis", status="deleted"), article("G-5", "S/N"),
+    ])
+
+
+def numbers(articles):
+    return [a["current_number"] for a in articles]
+
+
+def test_lookup_by_id_number_and_status():
+    master = draft()
+    assert master.get("G-3")["current_number"] == "2" and master.get("G-9") is None
+    assert master.position("G-2") == 1
+    assert numbers(master.by_number("Artículo 2")) == ["2"]
+    assert master.by_number("2 bis") == [] and numbers(master.by_number("2 bis", status=None)) == ["Artículo 2 bis"]
+    assert master.positions_with_status("deleted") == [3]
+    assert [a["original_id"] for a in master.active()] == ["G-1", "G-2", "G-3", "G-5"]
+
+
+def test_ordered_inserts_new_articles_in_numbering_order():
+    master = draft()
+    master.append(article("N-1", "2 a"))
+    master.append(article("N-2", "2 ter"))
+    assert numbers(master.ordered()) == ["1", "2", "2 a", "Artículo 2 bis", "2 ter", "10", "S/N"]
+    assert numbers(master.ordered("active")) == ["1", "2", "2 a", "2 ter", "10", "S/N"]
+    assert [a["original_id"] for a in master][-2:] == ["N-1", "N-2"]    # storage order is kept
+
+
+def test_append_rejects_duplicate_ids():
+    with pytest.raises(ValueError):
+        draft().append(article("G-1", "3"))
+
+
+def test_update_renumbers_and_reindexes():
+    master = draft()
+    master.update("G-2", current_number="3", final_content="Nuevo.")
+    assert numbers(master.ordered()) == ["1", "2", "Artículo 2 bis", "3", "S/N"]
+    assert master.by_number("10") == [] and master.by_number("3")[0]["final_content"] == "Nuevo."
+
+    master.update("G-3", status="deleted")
+    assert master.by_number("2") == [] and master.positions_with_status("deleted") == [2, 3]
+    assert numbers(master.ordered("active")) == ["1", "3", "S/N"]
+
+
+def test_authors_are_written_back_once_per_sync():
+    registry = AuthorRegistry(["Bassa, Jaime", "Atria, Fernando"])
+    master = MasterDraft([article("G-1", "1", accumulated_authors=["Atria, Fernando"])], registry)
+    master.add_authors("G-1", registry.mask(["Bassa, Jaime"]))
+    assert master.get("G-1")["accumulated_authors"] == ["Atria, Fernando"]
+    master.sync_authors()
+    assert master.get("G-1")["accumulated_authors"] == ["Bassa, Jaime", "Atria, Fernando"]
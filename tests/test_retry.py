@@ -0,0 +1,74 @@
+import json
+import types
+
+import pytest
+
+from constitutional_proposal_tracking.gemini import retry
+from constitutional_proposal_tracking.gemini.retry import ParseError, SchemaError, classify
+
+
+def api_error(name, message=""):
+    """An exception whose class is named like the SDK's (google.api_core.exceptions...)."""
+    return type(name, (Exception,), {})(message)
+
+
+def blocked_text(finish_reason, message="Invalid operation: the response has no valid Part."):
+    """The ValueError response.text raises, with the response attached as cache.generate_content does."""
+    e = ValueError(message)
+    e.response = types.SimpleNamespace(candidates=[types.SimpleNamespace(finish_reason=finish_reason)])
+    return e
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (api_error("ResourceExhausted", "429 Resource has been exhausted"), retry.RATE_LIMIT),
+    (Exception("429 Too Many Requests"), retry.RATE_LIMIT),
+    (api_error("DeadlineExceeded", "504 Deadline Exceeded"), retry.TIMEOUT),
+    (TimeoutError("read timed out"), retry.TIMEOUT),
+    (api_error("ServiceUnavailable", "503 overloaded"), retry.SERVER),
+    (ConnectionResetError("reset by peer"), retry.SERVER),
+    (Exception("500 Internal error"), retry.SERVER),
+    (api_error("BlockedPromptException"), retry.SAFETY),
+    (SchemaError("expected a list"), retry.SCHEMA),
+    (ParseError("invalid JSON", "[{"), retry.PARSE),
+    (json.JSONDecodeError("Expecting value", "", 0), retry.PARSE),
+    (KeyError("candidates"), retry.OTHER),
+    (ValueError("invalid literal for int()"), retry.OTHER),
+])
+def test_classify_by_exception(exc, expected):
+    assert classify(exc) == expected
+
+
+@pytest.mark.parametrize("reason, expected", [
+    ("SAFETY", retry.SAFETY),
+    ("BLOCKLIST", retry.SAFETY),
+    ("PROHIBITED_CONTENT", retry.SAFETY),
+    ("MAX_TOKENS", retry.PARSE),          # cut off: repair asks for the complete JSON
+    ("RECITATION", retry.SERVER),
+    ("OTHER", retry.SERVER),
+    (3, retry.SAFETY),                    # bare FinishReason numbers
+    (2, retry.PARSE),
+    (4, retry.SERVER),
+])
+def test_classify_by_finish_reason_of_the_attached_response(reason, expected):
+    assert classify(blocked_text(reason)) == expected
+
+
+def test_classify_reads_the_finish_reason_as_an_enum():
+    reason = types.SimpleNamespace(name="MAX_TOKENS")
+    assert classify(blocked_text(reason)) == retry.PARSE
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("The candidate's [finish_reason](https://ai.google.dev/api/generate-content#finishreason) is 2.", retry.PARSE),
+    ("The candidate's [finish_reason](https://ai.google.dev/api/generate-content#finishreason) is 3.", retry.SAFETY),
+    ("response.text requires a valid Part; finish_reason is RECITATION", retry.SERVER),
+    ("The response was blocked due to SAFETY", retry.SAFETY),
+])
+def test_classify_falls_back_to_the_message(message, expected):
+    assert classify(ValueError(message)) == expected
+
+
+def test_stop_candidate_exception_uses_its_candidate():
+    candidate = types.SimpleNamespace(finish_reason="MAX_TOKENS")
+    exc = type("StopCandidateException", (Exception,), {})(candidate)
+    assert classify(exc) == retry.PARSE
@@ -0,0 +1,102 @@
+from constitutional_proposal_tracking.drafts.context import rekey_new_articles
+from constitutional_proposal_tracking.drafts.master_draft import MasterDraft
+from constitutional_proposal_tracking.drafts.shards import combine_updates, find_conflicts, shard_indications
+
+TEXTS = [
+    "El Estado reconoce la vivienda digna.",
+    "La ley regulará el sistema de salud pública.",
+    "Toda persona tiene derecho a la educación gratuita.",
+    "Las aguas son bienes comunes inapropiables.",
+    "El Congreso aprobará el presupuesto anual.",
+]
+
+
+def draft():
+    return MasterDraft([
+        {"original_id": f"G-{i + 1}", "current_number": str(i + 1), "status": "active", "final_content": text}
+        for i, text in enumerate(TEXTS)
+    ])
+
+
+def ind(number, target, **fields):
+    return {"number": number, "target_article": target, "action": "ADD", "content": "x", **fields}
+
+
+def numbers(shards):
+    return [[i["number"] for i in shard] for shard in shards]
+
+
+def test_indications_sharing_a_target_stay_together_in_report_order():
+    indications = [
+        ind(1, "1"),
+        ind(2, "2"),
+        ind(3, "1"),
+        # targets article 2 by number and article 3 by quoting it: joins 2 and 5 in one group
+        ind(4, "2", content_to_remove="derecho a la educación gratuita"),
+        ind(5, "3"),
+        ind(6, "5"),
+    ]
+    shards, unlocated = shard_indications(draft(), indications, max_shards=4)
+    assert unlocated == []
+    assert sorted(numbers(shards)) == [[1, 3], [2, 4, 5], [6]]
+
+
+def test_shards_are_packed_up_to_max_shards():
+    indications = [ind(n, str(n)) for n in range(1, 6)]
+    shards, _ = shard_indications(draft(), indications, max_shards=2)
+    assert sorted(len(shard) for shard in shards) == [2, 3]
+    assert sorted(n for shard in numbers(shards) for n in shard) == [1, 2, 3, 4, 5]
+    assert all(shard == sorted(shard) for shard in numbers(shards))
+
+
+def test_unlocated_indications_are_returned_apart():
+    shards, unlocated = shard_indications(draft(), [ind(1, "1"), ind(2, "99"), ind(3, "4")])
+    assert sorted(numbers(shards)) == [[1], [3]]
+    assert [i["number"] for i in unlocated] == [2]
+
+
+def test_sharding_does_not_apply_to_one_indication_or_one_shard():
+    indications = [ind(1, "1"), ind(2, "2")]
+    assert shard_indications(draft(), indications[:1]) == ([indications[:1]], [])
+    assert shard_indications(draft(), indications, max_shards=1) == ([indications], [])
+
+
+def update(gid, content="Nuevo."):
+    return {"original_id": gid, "current_number": "1", "content": content, "status": "active"}
+
+
+def test_find_conflicts_between_shards_touching_the_same_article():
+    existing = {"G-1", "G-2", "G-3"}
+    shard_updates = [
+        [update("G-1")],
+        [update("G-2"), update("G-1")],     # also rewrites G-1 (e.g. renumbering a neighbour)
+        [update("G-3")],
+        None,                               # a failed shard
+    ]
+    assert find_conflicts(shard_updates, existing) == {0, 1}
+
+
+def test_new_articles_are_not_conflicts():
+    assert find_conflicts([[update("NEW-1")], [update("NEW-1")]], {"G-1"}) == set()
+
+
+def test_combine_updates_gives_new_articles_unique_ids():
+    existing = {"G-1", "G-2"}
+    shard_updates = [
+        [update("G-1"), update("NEW-1", "A.")],
+        [update("NEW-1", "B."), update("NEW-2", "C.")],
+        [update("G-2"), update("NEW-1", "D.")],
+    ]
+    combined = combine_updates(shard_updates, existing)
+    assert [(u["original_id"], u["content"]) for u in combined] == [
+        ("G-1", "Nuevo."), ("NEW-1", "A."), ("NEW-1-2", "B."), ("NEW-2", "C."), ("G-2", "Nuevo."), ("NEW-1-3", "D."),
+    ]
+    assert shard_updates[1][0]["original_id"] == "NEW-1"    # inputs are not modified
+
+
+def test_rekey_treats_ids_outside_the_context_as_new_articles():
+    taken = {"G-1", "G-2", "G-3"}
+    rekeyed = rekey_new_articles([update("G-1"), update("G-3"), update("G-9")], {"G-1", "G-2"}, taken)
+    # G-3 exists but was not in the context: the model invented it, it must not overwrite G-3
+    assert [u["original_id"] for u in rekeyed] == ["G-1", "G-3-2", "G-9"]
+    assert taken == {"G-1", "G-2", "G-3", "G-3-2", "G-9"}
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from constitutional_proposal_tracking.gemini.retry import ParseError, RetryStats, call_with_retry
+from constitutional_proposal_tracking.gemini.streaming import JsonArrayStream, collect_json_array, json_array_complete
+
+WHOLE = '```json\n[{"n": 1, "t": "a ] }"}, {"n": 2}, {"n": 3}]\n```'
+TRUNCATED = '[{"n": 1, "t": "a ] }"}, {"n": 2}, {"n": '
+
+
+def chunks(text, size=5):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def sidecar_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_objects_are_emitted_as_they_close():
+    parser = JsonArrayStream()
+    assert parser.feed('[{"n": 1}, {"n"') == [{"n": 1}]
+    assert parser.feed(': 2}]') == [{"n": 2}]
+    assert parser.complete
+
+
+def test_malformed_objects_are_skipped_and_counted():
+    objects, parser = collect_json_array(['[{"n": 1}, {"n": 2,}, {"n": 3}]'])
+    assert objects == [{"n": 1}, {"n": 3}]
+    assert (parser.objects, parser.errors, parser.complete) == (2, 1, True)
+
+
+@pytest.mark.parametrize("text, complete", [(WHOLE, True), (TRUNCATED, False), ("no JSON here", False)])
+def test_json_array_complete(text, complete):
+    assert json_array_complete(text) is complete
+
+
+def test_truncated_stream_keeps_the_completed_objects_in_the_sidecar(tmp_path):
+    sidecar = tmp_path / "out" / "report.partial.jsonl"
+    objects, parser = collect_json_array(chunks(TRUNCATED), str(sidecar))
+    assert objects == [{"n": 1, "t": "a ] }"}, {"n": 2}]
+    with pytest.raises(ParseError):
+        parser.raise_if_incomplete()
+    assert sidecar_lines(sidecar) == objects
+
+
+def test_retried_attempts_append_to_the_sidecar(tmp_path):
+    sidecar = str(tmp_path / "report.partial.jsonl")
+    streams = iter([chunks(TRUNCATED), chunks('[{"n": 1, "t": "a ] }"}, {"n')])
+
+    def attempt(parts):
+        objects, parser = collect_json_array(next(streams), sidecar)
+        parser.raise_if_incomplete()
+        return objects
+
+    with pytest.raises(ParseError):
+        call_with_retry(attempt, ["prompt"], stats=RetryStats())
+    # The first attempt's objects survive the retry
+    assert [obj["n"] for obj in sidecar_lines(sidecar)] == [1, 2, 1]
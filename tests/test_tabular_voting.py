@@ -0,0 +1,124 @@
+import pytest
+
+from constitutional_proposal_tracking.config.commission_profiles import LAYOUTS
+from constitutional_proposal_tracking.extraction.tabular_voting import MemberMatcher, parse_fields, parse_report
+from constitutional_proposal_tracking.pdf.text_layer import PdfText
+
+LAYOUT = LAYOUTS["TABULAR_VOTING"]
+MEMBERS = ["Mella, Jeniffer", "Gómez, Yarela", "Bassa, Jaime", "Atria, Fernando", "Gómez, Claudio"]
+HEADER = ["A favor", "En contra", "Abstención", "Resultado"]
+
+
+def grid(result):
+    return [HEADER, ["20", "3", "0", result]]
+
+
+def page(number, *events):
+    """A text-layer page dict (pdf/text_layer.extract_page) with `events` in reading order."""
+    lines = [{"top": 10.0, "text": f"Informe Comisión 3 - página {number}"}]    # running header
+    tables = []
+    for i, (kind, value) in enumerate(events):
+        top = 100.0 + 20 * i
+        if kind == "line":
+            lines.append({"top": top, "text": value})
+        else:
+            tables.append({"bbox": [50.0, top, 550.0, top + 10], "rows": value, "cells": []})
+    return {"page": number, "width": 600.0, "height": 800.0, "chars": 1000, "text": "", "lines": lines, "tables": tables}
+
+
+REPORT = PdfText("C3_VOTACION_informe.pdf", "digest", [
+    page(1,
+         ("line", "En votación: Artículo 49"),
+         ("line", "- IND 401 (07 Mella, Y. Gómez) Para sustituir el inciso segundo"),
+         ("line", "por el siguiente: “Toda persona tiene derecho a la vivienda.”"),
+         ("table", grid("APROBADA")),
+         ("line", "- IND 402 (Bassa) Para suprimir la frase “de manera gratuita”."),
+         ("table", grid("RECHAZADA")),
+         ("line", "- IND 403 (Atria) Para agregar, a continuación del inciso final, el siguiente inciso: “Texto nuevo.”"),
+         ("table", grid("APROBADA por unanimidad")),
+         ("line", "- IND 404 (Pérez) Para suprimir la palabra “solo”."),
+         ("table", grid("APROBADA")),
+         ("line", "- IND 405 (Bassa) Para suprimir la palabra “además”."),
+         ("line", "- IND 406 (Atria, Bassa) Para sustituir la expresión “podrá” por “deberá”."),
+         ("table", grid("APROBADA"))),
+    page(2,
+         ("line", "En votación: Artículo 50 bis"),
+         ("line", "- IND 407 (Bassa) Para suprimir el artículo."),
+         ("table", [HEADER])),                                  # grid continues on the next page
+    page(3,
+         ("table", [["21", "0", "1", "APROBADO"]]),
+         ("line", "- IND 408 (Gómez) Para agregar en el artículo 51 la frase “con todo”."),
+         ("line", "- IND 409 (Bassa) Para sustituir el inciso primero."),
+         ("table", grid("APROBADA"))),
+])
+
+
+@pytest.fixture(scope="module")
+def parsed():
+    return parse_report(REPORT, LAYOUT, MEMBERS)
+
+
+def test_approved_blocks_become_records(parsed):
+    records, _ = parsed
+    assert records == [
+        {"number": "401", "authors_matched": ["Mella, Jeniffer", "Gómez, Yarela"], "target_article": 49,
+         "action": "SUBSTITUTE", "target_scope": "INCISO 2", "content": "Toda persona tiene derecho a la vivienda.",
+         "content_to_remove": None, "placement_instructions": None},
+        {"number": "403", "authors_matched": ["Atria, Fernando"], "target_article": 49,
+         "action": "ADD", "target_scope": "INCISO FINAL", "content": "Texto nuevo.",
+         "content_to_remove": None, "placement_instructions": "a continuación del inciso final"},
+        {"number": "406", "authors_matched": ["Atria, Fernando", "Bassa, Jaime"], "target_article": 49,
+         "action": "MODIFY_PHRASE", "target_scope": "WORDING", "content": "deberá",
+         "content_to_remove": "podrá", "placement_instructions": None},
+        {"number": "407", "authors_matched": ["Bassa, Jaime"], "target_article": "50 bis",
+         "action": "DELETE", "target_scope": "TOTAL", "content": "",
+         "content_to_remove": None, "placement_instructions": None},
+    ]
+
+
+def test_blocks_the_model_has_to_read_are_returned_unresolved(parsed):
+    _, unresolved = parsed
+    assert [(b.lines[0].split(" (")[0], b.reason) for b in unresolved] == [
+        ("- IND 404", "unresolved authors"),
+        ("- IND 405", "several blocks before one voting grid"),
+        ("- IND 408", "several blocks before one voting grid"),
+        ("- IND 409", "unclear action or content"),
+    ]
+    assert unresolved[0].render().startswith("En votación: Artículo 49\n- IND 404")
+    assert "APROBADA" in unresolved[0].render()
+
+
+def test_rejected_blocks_and_running_headers_are_dropped(parsed):
+    records, unresolved = parsed
+    numbers = [r["number"] for r in records] + [b.lines[0] for b in unresolved]
+    assert not any("402" in n for n in numbers)
+    assert not any("Informe Comisión" in line for b in unresolved for line in b.lines)
+
+
+def test_block_without_a_grid_is_unresolved():
+    report = PdfText("x.pdf", "digest", [page(1, ("line", "En votación: Artículo 3"),
+                                                 ("line", "- IND 1 (Bassa) Para suprimir el artículo."))])
+    records, unresolved = parse_report(report, LAYOUT, MEMBERS)
+    assert records == [] and [b.reason for b in unresolved] == ["no voting grid found"]
+
+
+@pytest.mark.parametrize("token, expected", [
+    ("Mella", "Mella, Jeniffer"),
+    ("Jeniffer Mella", "Mella, Jeniffer"),
+    ("Y. Gómez", "Gómez, Yarela"),
+    ("Gómez", None),            # two members with that surname
+    ("X. Mella", None),         # initial does not match
+    ("Pérez", None),
+])
+def test_member_matcher(token, expected):
+    assert MemberMatcher(MEMBERS).match(token) == expected
+
+
+@pytest.mark.parametrize("body", [
+    "Para sustituir la frase “uno”.",                           # MODIFY_PHRASE needs two quotes
+    "Para sustituir y suprimir el inciso “uno”.",               # two verbs
+    "Para sustituir “el “nuevo” texto”.",                       # nested quotes
+    "Para agregar “uno”.",                                      # ADD without placement
+])
+def test_unclear_fields(body):
+    assert parse_fields(body) is None